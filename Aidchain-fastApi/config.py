@@ -19,13 +19,26 @@ MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
 # Streaming pour fichiers > 100 MB
 CHUNK_SIZE = 8192  # 8 KB chunks
 ENABLE_STREAMING = True
-
-# Extensions supportées
+STREAMING_THRESHOLD_MB = 100  # CSV au-delà: anonymisation par chunks de BATCH_SIZE lignes
+STREAMING_SAMPLE_CHUNKS = 5  # Chunks lus pour l'échantillon de détection
+OUTPUT_FORMATS = {'xlsx', 'csv', 'parquet'}  # Formats de sortie au choix (?output_format=)
+COLUMNAR_COMPRESSION = "zstd"  # Compression des exports Parquet / Arrow IPC
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Lecture des uploads par blocs de 1 MB
+UPLOAD_MEMORY_THRESHOLD_MB = 16  # Uploads plus petits gardés en mémoire, sinon fichier temporaire unique
+
+# Exports et téléchargements
+ARTIFACT_COMPRESSION = None  # Exports CSV / JSON / TXT stockés compressés: None, "gzip" ou "zstd"
+COMPRESSION_LEVELS = {"gzip": 6, "zstd": 3}
+DOWNLOAD_ENCODINGS = ["zstd", "gzip"]  # Compression négociée (Accept-Encoding), par préférence
+DOWNLOAD_MIN_COMPRESS_KB = 4  # Fichiers plus petits envoyés non compressés
+DOWNLOAD_CHUNK_SIZE = 256 * 1024  # Envoi par blocs de 256 KB
+
+# Extensions supportées (validées par /anonymize et /jobs)
 ALLOWED_EXTENSIONS = {
     '.csv', '.xlsx', '.xls',  # Tableurs
     '.pdf',                    # Documents
     '.txt', '.json',          # Texte
-    '.docx', '.doc'           # Word
+    '.parquet', '.feather', '.arrow',  # Colonnes (Parquet / Arrow IPC)
 }
 
 # ================== API INFO ==================
@@ -54,15 +67,84 @@ CORS_ALLOW_CREDENTIALS = True
 # Détection IA
 DEFAULT_LOCALE = "fr_FR"  # Faker locale
 DETECTION_CONFIDENCE_THRESHOLD = 0.30  # 30% confidence minimum
+NER_MEDICAL_MODELS = ["dmis-lab/biobert-base-cased-v1.2", "emilyalsentzer/Bio_ClinicalBERT"]  # Premier chargé gagne
+NER_GENERAL_MODELS = ["Davlan/xlm-roberta-base-finetuned-conll03-multilingual", "xlm-roberta-large-finetuned-conll03-english"]
+MODEL_CACHE_DIR = Path(os.getenv("AIDCHAIN_MODEL_CACHE", BASE_DIR / "artifacts" / "hub"))  # Artefacts du hub
+MODEL_OFFLINE = os.getenv("AIDCHAIN_OFFLINE", "0") == "1"  # Chargement depuis le cache local uniquement
+MODEL_WARMUP = "background"  # "blocking" (au démarrage), "background" (thread) ou "lazy" (premier usage)
+NER_BACKEND = "torch"  # "torch" (pipelines HF) ou "onnx" (int8, export: python -m models.onnx_ner)
+ONNX_MODEL_DIR = BASE_DIR / "artifacts" / "onnx"
+ONNX_THREADS = 0  # Threads intra-op ONNX Runtime (0 = défaut)
+NER_BATCH_SIZE = 16  # Textes par forward pass NER
+NER_CROSS_COLUMN_BATCH = True  # Regroupe les échantillons de toutes les colonnes en un seul batch
+NER_LONG_TEXT = True  # Textes longs découpés en fenêtres glissantes (sinon tronqués à 500 caractères)
+NER_WINDOW_TOKENS = 512  # Taille max d'une fenêtre (plafonnée par la longueur max du modèle)
+NER_WINDOW_STRIDE = 64  # Tokens de recouvrement entre deux fenêtres
+NER_WINDOW_CHARS = 2000  # Taille des fenêtres sans tokenizer (spaCy)
+NER_PRESCAN = True  # Fenêtres sans majuscule, chiffre ni '@' non envoyées au modèle
+NER_CACHE_ENABLED = True  # Cache des entités par (modèle, texte): seules les valeurs nouvelles passent au modèle
+NER_CACHE_MAX_ENTRIES = 100_000  # Entrées LRU (mémoire et disque)
+NER_CACHE_PATH = None  # Persistance entre redémarrages, ex: TEMP_DIR / "ner_cache.sqlite3"
+FAST_PATH_ENABLED = True  # Pré-classification vectorisée: seules les colonnes texte libre passent au NER
+FEATURES_FULL_COLUMN_MAX_ROWS = 50000  # Features email/téléphone sur toute la colonne en dessous de ce seuil
+IDENTIFIER_MODEL_PATH = BASE_DIR / "artifacts" / "identifier_model.joblib"  # python -m models.identifier_model
+ID_SCORE_THRESHOLD = 0.5  # Probabilité minimale pour une colonne d'identifiants
 
 # Performance
 MAX_WORKERS = 4  # Threads pour traitement parallèle
 BATCH_SIZE = 1000  # Lignes traitées par batch (pour gros CSV)
 
+# PDF (extraction par pages, NER sur tous les paragraphes)
+PDF_WORKERS = MAX_WORKERS  # Process d'extraction
+PDF_PAGES_PER_TASK = 8  # Pages par tâche d'extraction
+PDF_PARALLEL_MIN_PAGES = 16  # En dessous: extraction séquentielle
+PDF_CHUNK_CHARS = 500  # Taille max d'un paragraphe (une ligne du DataFrame)
+
+# Dates (décalage cohérent, format d'origine conservé)
+DATE_SHIFT_MAX_DAYS = 365  # Décalage dans [-N, +N] jours
+DATE_SHIFT_KEY = None  # None: un décalage par portée; "auto": par patient (colonne identifiant/personne); ou nom de colonne
+DATE_FORMAT_SAMPLE = 500  # Valeurs distinctes pour inférer le format
+DATE_FORMAT_MIN_RATIO = 0.8  # Part de l'échantillon que le format doit parser
+
+# Détection par colonne
+DETECTION_MODE = "sequential"  # "sequential" ou "parallel" (features en process, NER en file batchée)
+DETECTION_WORKERS = MAX_WORKERS
+
+# Exécuteur des pipelines (hors boucle asyncio)
+EXECUTOR_MODE = "thread"  # "thread" ou "process"
+MAX_QUEUE_SIZE = 8  # Jobs en attente max au-delà des workers (sinon 503)
+RETRY_AFTER_SECONDS = 30  # Valeur de l'en-tête Retry-After si saturé
+
+# Jobs asynchrones (POST /api/jobs)
+JOB_STORE_BACKEND = "memory"  # "memory" ou "sqlite" (partagé entre workers)
+JOB_STORE_PATH = TEMP_DIR / "jobs.sqlite3"
+
+# Datasets incrémentaux (ajout de lignes sans nouvelle détection)
+DATASET_STORE_PATH = TEMP_DIR / "datasets.sqlite3"
+
+# Correspondances pseudonymes (par job ou par tenant)
+MAPPING_STORE_BACKEND = "memory"  # "memory" ou "sqlite" (portées persistantes sur disque)
+MAPPING_STORE_DIR = TEMP_DIR / "mappings"
+MAPPING_STORE_MAX_ENTRIES = 100_000  # Entrées max par portée (LRU)
+MAPPING_STORE_MAX_MB = 64  # Mémoire max par portée (LRU)
+MAPPING_STORE_MAX_SCOPES = 32  # Portées ouvertes simultanément
+
+# Pseudonymisation
+PSEUDONYM_MODE = "keyed"  # "keyed" (HMAC sans état, reproductible entre workers) ou "store" (Faker aléatoire + store)
+PSEUDONYM_SECRET_KEY = os.getenv("AIDCHAIN_PSEUDONYM_KEY", "")  # Clé HMAC (prioritaire sur le fichier)
+PSEUDONYM_KEY_PATH = BASE_DIR / "secrets" / "pseudonym.key"  # Clé aléatoire générée au premier démarrage si la variable est absente
+PSEUDONYM_POOL_SIZE = 2000  # Valeurs Faker par pool (noms = prénom × nom)
+
 # ================== CACHE & CLEANUP ==================
 # Expiration fichiers uploadés/anonymisés
 FILE_EXPIRATION_HOURS = 24
 
+# Cache de résultats (même fichier + même configuration → réponse immédiate)
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_PATH = TEMP_DIR / "result_cache.sqlite3"
+RESULT_CACHE_DIR = TEMP_DIR / "result_cache"  # Copies propres au cache (liens physiques si possible)
+RESULT_CACHE_MAX_MB = 2048  # Taille max des fichiers anonymisés gardés en cache
+
 # Auto-cleanup
 ENABLE_AUTO_CLEANUP = True
 CLEANUP_INTERVAL_HOURS = 6  # Nettoyage toutes les 6h
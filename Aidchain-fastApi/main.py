@@ -6,12 +6,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from routes.anonymize import router as anonymize_router
+from routes.jobs import router as jobs_router
+from routes.datasets import router as datasets_router
+from routes.download import router as download_router
 from schemas.response import HealthCheckResponse, ErrorResponse
 from config import (
     API_TITLE,
     API_VERSION,
     API_DESCRIPTION,
-    CORS_ORIGINS
+    CORS_ORIGINS,
+    MODEL_WARMUP
 )
 
 # Timestamp de démarrage
@@ -22,7 +26,7 @@ startup_time = time.time()
 async def lifespan(app: FastAPI):
     """
     Gestion du cycle de vie de l'application
-    (Chargement des modèles au démarrage)
+    (Préchauffage des modèles selon MODEL_WARMUP)
     """
     print("\n" + "="*80)
     print("🚀 DÉMARRAGE AIDCHAIN API")
@@ -31,15 +35,30 @@ async def lifespan(app: FastAPI):
     # Préchargement des modèles IA
     from models import UltraProDetector, UltraProAnonymizer
     
-    print("\n📥 Chargement des modèles IA...")
-    detector = UltraProDetector()  # Singleton, charge une seule fois
+    detector = UltraProDetector()  # Singleton: enregistre les modèles sans les charger
     anonymizer = UltraProAnonymizer()
     
-    print("\n✅ Modèles chargés avec succès!")
+    if MODEL_WARMUP == 'blocking':
+        print("\n📥 Chargement des modèles IA...")
+        detector.models.warm_up()
+        print("\n✅ Modèles chargés!")
+    elif MODEL_WARMUP == 'background':
+        # L'API répond tout de suite; /health passe à healthy une fois les modèles prêts
+        print("\n📥 Chargement des modèles IA en arrière-plan...")
+        detector.models.warm_up(background=True)
+    
     print("="*80 + "\n")
     
     yield  # L'application tourne ici
     
+    # Arrêt du pool d'exécution des pipelines, puis des pools annexes
+    # (features / file NER du détecteur, extraction PDF)
+    from models.executor import PipelineExecutor
+    from models.pdf import shutdown_pool as shutdown_pdf_pool
+    PipelineExecutor().shutdown(wait=False)
+    detector.shutdown(wait=False)
+    shutdown_pdf_pool(wait=False)
+    
     print("\n" + "="*80)
     print("🛑 ARRÊT AIDCHAIN API")
     print("="*80 + "\n")
@@ -64,6 +83,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Content-Range", "Accept-Ranges", "Content-Encoding", "Content-Disposition"],
 )
 
 
@@ -102,6 +122,9 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 # 🛣️ INCLUSION DES ROUTES
 app.include_router(anonymize_router)
+app.include_router(jobs_router)
+app.include_router(datasets_router)
+app.include_router(download_router)
 
 
 # 🏥 HEALTH CHECK
@@ -113,19 +136,31 @@ app.include_router(anonymize_router)
 )
 async def health_check():
     """
-    Vérifie si l'API est opérationnelle et si les modèles sont chargés
+    Vérifie si l'API est opérationnelle et l'état de chaque modèle
     """
-    from models import UltraProDetector
+    from models.model_registry import ModelRegistry
+    from models.ner_cache import get_ner_cache
+    
+    registry = ModelRegistry()
+    ner_cache = get_ner_cache()
+    models = registry.status()
+    models_loaded = registry.ready()
     
-    detector = UltraProDetector()
-    models_loaded = detector._models_loaded
+    if models_loaded:
+        status = "healthy"
+    elif models and not any(m['required'] and m['status'] == 'failed' for m in models.values()):
+        status = "loading"  # Préchauffage en cours (ou modèles chargés au premier usage)
+    else:
+        status = "degraded"
     
     uptime = time.time() - startup_time
     
     return HealthCheckResponse(
-        status="healthy" if models_loaded else "degraded",
+        status=status,
         version=API_VERSION,
         models_loaded=models_loaded,
+        models=models,
+        ner_cache=ner_cache.stats() if ner_cache is not None else None,
         uptime_seconds=round(uptime, 2)
     )
 
@@ -147,6 +182,11 @@ async def root():
         "health": "/health",
         "endpoints": {
             "anonymize": "POST /api/anonymize",
+            "jobs": "POST /api/jobs",
+            "job_status": "GET /api/jobs/{job_id}",
+            "job_result": "GET /api/jobs/{job_id}/result",
+            "dataset": "GET /api/datasets/{dataset_id}",
+            "dataset_rows": "POST /api/datasets/{dataset_id}/rows",
             "download": "GET /api/download/{filename}"
         }
     }
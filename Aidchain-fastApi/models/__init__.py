@@ -1,10 +1,18 @@
+# Imports paresseux: "import models" ne charge ni pandas, ni Faker, ni les modèles
+_EXPORTS = {
+    'UltraProDetector': '.detector',
+    'UltraProAnonymizer': '.anonymizer',
+    'AidChainPipeline': '.pipeline',
+}
 
-from .detector import UltraProDetector
-from .anonymizer import UltraProAnonymizer
-from .pipeline import AidChainPipeline
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    'UltraProDetector',
-    'UltraProAnonymizer', 
-    'AidChainPipeline'
-]
\ No newline at end of file
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    from importlib import import_module
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
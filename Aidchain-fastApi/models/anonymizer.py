@@ -3,11 +3,28 @@ warnings.filterwarnings('ignore')
 
 import hashlib
 import random
-from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional
+import numpy as np
 import pandas as pd
 from faker import Faker
 
+from config import DATE_SHIFT_KEY, DATE_SHIFT_MAX_DAYS, PSEUDONYM_MODE
+
+from .dates import find_subject_column, shift_dates, subject_offsets
+from .mapping_store import LRUMappingStore, MappingStore
+from .pseudonym import KeyedPseudonymizer
+from .replacement import ReplacementEngine
+
+
+# Type d'entité → (espace de clés, méthode KeyedPseudonymizer, générateur Faker)
+ENTITY_PSEUDONYMS = {
+    'PERSON': ('person', 'name', 'name'),
+    'LOCATION': ('location', 'city', 'city'),
+    'ORGANIZATION': ('organization', 'company', 'company'),
+    'EMAIL': ('email', 'email', 'email'),
+    'PHONE': ('phone', 'phone', 'phone_number'),
+}
+
 
 class UltraProAnonymizer:
     """
@@ -15,7 +32,6 @@ class UltraProAnonymizer:
     """
     
     _instance = None
-    _mapping_cache = {}
     
     def __new__(cls, locale='fr_FR'):
         if cls._instance is None:
@@ -26,33 +42,74 @@ class UltraProAnonymizer:
         if hasattr(self, '_initialized'):
             return
         
+        if PSEUDONYM_MODE not in ('keyed', 'store'):
+            raise ValueError(f"PSEUDONYM_MODE invalide: {PSEUDONYM_MODE}")
+        
         self.fake = Faker(locale)
-        self.mapping_cache = self._mapping_cache
         Faker.seed(42)
         random.seed(42)
+        
+        # Mode "keyed": pseudonymes dérivés d'un HMAC, sans état ni store
+        self.keyed = KeyedPseudonymizer() if PSEUDONYM_MODE == 'keyed' else None
         self._initialized = True
     
-    def anonymize_dataframe(self, df: pd.DataFrame, detection_results: Dict) -> pd.DataFrame:
-        """Anonymise DataFrame complet"""
+    def _pseudonym(self, store: MappingStore, kind: str, str_val: str,
+                   keyed: Callable[[str], str], generate: Callable[[], str]) -> str:
+        """Pseudonyme cohérent: HMAC (mode keyed) ou Faker aléatoire mémorisé dans le store"""
+        if self.keyed is not None:
+            return keyed(str_val)
+        
+        return store.get_or_create(f"{kind}:{str_val}", generate)
+    
+    def anonymize_dataframe(self, df: pd.DataFrame, detection_results: Dict,
+                            progress: Optional[Callable[[int, int], None]] = None,
+                            store: Optional[MappingStore] = None) -> pd.DataFrame:
+        """
+        Anonymise DataFrame complet
+        
+        Args:
+            store: correspondances de la portée (job/tenant); store temporaire si absent
+        """
         df_anon = df.copy()
+        store = store if store is not None else LRUMappingStore()
         
-        for col_name, col_info in detection_results['columns'].items():
-            if not col_info['is_sensitive']:
-                continue
-            
+        sensitive = [
+            (col_name, col_info) for col_name, col_info in detection_results['columns'].items()
+            if col_info['is_sensitive']
+        ]
+        
+        # Décalage de dates par patient / entité: clés lues avant anonymisation
+        date_subject = self._date_subject(df, detection_results['columns'])
+        
+        for done, (col_name, col_info) in enumerate(sensitive, start=1):
             entity_types = col_info['entity_types']
             detected_entities = col_info['detected_entities']
             
-            df_anon[col_name] = self.anonymize_column(
-                df_anon, col_name, entity_types, detected_entities
-            )
+            # Texte libre (PDF): remplacement entité par entité dans le texte
+            if col_info.get('free_text'):
+                df_anon[col_name] = self.anonymize_text(df_anon[col_name], detected_entities, store)
+            else:
+                df_anon[col_name] = self.anonymize_column(
+                    df_anon, col_name, entity_types, detected_entities, store, date_subject
+                )
+            
+            if progress:
+                progress(done, len(sensitive))
         
         return df_anon
     
     def anonymize_column(self, df: pd.DataFrame, col_name: str, 
-                        entity_types: List[str], detected_entities: List[Dict]) -> pd.Series:
-        """Anonymisation intelligente"""
+                        entity_types: List[str], detected_entities: List[Dict],
+                        store: Optional[MappingStore] = None,
+                        date_subject: Optional[pd.Series] = None) -> pd.Series:
+        """
+        Anonymisation intelligente
+        
+        Args:
+            date_subject: patient / entité de chaque ligne (décalage de dates propre)
+        """
         col_data = df[col_name].copy()
+        store = store if store is not None else LRUMappingStore()
         
         # 🔒 CRITIQUE: Éviter sur-anonymisation
         # Si déjà des codes MED_, ne pas réanonymiser
@@ -61,225 +118,290 @@ class UltraProAnonymizer:
         
         # Dates (décalage temporel)
         if 'DATE' in entity_types:
-            col_data = self._anonymize_dates(col_data, detected_entities)
+            col_data = self._anonymize_dates(col_data, detected_entities, store, date_subject)
         
         # IDs (hash unique)
         elif 'IDENTIFIER' in entity_types:
-            col_data = self._anonymize_identifiers(col_data)
+            col_data = self._anonymize_identifiers(col_data, store)
         
         # Personnes (Faker noms)
         elif 'PERSON' in entity_types:
-            col_data = self._anonymize_persons(col_data, detected_entities)
+            col_data = self._anonymize_persons(col_data, detected_entities, store)
         
         # Lieux (Faker villes)
         elif 'LOCATION' in entity_types:
-            col_data = self._anonymize_locations(col_data, detected_entities)
+            col_data = self._anonymize_locations(col_data, detected_entities, store)
         
         # Emails
         elif 'EMAIL' in entity_types:
-            col_data = self._anonymize_emails(col_data, detected_entities)
+            col_data = self._anonymize_emails(col_data, detected_entities, store)
         
         # Phones
         elif 'PHONE' in entity_types:
-            col_data = self._anonymize_phones(col_data, detected_entities)
+            col_data = self._anonymize_phones(col_data, detected_entities, store)
         
         # Organisations
         elif 'ORGANIZATION' in entity_types:
-            col_data = self._anonymize_organizations(col_data, detected_entities)
+            col_data = self._anonymize_organizations(col_data, detected_entities, store)
         
         # Médical (codes génériques)
         else:
             medical_types = [t for t in entity_types if t not in 
                             ['PERSON', 'LOCATION', 'ORGANIZATION', 'DATE', 'IDENTIFIER', 'EMAIL', 'PHONE']]
             if medical_types:
-                col_data = self._anonymize_medical(col_data, detected_entities, medical_types)
+                col_data = self._anonymize_medical(col_data, detected_entities, medical_types, store)
         
         return col_data
     
-    def _anonymize_persons(self, col_data: pd.Series, entities: List[Dict]) -> pd.Series:
-        """Remplace noms par Faker"""
-        def replace_name(val):
-            if pd.isna(val):
-                return val
+    def anonymize_text(self, col_data: pd.Series, detected_entities: List[Dict],
+                       store: Optional[MappingStore] = None) -> pd.Series:
+        """Texte libre: chaque entité détectée est remplacée là où elle apparaît (une passe par valeur)"""
+        store = store if store is not None else LRUMappingStore()
+        mapping = {}
+        
+        for ent in self._filter_entities(detected_entities):
+            fake = self._entity_pseudonym(ent['type'], ent['text'], store)
+            if fake is not None:
+                mapping[ent['text']] = fake
+        
+        if not mapping:
+            return col_data
+        
+        engine = ReplacementEngine(mapping)
+        
+        def replace_entities(str_val):
+            replaced = engine.replace(str_val)
+            return replaced if replaced != str_val else None
+        
+        return self._map_unique(col_data, replace_entities)
+    
+    def _entity_pseudonym(self, entity_type: str, text: str, store: MappingStore) -> Optional[str]:
+        """Remplacement d'une entité isolée selon son type"""
+        if entity_type in ENTITY_PSEUDONYMS:
+            kind, keyed, generator = ENTITY_PSEUDONYMS[entity_type]
+            return self._pseudonym(store, kind, text, self.keyed and getattr(self.keyed, keyed),
+                                   getattr(self.fake, generator))
+        
+        if entity_type == 'IDENTIFIER':
+            return self._pseudonym(store, 'identifier', text, self.keyed and self.keyed.identifier,
+                                   lambda: f"ID_{hashlib.sha256(text.encode()).hexdigest()[:8].upper()}")
+        
+        if entity_type == 'DATE':
+            shifted = shift_dates(pd.Series([text]), self._date_offset(store)).iloc[0]
+            # Date illisible: remplacée par un marqueur plutôt que laissée en clair
+            return shifted if shifted is not None else '[DATE]'
+        
+        # Termes médicaux → codes MED_
+        return self._pseudonym(store, 'medical', text, self.keyed and self.keyed.medical,
+                               lambda: f"MED_{abs(hash(text)) % 10000:04d}")
+    
+    @staticmethod
+    def _filter_entities(entities: List[Dict]) -> List[Dict]:
+        """✅ FILTRE ANTI-OVER-ANONYMISATION"""
+        filtered_entities = []
+        generic_words = {'the', 'and', 'for', 'with', 'from', 'this', 'that', 'are', 'was', 'were'}
+        
+        for ent in entities:
+            text = ent['text']
             
-            str_val = str(val)
+            # Ignorer si :
+            # 1. Trop court (<3 caractères)
+            if len(text) < 3:
+                continue
+            
+            # 2. Mot générique anglais
+            if text.lower() in generic_words:
+                continue
             
+            # 3. Ponctuation seule
+            if not any(c.isalnum() for c in text):
+                continue
+            
+            # 4. Confiance trop faible (<40%)
+            if ent['confidence'] < 0.4:
+                continue
+            
+            filtered_entities.append(ent)
+        
+        return filtered_entities
+    
+    def _map_unique(self, col_data: pd.Series, replace: Callable[[str], Any]) -> pd.Series:
+        """
+        Factorise la colonne, calcule un remplacement par valeur distincte
+        puis le redistribue par take vectorisé
+        
+        Args:
+            replace: valeur (str) → remplacement, ou None pour garder l'original
+        
+        Les NaN et les valeurs non remplacées gardent leur valeur d'origine;
+        si rien n'est remplacé, la colonne (et son dtype) est renvoyée telle quelle.
+        """
+        mask = col_data.notna().to_numpy()
+        if not mask.any():
+            return col_data
+        
+        present = col_data[mask]
+        
+        # Clés = str(valeur); la conversion est évitée si la colonne est déjà du texte
+        if pd.api.types.infer_dtype(present, skipna=False) != 'string':
+            present = present.astype(str)
+        
+        codes, uniques = pd.factorize(present)
+        
+        replacements = np.empty(len(uniques), dtype=object)
+        changed = np.zeros(len(uniques), dtype=bool)
+        
+        for i, str_val in enumerate(uniques):
+            new_val = replace(str_val)
+            if new_val is not None:
+                replacements[i] = new_val
+                changed[i] = True
+        
+        if not changed.any():
+            return col_data
+        
+        values = col_data.to_numpy(dtype=object, copy=True)
+        present = values[mask]
+        hit = changed[codes]
+        present[hit] = replacements[codes[hit]]
+        values[mask] = present
+        
+        result = pd.Series(values, index=col_data.index, name=col_data.name)
+        
+        # Colonnes texte typées: on conserve le dtype
+        if pd.api.types.is_string_dtype(col_data.dtype) and col_data.dtype != object:
+            result = result.astype(col_data.dtype)
+        
+        return result
+    
+    def _anonymize_persons(self, col_data: pd.Series, entities: List[Dict], store: MappingStore) -> pd.Series:
+        """Remplace noms par Faker"""
+        def replace_name(str_val):
             # Ne pas toucher aux codes MED_
             if 'MED_' in str_val:
-                return val
-            
-            # Cache pour cohérence
-            if str_val not in self.mapping_cache:
-                self.mapping_cache[str_val] = self.fake.name()
+                return None
             
-            return self.mapping_cache[str_val]
+            return self._pseudonym(store, 'person', str_val, self.keyed and self.keyed.name, self.fake.name)
         
-        return col_data.apply(replace_name)
+        return self._map_unique(col_data, replace_name)
     
-    def _anonymize_locations(self, col_data: pd.Series, entities: List[Dict]) -> pd.Series:
+    def _anonymize_locations(self, col_data: pd.Series, entities: List[Dict], store: MappingStore) -> pd.Series:
         """Remplace lieux par Faker"""
-        def replace_location(val):
-            if pd.isna(val):
-                return val
-            
-            str_val = str(val)
-            
+        def replace_location(str_val):
             if 'MED_' in str_val:
-                return val
-            
-            if str_val not in self.mapping_cache:
-                self.mapping_cache[str_val] = self.fake.city()
+                return None
             
-            return self.mapping_cache[str_val]
+            return self._pseudonym(store, 'location', str_val, self.keyed and self.keyed.city, self.fake.city)
         
-        return col_data.apply(replace_location)
+        return self._map_unique(col_data, replace_location)
     
-    def _anonymize_organizations(self, col_data: pd.Series, entities: List[Dict]) -> pd.Series:
+    def _anonymize_organizations(self, col_data: pd.Series, entities: List[Dict], store: MappingStore) -> pd.Series:
         """Remplace organisations"""
-        def replace_org(val):
-            if pd.isna(val):
-                return val
-            
-            str_val = str(val)
-            
+        def replace_org(str_val):
             if 'MED_' in str_val:
-                return val
-            
-            if str_val not in self.mapping_cache:
-                self.mapping_cache[str_val] = self.fake.company()
+                return None
             
-            return self.mapping_cache[str_val]
+            return self._pseudonym(store, 'organization', str_val, self.keyed and self.keyed.company,
+                                   self.fake.company)
         
-        return col_data.apply(replace_org)
+        return self._map_unique(col_data, replace_org)
     
-    def _anonymize_dates(self, col_data: pd.Series, entities: List[Dict]) -> pd.Series:
-        """Décale dates de manière cohérente"""
-        if 'date_offset' not in self.mapping_cache:
-            self.mapping_cache['date_offset'] = random.randint(-365, 365)
+    def _date_offset(self, store: MappingStore, subject: str = '') -> int:
+        """Décalage en jours: commun à la portée, ou propre à un patient / une entité"""
+        if self.keyed is not None:
+            return self.keyed.date_offset(subject, DATE_SHIFT_MAX_DAYS, store.scope)
         
-        offset = self.mapping_cache['date_offset']
+        key = f"date_offset:{subject}" if subject else 'date_offset'
+        return store.get_or_create(key, lambda: random.randint(-DATE_SHIFT_MAX_DAYS, DATE_SHIFT_MAX_DAYS))
+    
+    @staticmethod
+    def _date_subject(df: pd.DataFrame, columns: Dict[str, Dict]) -> Optional[pd.Series]:
+        """Colonne patient / entité selon DATE_SHIFT_KEY (None: décalage commun)"""
+        if DATE_SHIFT_KEY is None:
+            return None
         
-        def shift_date(val):
-            if pd.isna(val):
-                return val
-            
-            try:
-                if isinstance(val, (datetime, pd.Timestamp)):
-                    return val + timedelta(days=offset)
-                
-                parsed = pd.to_datetime(val, errors='coerce')
-                if pd.notna(parsed):
-                    return parsed + timedelta(days=offset)
-                
-                return val
-            except:
-                return val
-        
-        return col_data.apply(shift_date)
+        col = find_subject_column(columns) if DATE_SHIFT_KEY == 'auto' else DATE_SHIFT_KEY
+        
+        if col is None or col not in df.columns:
+            return None
+        
+        return df[col]
+    
+    def _anonymize_dates(self, col_data: pd.Series, entities: List[Dict], store: MappingStore,
+                         subject: Optional[pd.Series] = None) -> pd.Series:
+        """Décale dates de manière cohérente (vectorisé, format d'origine conservé)"""
+        if subject is not None:
+            offsets = subject_offsets(subject, lambda key: self._date_offset(store, key))
+        else:
+            offsets = self._date_offset(store)
+        
+        return shift_dates(col_data, offsets)
     
-    def _anonymize_emails(self, col_data: pd.Series, entities: List[Dict]) -> pd.Series:
+    def _anonymize_emails(self, col_data: pd.Series, entities: List[Dict], store: MappingStore) -> pd.Series:
         """Remplace emails"""
-        def replace_email(val):
-            if pd.isna(val):
-                return val
-            
-            str_val = str(val)
-            
+        def replace_email(str_val):
             if 'MED_' in str_val or '@' not in str_val:
-                return val
+                return None
             
-            if str_val not in self.mapping_cache:
-                self.mapping_cache[str_val] = self.fake.email()
-            
-            return self.mapping_cache[str_val]
+            return self._pseudonym(store, 'email', str_val, self.keyed and self.keyed.email, self.fake.email)
         
-        return col_data.apply(replace_email)
+        return self._map_unique(col_data, replace_email)
     
-    def _anonymize_phones(self, col_data: pd.Series, entities: List[Dict]) -> pd.Series:
+    def _anonymize_phones(self, col_data: pd.Series, entities: List[Dict], store: MappingStore) -> pd.Series:
         """Remplace téléphones"""
-        def replace_phone(val):
-            if pd.isna(val):
-                return val
-            
-            str_val = str(val)
-            
+        def replace_phone(str_val):
             if 'MED_' in str_val:
-                return val
+                return None
             
             # Détection pattern téléphone
             digit_ratio = sum(c.isdigit() for c in str_val) / max(len(str_val), 1)
             
             if digit_ratio < 0.5:
-                return val
+                return None
             
-            if str_val not in self.mapping_cache:
-                self.mapping_cache[str_val] = self.fake.phone_number()
-            
-            return self.mapping_cache[str_val]
+            return self._pseudonym(store, 'phone', str_val, self.keyed and self.keyed.phone,
+                                   self.fake.phone_number)
         
-        return col_data.apply(replace_phone)
+        return self._map_unique(col_data, replace_phone)
     
-    def _anonymize_identifiers(self, col_data: pd.Series) -> pd.Series:
+    def _anonymize_identifiers(self, col_data: pd.Series, store: MappingStore) -> pd.Series:
         """Hash identifiants uniques"""
-        def hash_id(val):
-            if pd.isna(val):
-                return val
-            
-            str_val = str(val)
-            
+        def hash_id(str_val):
             if 'MED_' in str_val or 'ID_' in str_val:
-                return val
+                return None
             
-            if str_val not in self.mapping_cache:
+            def make_id():
                 hashed = hashlib.sha256(str_val.encode()).hexdigest()[:8]
-                self.mapping_cache[str_val] = f"ID_{hashed.upper()}"
+                return f"ID_{hashed.upper()}"
             
-            return self.mapping_cache[str_val]
+            return self._pseudonym(store, 'identifier', str_val, self.keyed and self.keyed.identifier, make_id)
         
-        return col_data.apply(hash_id)
-    
-    def _anonymize_medical(self, col_data: pd.Series, entities: List[Dict], medical_types: List[str]) -> pd.Series:
-     result = col_data.copy()
-    
-     medical_entities = [e for e in entities if e['type'] in medical_types]
+        return self._map_unique(col_data, hash_id)
     
-     # ✅ FILTRE ANTI-OVER-ANONYMISATION
-     filtered_entities = []
-    
-     for ent in medical_entities:
-        text = ent['text']
-        
-        # Ignorer si :
-        # 1. Trop court (<3 caractères)
-        if len(text) < 3:
-            continue
+    def _anonymize_medical(self, col_data: pd.Series, entities: List[Dict], medical_types: List[str],
+                           store: MappingStore) -> pd.Series:
+        """Remplace les termes médicaux détectés par des codes MED_ (une passe par cellule)"""
+        medical_entities = [e for e in entities if e['type'] in medical_types]
+        filtered_entities = self._filter_entities(medical_entities)
         
-        # 2. Mot générique anglais
-        generic_words = {'the', 'and', 'for', 'with', 'from', 'this', 'that', 'are', 'was', 'were'}
-        if text.lower() in generic_words:
-            continue
-        
-        # 3. Ponctuation seule
-        if not any(c.isalnum() for c in text):
-            continue
+        # Table original → code MED_ (cohérente via le store)
+        mapping = {}
         
-        # 4. Confiance trop faible (<40%)
-        if ent['confidence'] < 0.4:
-            continue
+        for ent in filtered_entities:
+            original = ent['text']
+            mapping[original] = self._pseudonym(
+                store, 'medical', original, self.keyed and self.keyed.medical,
+                lambda: f"MED_{abs(hash(original)) % 10000:04d}"
+            )
         
-        filtered_entities.append(ent)
-    
-     # Anonymisation uniquement sur entités filtrées
-     for ent in filtered_entities:
-        original = ent['text']
+        if not mapping:
+            return col_data
         
-        if original not in self.mapping_cache:
-            hashed = abs(hash(original)) % 10000
-            self.mapping_cache[original] = f"MED_{hashed:04d}"
+        # Toutes les entités en un seul parcours par valeur distincte
+        engine = ReplacementEngine(mapping)
         
-        fake_term = self.mapping_cache[original]
+        def replace_terms(str_val):
+            replaced = engine.replace(str_val)
+            return replaced if replaced != str_val else None
         
-        result = result.apply(
-            lambda x: str(x).replace(original, fake_term) if pd.notna(x) and original in str(x) else x
-        )
-    
\ No newline at end of file
+        return self._map_unique(col_data, replace_terms)
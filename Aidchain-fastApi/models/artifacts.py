@@ -0,0 +1,164 @@
+"""
+Artefacts anonymisés: stockage compressé et téléchargement
+
+- Les exports texte (CSV, JSON, TXT) peuvent être stockés compressés
+  (ARTIFACT_COMPRESSION): <fichier>.gz ou <fichier>.zst remplace le fichier;
+  le nom logique (download_url, cache de résultats) ne change pas
+- Au téléchargement, l'encodage est négocié (Accept-Encoding): fichier
+  stocké servi tel quel, sinon compression / décompression à la volée,
+  par blocs (jamais le fichier entier en mémoire)
+- Empreinte SHA-256 du fichier stocké (ETag), mémorisée par (chemin, mtime, taille)
+"""
+import hashlib
+import threading
+import zlib
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import ARTIFACT_COMPRESSION, COMPRESSION_LEVELS, DOWNLOAD_CHUNK_SIZE, DOWNLOAD_ENCODINGS
+
+# zstandard optionnel (pip install zstandard)
+ZSTD_AVAILABLE = find_spec('zstandard') is not None
+
+SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+COMPRESSIBLE_FORMATS = {'.csv', '.json', '.txt'}  # Parquet / Excel sont déjà compressés
+
+_digests: Dict[Tuple[str, int, int], str] = {}
+_digests_lock = threading.Lock()
+
+
+def supported(encoding: Optional[str]) -> bool:
+    return encoding == 'gzip' or (encoding == 'zstd' and ZSTD_AVAILABLE)
+
+
+def download_encodings() -> List[str]:
+    """Encodages proposés au téléchargement, par préférence"""
+    return [encoding for encoding in DOWNLOAD_ENCODINGS if supported(encoding)]
+
+
+def compressible(path: Path) -> bool:
+    return Path(path).suffix.lower() in COMPRESSIBLE_FORMATS
+
+
+def resolve(path: Path) -> Optional[Tuple[Path, Optional[str]]]:
+    """Fichier réellement stocké pour un nom logique: (chemin, encodage ou None)"""
+    path = Path(path)
+    if path.is_file():
+        return path, None
+    for encoding, suffix in SUFFIXES.items():
+        stored = path.with_name(path.name + suffix)
+        if stored.is_file():
+            return stored, encoding
+    return None
+
+
+def remove(path: Path):
+    """Supprime l'artefact, quel que soit son stockage"""
+    found = resolve(path)
+    if found is not None:
+        found[0].unlink(missing_ok=True)
+
+
+# ================== CODECS (par blocs) ==================
+
+
+def _compressor(encoding: str):
+    if encoding == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=COMPRESSION_LEVELS['zstd']).compressobj()
+    # wbits=31: en-tête gzip, mtime à 0 (sortie reproductible)
+    return zlib.compressobj(COMPRESSION_LEVELS['gzip'], zlib.DEFLATED, 31)
+
+
+def _decompressor(encoding: str):
+    if encoding == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(31)
+
+
+def read_chunks(path: Path, start: int = 0, end: Optional[int] = None,
+                chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+    """Octets [start, end] inclus du fichier, par blocs"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def decode(chunks: Iterator[bytes], encoding: str) -> Iterator[bytes]:
+    decompressor = _decompressor(encoding)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+
+
+def encode(chunks: Iterator[bytes], encoding: str) -> Iterator[bytes]:
+    compressor = _compressor(encoding)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# ================== STOCKAGE ==================
+
+
+def digest(path: Path) -> str:
+    """SHA-256 du fichier stocké (calculé une fois par version du fichier)"""
+    stat = Path(path).stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+
+    with _digests_lock:
+        if key in _digests:
+            return _digests[key]
+
+    sha = hashlib.sha256()
+    for chunk in read_chunks(path):
+        sha.update(chunk)
+
+    with _digests_lock:
+        _digests[key] = sha.hexdigest()
+    return _digests[key]
+
+
+def store(path: Path, encoding: Optional[str] = ARTIFACT_COMPRESSION) -> Path:
+    """
+    Compresse un export texte sur disque (fichier d'origine remplacé)
+
+    Returns:
+        chemin stocké (inchangé si pas de compression)
+    """
+    path = Path(path)
+    if not encoding or not compressible(path) or not path.is_file():
+        return path
+
+    if not supported(encoding):
+        print(f"⚠️ Compression {encoding} indisponible (pip install zstandard), export non compressé")
+        return path
+
+    target = path.with_name(path.name + SUFFIXES[encoding])
+    sha = hashlib.sha256()
+
+    with open(target, 'wb') as out:
+        for chunk in encode(read_chunks(path), encoding):
+            sha.update(chunk)
+            out.write(chunk)
+
+    path.unlink()
+
+    # Empreinte calculée au passage: pas de relecture au premier téléchargement
+    stat = target.stat()
+    with _digests_lock:
+        _digests[(str(target), stat.st_mtime_ns, stat.st_size)] = sha.hexdigest()
+
+    return target
@@ -0,0 +1,120 @@
+"""
+Formats colonnes Parquet / Arrow IPC (Feather)
+
+- Lecture avec projection de colonnes
+- Streaming par row group (Parquet) ou record batch (Arrow IPC)
+- Écriture compressée (COLUMNAR_COMPRESSION), types conservés
+"""
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from config import COLUMNAR_COMPRESSION
+
+COLUMNAR_FORMATS = {'.parquet', '.feather', '.arrow'}
+
+
+def read_columnar(source, ext: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Fichier complet (ou seulement `columns`) en DataFrame"""
+    if ext == '.parquet':
+        return pd.read_parquet(source, columns=columns)
+    return feather.read_table(source, columns=columns).to_pandas()
+
+
+def _open_ipc(path: str) -> pa.ipc.RecordBatchFileReader:
+    # Fichier mappé en mémoire: les batches sont lus sans copie
+    return pa.ipc.open_file(pa.memory_map(path, 'r'))
+
+
+def num_rows(path: str, ext: str) -> int:
+    if ext == '.parquet':
+        return pq.ParquetFile(path).metadata.num_rows
+    reader = _open_ipc(path)
+    return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+
+def iter_tables(path: str, ext: str, columns: Optional[List[str]] = None) -> Iterator[pa.Table]:
+    """Tables Arrow successives: un row group (Parquet) ou un record batch (IPC) à la fois"""
+    if ext == '.parquet':
+        parquet_file = pq.ParquetFile(path)
+        for i in range(parquet_file.num_row_groups):
+            yield parquet_file.read_row_group(i, columns=columns)
+        return
+
+    reader = _open_ipc(path)
+    for i in range(reader.num_record_batches):
+        table = pa.Table.from_batches([reader.get_batch(i)])
+        yield table.select(columns) if columns is not None else table
+
+
+def to_arrow(series: pd.Series) -> pa.Array:
+    """
+    Colonne anonymisée → Arrow
+
+    Les colonnes object (pseudonymes, valeurs mixtes) deviennent du texte:
+    un type stable d'un chunk à l'autre
+    """
+    if series.dtype == object:
+        values = series.where(series.isna(), series.astype(str))
+        return pa.array(values, type=pa.string(), from_pandas=True)
+    return pa.array(series, from_pandas=True)
+
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    return pa.Table.from_arrays([to_arrow(df[col]) for col in df.columns],
+                                names=[str(col) for col in df.columns])
+
+
+def write_columnar(df: pd.DataFrame, path: Path, ext: str):
+    """Export en un bloc"""
+    table = to_table(df)
+    if ext == '.parquet':
+        pq.write_table(table, path, compression=COLUMNAR_COMPRESSION)
+    else:
+        feather.write_feather(table, path, compression=COLUMNAR_COMPRESSION)
+
+
+class ColumnarWriter:
+    """Écriture incrémentale (un row group / record batch par chunk)"""
+
+    def __init__(self, path: Path, ext: str, schema: pa.Schema):
+        self.schema = schema
+        if ext == '.parquet':
+            self._writer = pq.ParquetWriter(path, schema, compression=COLUMNAR_COMPRESSION)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=COLUMNAR_COMPRESSION)
+            self._writer = pa.ipc.new_file(str(path), schema, options=options)
+
+    def write(self, table: pa.Table):
+        self._writer.write_table(table.cast(self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class DataFrameWriter:
+    """
+    Chunks pandas → Parquet / Arrow IPC (pipelines en streaming)
+
+    Colonnes écrites en texte: le schéma du premier chunk reste valable pour
+    les suivants (un CSV n'a pas de types stables d'un chunk à l'autre)
+    """
+
+    def __init__(self, path: Path, ext: str):
+        self.path = path
+        self.ext = ext
+        self._writer: Optional[ColumnarWriter] = None
+
+    def write(self, df: pd.DataFrame):
+        table = to_table(df.astype(object))
+        if self._writer is None:
+            self._writer = ColumnarWriter(self.path, self.ext, table.schema)
+        self._writer.write(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
@@ -0,0 +1,257 @@
+"""
+Détection du dialecte CSV (encodage, séparateur, guillemets, en-tête)
+
+Calculée une seule fois sur les premiers Ko du fichier, pour que le CSV soit
+ensuite parsé exactement une fois (moteur pyarrow si disponible). L'encodage
+est ensuite vérifié sur tout le fichier (décodage incrémental, sans parse):
+un accent cp1252 au-delà de l'échantillon ne doit pas casser la lecture.
+
+Le moteur pyarrow garde le schéma du moteur C: les colonnes qu'il typerait
+en dates/heures (inférence sur l'échantillon) restent du texte.
+"""
+import codecs
+import csv
+import io
+from typing import Dict, List
+
+import pandas as pd
+
+SNIFF_BYTES = 64 * 1024  # Octets lus pour la détection
+VALIDATE_BLOCK_BYTES = 4 * 1024 * 1024  # Blocs de la vérification d'encodage
+DELIMITERS = [',', ';', '\t', '|']
+ENCODINGS = ['utf-8', 'cp1252', 'latin1']  # latin1 décode tout: dernier recours
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+def read_sample(source, size: int = SNIFF_BYTES) -> bytes:
+    """Premiers octets d'un chemin ou d'un flux binaire (rembobiné ensuite)"""
+    if hasattr(source, 'read'):
+        sample = source.read(size)
+        source.seek(0)
+        return sample
+
+    with open(source, 'rb') as f:
+        return f.read(size)
+
+
+def _detect_encoding(sample: bytes) -> str:
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+
+    for encoding in ENCODINGS:
+        try:
+            sample.decode(encoding)
+            return encoding
+        except UnicodeDecodeError as e:
+            # Caractère multi-octets coupé par la fin de l'échantillon: accepté
+            if encoding == 'utf-8' and e.start >= len(sample) - 3 and e.reason == 'unexpected end of data':
+                return encoding
+            continue
+
+    return 'latin1'
+
+
+def validate_encoding(source, encoding: str) -> str:
+    """
+    Encodage valable sur tout le fichier: celui détecté, sinon le suivant de
+    ENCODINGS qui décode tout (latin1 en dernier recours)
+    """
+    base = 'utf-8' if encoding == 'utf-8-sig' else encoding
+    chain = [encoding] + ENCODINGS[ENCODINGS.index(base) + 1:] if base in ENCODINGS else [encoding]
+
+    for candidate in chain:
+        if candidate == 'latin1':
+            return candidate
+
+        decoder = codecs.getincrementaldecoder(candidate)()
+        stream = source if hasattr(source, 'read') else open(source, 'rb')
+
+        try:
+            while block := stream.read(VALIDATE_BLOCK_BYTES):
+                decoder.decode(block)
+            decoder.decode(b'', final=True)
+            return candidate
+        except UnicodeDecodeError:
+            continue
+        finally:
+            if stream is source:
+                source.seek(0)
+            else:
+                stream.close()
+
+    return 'latin1'
+
+
+def _detect_delimiter(lines) -> str:
+    """csv.Sniffer, puis à défaut le séparateur au compte le plus régulier par ligne"""
+    text = '\n'.join(lines)
+
+    try:
+        return csv.Sniffer().sniff(text, delimiters=''.join(DELIMITERS)).delimiter
+    except csv.Error:
+        pass
+
+    best, best_score = ',', (0, 0)
+    for delimiter in DELIMITERS:
+        counts = [line.count(delimiter) for line in lines]
+        if not counts or counts[0] == 0:
+            continue
+        # Priorité aux lignes ayant le même nombre de séparateurs que l'en-tête
+        score = (sum(c == counts[0] for c in counts), counts[0])
+        if score > best_score:
+            best, best_score = delimiter, score
+
+    return best
+
+
+def _detect_header(text: str, delimiter: str) -> bool:
+    """
+    En-tête présent sauf si csv.Sniffer le conteste ET que la première ligne
+    contient une valeur numérique (un nom de colonne l'est rarement)
+    """
+    try:
+        if csv.Sniffer().has_header(text):
+            return True
+    except csv.Error:
+        return True
+
+    first = next(csv.reader(io.StringIO(text), delimiter=delimiter), [])
+    numeric = pd.to_numeric(pd.Series(first, dtype=object).str.strip(), errors='coerce')
+    return not numeric.notna().any()
+
+
+def sniff_csv(sample: bytes) -> Dict:
+    """
+    Dialecte du CSV à partir d'un échantillon d'octets
+
+    Returns:
+        {'encoding', 'delimiter', 'quotechar', 'has_header'}
+    """
+    encoding = _detect_encoding(sample)
+    text = sample.decode(encoding, errors='ignore')
+
+    # Dernière ligne probablement tronquée
+    lines = text.splitlines()
+    if len(lines) > 1 and len(sample) >= SNIFF_BYTES:
+        lines = lines[:-1]
+    lines = [line for line in lines if line.strip()][:200]
+    text = '\n'.join(lines)
+
+    if not lines:
+        return {'encoding': encoding, 'delimiter': ',', 'quotechar': '"', 'has_header': True}
+
+    delimiter = _detect_delimiter(lines)
+
+    try:
+        quotechar = csv.Sniffer().sniff(text, delimiters=delimiter).quotechar or '"'
+    except csv.Error:
+        quotechar = '"'
+
+    return {
+        'encoding': encoding,
+        'delimiter': delimiter,
+        'quotechar': quotechar,
+        'has_header': _detect_header(text, delimiter)
+    }
+
+
+def read_options(dialect: Dict) -> Dict:
+    """Arguments pd.read_csv correspondant au dialecte"""
+    return {
+        'sep': dialect['delimiter'],
+        'encoding': dialect['encoding'],
+        'quotechar': dialect['quotechar'],
+        'header': 0 if dialect['has_header'] else None
+    }
+
+
+def _temporal_columns(sample: bytes, read_opts, parse_opts) -> List[str]:
+    """Colonnes que pyarrow typerait en dates/heures, inférées sur l'échantillon"""
+    if len(sample) >= SNIFF_BYTES:
+        sample = sample[:sample.rfind(b'\n') + 1]  # Dernière ligne tronquée
+    table = pa_csv.read_csv(io.BytesIO(sample), read_options=read_opts, parse_options=parse_opts,
+                            convert_options=pa_csv.ConvertOptions(strings_can_be_null=True))
+    return [field.name for field in table.schema if pa.types.is_temporal(field.type)]
+
+
+def _read_pyarrow(source, dialect: Dict) -> pd.DataFrame:
+    """
+    Parse pyarrow au schéma du moteur C: nombres et booléens typés, dates et
+    heures gardées telles qu'écrites (pas de réécriture ISO à l'export)
+    """
+    read_opts = pa_csv.ReadOptions(encoding=dialect['encoding'],
+                                   autogenerate_column_names=not dialect['has_header'])
+    parse_opts = pa_csv.ParseOptions(delimiter=dialect['delimiter'], quote_char=dialect['quotechar'])
+
+    text_columns = _temporal_columns(read_sample(source), read_opts, parse_opts)
+    convert_opts = pa_csv.ConvertOptions(column_types={name: pa.string() for name in text_columns},
+                                         strings_can_be_null=True)
+    table = pa_csv.read_csv(source, read_options=read_opts, parse_options=parse_opts, convert_options=convert_opts)
+
+    if len(set(table.column_names)) != table.num_columns:
+        raise ValueError("noms de colonnes en double")
+    if any(pa.types.is_temporal(t) for t in table.schema.types):
+        raise ValueError("dates absentes de l'échantillon")
+
+    # Colonnes vides: float64 (NaN) comme le moteur C
+    schema = pa.schema([field.with_type(pa.float64()) if pa.types.is_null(field.type) else field
+                        for field in table.schema])
+    return table.cast(schema).to_pandas()
+
+
+def read_csv(source, dialect: Dict) -> pd.DataFrame:
+    """
+    Parse unique: moteur pyarrow si disponible, moteur C sinon (ou s'il échoue)
+
+    Args:
+        source: chemin (fichier mappé en mémoire par le moteur C) ou flux binaire
+        dialect: dialect['encoding_validated'] si l'encodage a déjà été vérifié
+            sur tout le fichier (pas de seconde passe de décodage)
+    """
+    options = read_options(dialect)
+
+    df = None
+
+    if PYARROW_AVAILABLE:
+        try:
+            df = _read_pyarrow(source, dialect)
+            # Octets non décodables: pyarrow rend des colonnes bytes au lieu d'échouer
+            for col in df.select_dtypes(include='object').columns:
+                first = df[col].dropna().head(1)
+                if len(first) and isinstance(first.iloc[0], bytes):
+                    raise UnicodeDecodeError(options['encoding'], b'', 0, 1, f"colonne {col!r} non décodée")
+            dialect['engine'] = 'pyarrow'
+        except Exception as e:
+            df = None
+            print(f"⚠️ Moteur pyarrow indisponible pour ce fichier ({e}), moteur C")
+            if hasattr(source, 'seek'):
+                source.seek(0)
+
+    if df is None:
+        try:
+            df = pd.read_csv(source, memory_map=isinstance(source, str), **options)
+        except UnicodeDecodeError:
+            # Encodage déjà vérifié sur tout le fichier: l'erreur n'est pas due à l'échantillon
+            if dialect.get('encoding_validated'):
+                raise
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            dialect['encoding'] = options['encoding'] = validate_encoding(source, options['encoding'])
+            dialect['encoding_validated'] = True
+            df = pd.read_csv(source, memory_map=isinstance(source, str), **options)
+        dialect['engine'] = 'c'
+
+    return name_columns(df, dialect)
+
+
+def name_columns(df: pd.DataFrame, dialect: Dict) -> pd.DataFrame:
+    """Sans en-tête: colonnes nommées column_1, column_2..."""
+    if not dialect['has_header']:
+        df.columns = [f"column_{i + 1}" for i in range(df.shape[1])]
+    return df
@@ -0,0 +1,170 @@
+"""
+Datasets incrémentaux: état gardé entre deux versions d'un fichier
+
+Un traitement lancé avec incremental=True enregistre un dataset: portée des
+pseudonymes (persistante), classification des colonnes et nombre de lignes
+déjà traitées. Les mises à jour suivantes n'anonymisent que les lignes
+ajoutées avec cette classification et ces correspondances, sans nouvelle
+détection.
+
+Ni échantillons ni lignes ne sont conservés: seules les entités utiles à
+l'anonymisation (texte, type) restent dans la classification.
+
+Les pseudonymes doivent survivre au process: mode "keyed" (HMAC, sans état)
+ou store de correspondances SQLite; sinon le mode incrémental est refusé.
+Ajouts concurrents: le compteur de lignes est mis à jour par
+compare-and-swap, le second ajout échoue (DatasetConflictError) au lieu de
+retraiter les mêmes lignes.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from config import DATASET_STORE_PATH, MAPPING_STORE_BACKEND, PSEUDONYM_MODE
+
+# Formats tabulaires auxquels on peut ajouter des lignes
+APPENDABLE_FORMATS = {'.csv', '.xlsx', '.xls', '.json', '.parquet', '.feather', '.arrow'}
+
+ENTITY_FIELDS = ('text', 'type', 'confidence', 'source')
+
+
+class DatasetConflictError(Exception):
+    """Levée quand un autre ajout a modifié le dataset pendant le traitement"""
+
+
+def durable_mappings() -> bool:
+    """Pseudonymes d'une portée retrouvés après redémarrage (HMAC ou store SQLite)"""
+    return PSEUDONYM_MODE == 'keyed' or MAPPING_STORE_BACKEND == 'sqlite'
+
+
+DURABLE_MAPPINGS_REQUIRED = (
+    "Mode incrémental indisponible: pseudonymes non persistants "
+    "(PSEUDONYM_MODE='keyed' ou MAPPING_STORE_BACKEND='sqlite' requis)"
+)
+
+
+@dataclass
+class DatasetRecord:
+    dataset_id: str
+    scope: str  # Portée du store de correspondances
+    original_filename: str
+    source_format: str
+    columns: List[str]
+    detection: Dict  # Classification par colonne (sans échantillons)
+    rows: int = 0  # Lignes déjà anonymisées
+    version: int = 1  # Incrémentée à chaque ajout
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def sensitive_columns(self) -> List[str]:
+        return [col for col, info in self.detection.items() if info['is_sensitive']]
+
+
+def classification(detection_results: Dict) -> Dict:
+    """Classification réutilisable d'un résultat de détection (échantillons retirés)"""
+    return {
+        col: {
+            'is_sensitive': info['is_sensitive'],
+            'confidence': info['confidence'],
+            'entity_types': info['entity_types'],
+            'reasoning': info['reasoning'],
+            'detected_entities': [
+                {name: ent[name] for name in ENTITY_FIELDS if name in ent}
+                for ent in info['detected_entities']
+            ],
+            'fast_path': info.get('fast_path', False),
+            'free_text': info.get('free_text', False),
+        }
+        for col, info in detection_results['columns'].items()
+    }
+
+
+class DatasetStore:
+    """Store SQLite des datasets (partagé entre workers et process du pool)"""
+
+    def __init__(self, path: str = DATASET_STORE_PATH):
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS datasets (
+                dataset_id TEXT PRIMARY KEY,
+                scope TEXT,
+                original_filename TEXT,
+                source_format TEXT,
+                columns TEXT,
+                detection TEXT,
+                rows INTEGER,
+                version INTEGER,
+                created_at REAL,
+                updated_at REAL
+            )
+            """
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def create(self, dataset_id: str, scope: str, original_filename: str, source_format: str,
+               columns: List[str], detection: Dict, rows: int) -> DatasetRecord:
+        record = DatasetRecord(dataset_id, scope, original_filename, source_format,
+                               [str(col) for col in columns], detection, rows)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO datasets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (record.dataset_id, record.scope, record.original_filename, record.source_format,
+                 json.dumps(record.columns), json.dumps(record.detection), record.rows,
+                 record.version, record.created_at, record.updated_at)
+            )
+        return record
+
+    def get(self, dataset_id: str) -> Optional[DatasetRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM datasets WHERE dataset_id = ?", (dataset_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        dataset_id, scope, filename, source_format, columns, detection, rows, version, created, updated = row
+        return DatasetRecord(dataset_id, scope, filename, source_format, json.loads(columns),
+                             json.loads(detection), rows, version, created, updated)
+
+    def add_rows(self, dataset_id: str, rows: int, expected_rows: int) -> DatasetRecord:
+        """
+        Compteur incrémenté par compare-and-swap (ajouts concurrents, tous process)
+
+        Raises:
+            DatasetConflictError: le compteur n'est plus expected_rows
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE datasets SET rows = rows + ?, version = version + 1, updated_at = ? "
+                "WHERE dataset_id = ? AND rows = ?",
+                (rows, time.time(), dataset_id, expected_rows)
+            )
+        if cursor.rowcount != 1:
+            raise DatasetConflictError(
+                f"Dataset '{dataset_id}' modifié par un autre ajout pendant le traitement, réessayez"
+            )
+        return self.get(dataset_id)
+
+
+_store: Optional[DatasetStore] = None
+_store_lock = threading.Lock()
+
+
+def get_dataset_store() -> DatasetStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DatasetStore(DATASET_STORE_PATH)
+        return _store
@@ -0,0 +1,192 @@
+"""
+Décalage de dates vectorisé
+
+- Format de la colonne inféré une fois sur un échantillon
+- Valeurs distinctes parsées en un seul appel pd.to_datetime(format=...)
+- Décalage ajouté comme tableau de timedelta (un par ligne: décalage commun
+  ou propre à chaque patient / entité)
+- Ré-écriture dans le format d'origine: une colonne texte reste du texte
+  (mois en toutes lettres français compris: '3 mars 1985' → '12 février 1985')
+- Valeur illisible dans une colonne de dates: None (jamais recopiée en clair)
+"""
+import re
+import warnings
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from config import DATE_FORMAT_MIN_RATIO, DATE_FORMAT_SAMPLE
+
+# Formats essayés dans l'ordre (jour avant mois: données françaises)
+DATE_FORMATS = [
+    '%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%Y/%m/%d', '%d.%m.%Y', '%Y%m%d',
+    '%d/%m/%y', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M',
+    '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%m/%d/%Y %H:%M:%S', '%m/%d/%Y %H:%M',
+    '%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%d %H:%M:%S.%f',
+    '%d %B %Y', '%d %b %Y', '%B %Y', '%m/%Y', '%m-%Y', '%Y-%m', '%Y',
+]
+
+# Mois français (et abréviations usuelles) → noms anglais compris par strptime
+FRENCH_MONTHS = {
+    'janvier': 'January', 'janv': 'January', 'février': 'February', 'fevrier': 'February',
+    'févr': 'February', 'fevr': 'February', 'fév': 'February', 'fev': 'February', 'mars': 'March',
+    'avril': 'April', 'avr': 'April', 'mai': 'May', 'juin': 'June', 'juillet': 'July', 'juil': 'July',
+    'août': 'August', 'aout': 'August', 'septembre': 'September', 'sept': 'September',
+    'octobre': 'October', 'oct': 'October', 'novembre': 'November', 'nov': 'November',
+    'décembre': 'December', 'decembre': 'December', 'déc': 'December',
+}
+ENGLISH_MONTHS = {
+    'January': 'janvier', 'February': 'février', 'March': 'mars', 'April': 'avril', 'May': 'mai',
+    'June': 'juin', 'July': 'juillet', 'August': 'août', 'September': 'septembre',
+    'October': 'octobre', 'November': 'novembre', 'December': 'décembre',
+}
+_FRENCH_PATTERN = re.compile(
+    r"\b(" + '|'.join(sorted(FRENCH_MONTHS, key=len, reverse=True)) + r")\b\.?", re.IGNORECASE
+)
+_ENGLISH_PATTERN = re.compile(r"\b(" + '|'.join(ENGLISH_MONTHS) + r")\b")
+
+
+def _from_french(values: pd.Series) -> Tuple[pd.Series, bool]:
+    """Mois français traduits ('1er' → '1'); indique si la colonne en contenait"""
+    translated = values.str.replace(_FRENCH_PATTERN, lambda m: FRENCH_MONTHS[m.group(1).lower()], regex=True)
+    translated = translated.str.replace(r"\b1er\b", "1", regex=True)
+    return translated, bool((translated != values).any())
+
+
+def _to_french(formatted: np.ndarray) -> np.ndarray:
+    return np.array([_ENGLISH_PATTERN.sub(lambda m: ENGLISH_MONTHS[m.group(1)], v) for v in formatted], dtype=object)
+
+
+def _guess(value: str) -> Optional[str]:
+    """Format d'une valeur isolée (jour avant mois, sauf année en tête)"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return guess_datetime_format(value, dayfirst=not re.match(r"\d{4}", value))
+
+
+def _parse(values: pd.Series, fmt: str) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(pd.to_datetime(values, format=fmt, errors='coerce'))
+
+
+def infer_date_format(values: pd.Series, sample_size: int = DATE_FORMAT_SAMPLE) -> Optional[str]:
+    """
+    Format strftime qui parse le mieux l'échantillon (None si aucun ne
+    dépasse DATE_FORMAT_MIN_RATIO)
+    """
+    sample = pd.Series(values).dropna().astype(str).str.strip()
+    sample = sample[sample != ''].drop_duplicates().head(sample_size)
+
+    if sample.empty:
+        return None
+
+    # Formats connus d'abord (ordre = préférence), puis celui deviné sur la première valeur
+    candidates = list(DATE_FORMATS)
+    guessed = _guess(sample.iloc[0])
+    if guessed and guessed not in candidates:
+        candidates.append(guessed)
+
+    best, best_ratio = None, 0.0
+    for fmt in candidates:
+        ratio = _parse(sample, fmt).notna().mean()
+        if ratio > best_ratio:
+            best, best_ratio = fmt, ratio
+        if ratio == 1.0:
+            break
+
+    return best if best_ratio >= DATE_FORMAT_MIN_RATIO else None
+
+
+def _fallback(value: str, offset_days: int, french: bool = False) -> Optional[str]:
+    """Valeur hors format dominant: format propre à la valeur, sinon None"""
+    fmt = _guess(value) or next(
+        (f for f in DATE_FORMATS if pd.notna(pd.to_datetime(value, format=f, errors='coerce'))), None
+    )
+    if fmt is None:
+        return None
+    parsed = pd.to_datetime(value, format=fmt, errors='coerce')
+    if pd.isna(parsed):
+        return None
+    shifted = (parsed + pd.Timedelta(days=offset_days)).strftime(fmt)
+    return _to_french(np.array([shifted]))[0] if french else shifted
+
+
+def shift_dates(col_data: pd.Series, offsets: Union[int, np.ndarray],
+                fmt: Optional[str] = None) -> pd.Series:
+    """
+    Décale une colonne de dates
+
+    Args:
+        offsets: décalage en jours, commun (int) ou par ligne (tableau aligné)
+        fmt: format de la colonne (inféré si absent)
+
+    Colonne datetime: reste datetime. Colonne texte: chaque date est ré-écrite
+    dans son format; les valeurs illisibles deviennent None (la colonne est
+    classée DATE: les recopier laisserait passer des dates en clair).
+    """
+    per_row = np.ndim(offsets) > 0
+
+    if pd.api.types.is_datetime64_any_dtype(col_data):
+        delta = pd.to_timedelta(offsets, unit='D')
+        return col_data + (pd.Series(delta, index=col_data.index) if per_row else delta)
+
+    mask = col_data.notna().to_numpy()
+    if not mask.any():
+        return col_data
+
+    present, french = _from_french(col_data[mask].astype(str).str.strip())
+    row_offsets = np.asarray(offsets)[mask] if per_row else None
+    fmt = fmt or infer_date_format(present)
+
+    # Parse des valeurs distinctes seulement, redistribué par take
+    codes, uniques = pd.factorize(present)
+    parsed = _parse(pd.Series(uniques), fmt) if fmt else pd.DatetimeIndex([pd.NaT] * len(uniques))
+    rows = parsed.take(codes)
+
+    delta = pd.to_timedelta(row_offsets if per_row else np.full(len(rows), offsets), unit='D')
+    shifted = rows + delta
+
+    # Formatage des dates décalées distinctes (souvent bien moins que de lignes)
+    shift_codes, shift_uniques = pd.factorize(shifted)
+    result = np.full(len(present), None, dtype=object)
+    valid = shift_codes >= 0
+    if valid.any():
+        formatted = np.asarray(pd.DatetimeIndex(shift_uniques).strftime(fmt), dtype=object)
+        if french:
+            formatted = _to_french(formatted)
+        result[valid] = formatted[shift_codes[valid]]
+
+    # Valeurs hors format dominant: format propre, valeur par valeur
+    missing = np.flatnonzero(~valid)
+    if len(missing):
+        values = present.to_numpy()
+        days = row_offsets if per_row else np.full(len(present), offsets)
+        cache = {}
+        for i in missing:
+            key = (values[i], int(days[i]))
+            if key not in cache:
+                cache[key] = _fallback(values[i], int(days[i]), french)
+            result[i] = cache[key]
+
+    out = col_data.astype(object)
+    out[mask] = result
+    return out
+
+
+def subject_offsets(keys: pd.Series, offset_for: Callable[[str], int]) -> np.ndarray:
+    """Décalage par ligne à partir d'une colonne patient / entité (calculé par valeur distincte)"""
+    codes, uniques = pd.factorize(keys)
+    per_key = np.array([offset_for(str(key)) for key in uniques] + [offset_for('')], dtype=np.int64)
+    # Clé manquante (code -1) → décalage commun (clé vide)
+    return per_key[codes]
+
+
+def find_subject_column(detection_columns: Dict[str, Dict]) -> Optional[str]:
+    """Colonne patient / entité pour DATE_SHIFT_KEY='auto': premier identifiant, sinon première personne"""
+    for entity_type in ('IDENTIFIER', 'PERSON'):
+        for col, info in detection_columns.items():
+            types = info.get('entity_types', [])
+            if info.get('is_sensitive') and entity_type in types and 'DATE' not in types:
+                return col
+    return None
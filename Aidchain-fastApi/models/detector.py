@@ -2,21 +2,42 @@ import warnings
 warnings.filterwarnings('ignore')
 
 import re
-from typing import Dict, List, Tuple
+from importlib.util import find_spec
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
-import pandas as pd
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
 import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
+import pandas as pd
+
+from config import (
+    NER_BATCH_SIZE, NER_CROSS_COLUMN_BATCH, DETECTION_MODE, DETECTION_WORKERS, FAST_PATH_ENABLED,
+    FEATURES_FULL_COLUMN_MAX_ROWS, NER_LONG_TEXT, NER_WINDOW_TOKENS, NER_WINDOW_STRIDE, NER_WINDOW_CHARS,
+    NER_PRESCAN, NER_BACKEND, NER_MEDICAL_MODELS, NER_GENERAL_MODELS, ID_SCORE_THRESHOLD
+)
+
+from .executor import in_worker_process
+from .features import contact_features
+from .identifier_model import IdentifierScorer, heuristic_scores
+from .model_registry import Loaded, ModelRegistry
+from .ner_cache import get_ner_cache, normalize as normalize_text, shift as shift_entities
+from .ner_queue import NERBatchQueue
+from .ner_windows import SPECIAL_TOKENS, merge_entities, split_windows, worth_scanning
+from .onnx_ner import ONNX_AVAILABLE, load_onnx_ner
+from .preclassifier import PreClassification, preclassify
 
-try:
-    import torch
-    from transformers import pipeline as hf_pipeline
-    USE_TRANSFORMERS = True
-except:
-    import spacy
-    USE_TRANSFORMERS = False
+# torch / transformers / spaCy importés au premier chargement de modèle (registre)
+TORCH_AVAILABLE = find_spec('torch') is not None and find_spec('transformers') is not None
+USE_TRANSFORMERS = TORCH_AVAILABLE or (NER_BACKEND == 'onnx' and ONNX_AVAILABLE)
+
+NER_SAMPLE_SIZE = 30  # Cellules envoyées au NER par colonne
+NER_MAX_CHARS = 500  # Troncature si NER_LONG_TEXT est désactivé
+
+# Texte libre: emails repérés dans le texte (pas de NER pour ce type)
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
 
 
 @dataclass
@@ -27,12 +48,13 @@ class DetectionResult:
     reasoning: str
     sample_values: List[str]
     detected_entities: List[Dict]
+    fast_path: bool = False  # Décidée sans NER (pré-classification)
 
 
 class UltraProDetector:
     
     _instance = None
-    _models_loaded = False
+    _initialized = False
     
     def __new__(cls):
         if cls._instance is None:
@@ -40,189 +62,628 @@ class UltraProDetector:
         return cls._instance
     
     def __init__(self):
-        if self._models_loaded:
+        if self._initialized:
             return
         
         print("\n" + "="*70)
         print("🚀 ULTRA-PRO DETECTOR")
         print("="*70 + "\n")
         
+        # Modèles enregistrés, chargés au premier usage (ou au préchauffage)
+        self.models = ModelRegistry()
+        
         if USE_TRANSFORMERS:
             self._init_transformers()
         else:
             self._init_spacy()
         
-        self.anomaly_detector = IsolationForest(
-            contamination=0.1,
-            random_state=42,
-            n_estimators=100
-        )
-        self.scaler = StandardScaler()
+        # Score identifiants pré-entraîné (chargé une fois)
+        self.models.register('identifier', ['identifier_model'], lambda _: IdentifierScorer(), backend='sklearn')
+        self._id_fallback_logged = False
         
-        print("✅ Système 100% IA prêt!\n" + "="*70 + "\n")
-        self._models_loaded = True
+        # Mode parallèle (créés à la demande, arrêtés par shutdown())
+        self._feature_pool = None
+        self._ner_queue = None
+        self._parallel_lock = threading.Lock()
+        
+        print("✅ Détecteur prêt (modèles chargés à la demande)\n" + "="*70 + "\n")
+        self._initialized = True
     
     def _init_transformers(self):
-        """Init avec transformers"""
-        print("🔥 Mode: Transformers (ClinicalBERT + XLM-RoBERTa)")
-        
-        device = 0 if torch.cuda.is_available() else -1
-        print(f"🖥️ Device: {'GPU' if device >= 0 else 'CPU'}\n")
-        
-        # NER médical
-        medical_models = [
-            "dmis-lab/biobert-base-cased-v1.2",
-            "emilyalsentzer/Bio_ClinicalBERT"
-        ]
+        """Init avec transformers (pipelines PyTorch ou runners ONNX int8)"""
+        backend = 'onnx' if NER_BACKEND == 'onnx' else 'torch'
+        print(f"🔥 Mode: Transformers (ClinicalBERT + XLM-RoBERTa, {backend})")
         
-        for model in medical_models:
-            try:
-                self.ner_medical = hf_pipeline(
-                    "ner",
-                    model=model,
-                    aggregation_strategy="simple",
-                    device=device
-                )
-                print(f"✅ {model}")
-                break
-            except:
-                continue
+        self.models.register('ner_medical', NER_MEDICAL_MODELS, self._load_ner, backend=backend)
+        self.models.register('ner_general', NER_GENERAL_MODELS, self._load_ner, backend=backend)
+    
+    def _load_ner(self, model: str):
+        """
+        Runner ONNX si demandé et exporté, sinon pipeline HF (artefacts du cache local)
+
+        Le backend réellement chargé est renvoyé au registre: il entre dans
+        model_id (clés du cache NER et empreinte du cache de résultats)
+        """
+        fallback = None
+        if NER_BACKEND == 'onnx':
+            runner = load_onnx_ner(model)
+            if runner is not None:
+                return Loaded(runner, 'onnx')
+            if not TORCH_AVAILABLE:
+                raise RuntimeError("ni export ONNX ni torch")
+            reason = "onnxruntime indisponible" if not ONNX_AVAILABLE else "pas d'export ONNX"
+            fallback = f"onnx → torch ({reason})"
+            print(f"⚠️ {model}: repli {fallback}")
+        
+        import torch
+        from transformers import pipeline as hf_pipeline
         
-        # NER multilingue
-        multilingual_models = [
-            "Davlan/xlm-roberta-base-finetuned-conll03-multilingual",
-            "xlm-roberta-large-finetuned-conll03-english"
-        ]
+        device = 0 if torch.cuda.is_available() else -1
         
-        for model in multilingual_models:
-            try:
-                self.ner_general = hf_pipeline(
-                    "ner",
-                    model=model,
-                    aggregation_strategy="simple",
-                    device=device
-                )
-                print(f"✅ {model}\n")
-                break
-            except:
-                continue
+        return Loaded(hf_pipeline(
+            "ner",
+            model=self.models.resolve(model),
+            aggregation_strategy="simple",
+            device=device
+        ), 'torch', fallback)
     
     def _init_spacy(self):
         """Init avec spaCy (fallback)"""
         print("🔥 Mode: spaCy (fallback)\n")
         
-        for model in ["en_core_web_sm", "en_core_web_md"]:
-            try:
-                self.nlp_en = spacy.load(model)
-                print(f"✅ {model} (EN)")
-                break
-            except:
-                continue
+        def load(model: str):
+            import spacy
+            return spacy.load(model)
         
-        for model in ["fr_core_news_sm", "fr_core_news_md"]:
-            try:
-                self.nlp_fr = spacy.load(model)
-                print(f"✅ {model} (FR)\n")
-                break
-            except:
-                self.nlp_fr = None
+        self.models.register('spacy_en', ["en_core_web_sm", "en_core_web_md"], load, backend='spacy')
+        self.models.register('spacy_fr', ["fr_core_news_sm", "fr_core_news_md"], load, backend='spacy',
+                             required=False)
+    
+    @property
+    def ner_medical(self):
+        return self.models.get('ner_medical')
+    
+    @property
+    def ner_general(self):
+        return self.models.get('ner_general')
+    
+    @property
+    def nlp_en(self):
+        return self.models.get('spacy_en')
+    
+    @property
+    def nlp_fr(self):
+        return self.models.get('spacy_fr')
+    
+    @property
+    def identifier_scorer(self) -> Optional[IdentifierScorer]:
+        return self.models.get('identifier')
+    
+    def analyze_columns(self, df: pd.DataFrame, columns: Optional[List[str]] = None,
+                        progress: Optional[Callable[[int, int], None]] = None,
+                        full_coverage: Optional[List[str]] = None) -> Dict[str, DetectionResult]:
+        """
+        Analyse de plusieurs colonnes (NER regroupé en un batch si activé)
+        
+        Args:
+            full_coverage: colonnes dont toutes les cellules passent au NER
+                (documents découpés en paragraphes), au lieu d'un échantillon
+        """
+        columns = list(df.columns) if columns is None else list(columns)
+        full_coverage = set(full_coverage or [])
+        
+        pre = self._preclassify_columns(df, columns)
+        
+        if DETECTION_MODE == 'parallel':
+            return self._analyze_columns_parallel(df, columns, pre, progress, full_coverage)
+        
+        # Features contact/ID puis un seul predict pour toutes les colonnes
+        samples = {}
+        contact_infos = {}
+        
+        for col in columns:
+            col_data = df[col].dropna()
+            if len(col_data) == 0 or (pre.get(col) and pre[col].route == 'decided'):
                 continue
+            
+            samples[col] = self._sample(col_data, full=col in full_coverage)
+            contact_infos[col] = contact_features(samples[col], self._full_column(col_data))
+        
+        self._score_identifiers(list(contact_infos.values()))
+        
+        # NER regroupé (toujours pour les colonnes à couverture complète)
+        ner_results = self._extract_entities_batch({
+            col: sample for col, sample in samples.items()
+            if self._needs_ner(pre.get(col)) and (NER_CROSS_COLUMN_BATCH or col in full_coverage)
+        }, full_coverage)
+        
+        results = {}
+        
+        for col in columns:
+            results[col] = self.analyze_column(
+                df, col, ner_result=ner_results.get(col),
+                contact_info=contact_infos.get(col), pre=pre.get(col),
+                free_text=col in full_coverage
+            )
+            
+            if progress:
+                progress(len(results), len(columns))
+        
+        return results
+    
+    def _preclassify_columns(self, df: pd.DataFrame, columns: List[str]) -> Dict[str, PreClassification]:
+        """Pré-classification vectorisée de chaque colonne (si activée)"""
+        if not FAST_PATH_ENABLED:
+            return {}
+        return {col: preclassify(df[col]) for col in columns}
+    
+    @staticmethod
+    def _needs_ner(pre: Optional[PreClassification]) -> bool:
+        return pre is None or pre.route == 'text'
     
-    def analyze_column(self, df: pd.DataFrame, col_name: str) -> DetectionResult:
-        """Analyse d'une colonne"""
-        print(f"🔍 {col_name:<30}", end=" ")
+    def _analyze_columns_parallel(self, df: pd.DataFrame, columns: List[str],
+                                  pre: Dict[str, PreClassification],
+                                  progress: Optional[Callable[[int, int], None]] = None,
+                                  full_coverage: Optional[set] = None) -> Dict[str, DetectionResult]:
+        """
+        Détection parallèle:
+        - features regex/statistiques dans un pool de process
+        - NER via une file unique batchée (modèle partagé, jamais dupliqué)
+        - résultats assemblés dans l'ordre des colonnes (déterministe)
+        """
+        feature_pool = self._get_feature_pool()
+        ner_queue = self._get_ner_queue()
+        
+        pending = {}
+        
+        for col in columns:
+            col_data = df[col].dropna()
+            if len(col_data) == 0 or (pre.get(col) and pre[col].route == 'decided'):
+                continue
+            
+            full = col in (full_coverage or ())
+            sample_str = self._sample(col_data, full=full)
+            indexed_texts = self._ner_texts(sample_str, full=full) if self._needs_ner(pre.get(col)) else []
+            
+            pending[col] = (
+                indexed_texts,
+                ner_queue.submit([text for _, text in indexed_texts]),
+                feature_pool.submit(contact_features, sample_str.tolist(), self._full_column(col_data))
+            )
+        
+        # Score identifiants: un seul predict pour toutes les colonnes
+        contact_infos = {col: feature_future.result() for col, (_, _, feature_future) in pending.items()}
+        self._score_identifiers(list(contact_infos.values()))
+        
+        def analyze(col: str) -> DetectionResult:
+            free_text = col in (full_coverage or ())
+            
+            if col not in pending:
+                return self.analyze_column(df, col, pre=pre.get(col), free_text=free_text)
+            
+            indexed_texts, ner_future, _ = pending[col]
+            ner_result = self._collect_entities(indexed_texts, ner_future.result())
+            
+            return self.analyze_column(
+                df, col, ner_result=ner_result, contact_info=contact_infos[col],
+                pre=pre.get(col), free_text=free_text
+            )
+        
+        results = {}
+        
+        with ThreadPoolExecutor(max_workers=DETECTION_WORKERS) as threads:
+            for col, det in zip(columns, threads.map(analyze, columns)):
+                results[col] = det
+                
+                if progress:
+                    progress(len(results), len(columns))
         
+        return results
+    
+    def _get_feature_pool(self) -> Executor:
+        """Pool de process dans le parent; threads dans un worker (pas de pool spawn imbriqué)"""
+        with self._parallel_lock:
+            if self._feature_pool is None:
+                if in_worker_process():
+                    self._feature_pool = ThreadPoolExecutor(
+                        max_workers=DETECTION_WORKERS, thread_name_prefix='aidchain-features'
+                    )
+                else:
+                    self._feature_pool = ProcessPoolExecutor(
+                        max_workers=DETECTION_WORKERS,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+            return self._feature_pool
+    
+    def _get_ner_queue(self) -> NERBatchQueue:
+        with self._parallel_lock:
+            if self._ner_queue is None:
+                self._ner_queue = NERBatchQueue(self._run_ner_windows, max_batch=NER_BATCH_SIZE * 4)
+            return self._ner_queue
+    
+    def shutdown(self, wait: bool = True):
+        """Arrêt du pool de features et de la file NER (recréés au prochain usage)"""
+        with self._parallel_lock:
+            feature_pool, self._feature_pool = self._feature_pool, None
+            ner_queue, self._ner_queue = self._ner_queue, None
+        
+        if feature_pool is not None:
+            feature_pool.shutdown(wait=wait, cancel_futures=True)
+        if ner_queue is not None:
+            ner_queue.close(timeout=None if wait else 0)
+    
+    def analyze_column(self, df: pd.DataFrame, col_name: str,
+                       ner_result: Optional[Tuple[Dict[str, int], List[Dict]]] = None,
+                       contact_info: Optional[Dict] = None,
+                       pre: Optional[PreClassification] = None,
+                       free_text: bool = False) -> DetectionResult:
+        """
+        Analyse d'une colonne
+        
+        Args:
+            free_text: texte libre entièrement scanné (paragraphes PDF): la
+                moindre entité suffit à rendre la colonne sensible
+        """
         col_data = df[col_name].dropna()
         if len(col_data) == 0:
-            print("⚠️ Vide")
+            print(f"🔍 {col_name:<30} ⚠️ Vide")
             return DetectionResult(False, 0.0, [], "Vide", [], [])
         
-        sample = col_data.sample(n=min(200, len(col_data)), random_state=42)
-        sample_str = sample.astype(str)
+        sample_str = self._sample(col_data, full=free_text)
+        
+        # Pré-classification: colonnes évidentes tranchées sans modèles
+        if pre is None and FAST_PATH_ENABLED:
+            pre = preclassify(df[col_name])
         
-        # NER
-        entities, detected_ents = self._extract_entities(sample_str, col_data.index)
+        if pre is not None and pre.route == 'decided' and not free_text:
+            return self._fast_result(col_name, sample_str, pre)
+        
+        if pre is not None and pre.route == 'structured':
+            ner_result = ({}, [])
+        
+        # NER (éventuellement déjà calculé en batch multi-colonnes)
+        if ner_result is None:
+            entities, detected_ents = self._extract_entities(sample_str)
+        else:
+            entities, detected_ents = ner_result
         
         # Contacts
-        contact_info = self._detect_contact_identifiers(sample_str)
+        if contact_info is None:
+            contact_info = contact_features(sample_str, self._full_column(col_data))
+        self._score_identifiers([contact_info])
         
         # Unicité
         uniqueness = len(col_data.unique()) / len(col_data)
         
         # Décision
-        result = self._decide(entities, contact_info, uniqueness, sample_str, detected_ents)
+        result = self._decide(entities, contact_info, uniqueness, sample_str, detected_ents, free_text)
+        
+        if pre is not None and pre.route == 'structured':
+            result.fast_path = True
+            result.reasoning = f"{result.reasoning} | Fast-path: {pre.reasoning} (sans NER)"
         
         icon = "🔒" if result.is_sensitive else "✅"
         status = "SENSIBLE" if result.is_sensitive else "PUBLIC"
-        print(f"→ {icon} {status} ({result.confidence:.0%})")
+        speed = " ⚡" if result.fast_path else ""
+        print(f"🔍 {col_name:<30} → {icon} {status} ({result.confidence:.0%}){speed}")
         
         return result
     
-    def _extract_entities(self, sample: pd.Series, indices) -> Tuple[Dict[str, int], List[Dict]]:
-        """Extraction entités NER"""
-        entity_counts = {}
-        detected_entities = []
+    def _fast_result(self, col_name: str, sample: pd.Series, pre: PreClassification) -> DetectionResult:
+        """Résultat d'une colonne tranchée par la pré-classification"""
+        detected = []
+        
+        if pre.is_sensitive:
+            for idx, val in sample.head(5).items():
+                detected.append({
+                    'text': str(val),
+                    'type': pre.entity_types[0],
+                    'confidence': pre.confidence,
+                    'source': 'Pattern',
+                    'row_index': int(idx)
+                })
+        
+        icon = "🔒" if pre.is_sensitive else "✅"
+        status = "SENSIBLE" if pre.is_sensitive else "PUBLIC"
+        print(f"🔍 {col_name:<30} → {icon} {status} ({pre.confidence:.0%}) ⚡")
+        
+        return DetectionResult(
+            pre.is_sensitive,
+            pre.confidence,
+            list(pre.entity_types),
+            pre.reasoning,
+            sample.head(5).tolist(),
+            detected,
+            fast_path=True
+        )
+    
+    def _score_identifiers(self, contact_infos: List[Dict]):
+        """Score "identifiant" des colonnes pas encore scorées (un seul predict vectorisé)"""
+        # id_features reste en place (dicts partagés, éventuellement relus): seul 'id_scored' marque le travail fait
+        todo = [info for info in contact_infos
+                if info.get('id_features') is not None and not info.get('id_scored')]
+        if not todo:
+            return
+        
+        features = np.vstack([info['id_features'] for info in todo])
+        scorer = self.identifier_scorer
         
-        for idx, text in zip(indices[:30], sample.head(30)):
-            text_str = str(text)[:500]
+        # Modèle en échec (registre → /health): heuristique de repli plutôt qu'une détection en erreur
+        if scorer is None:
+            if not self._id_fallback_logged:
+                errors = self.models.status().get('identifier', {}).get('errors') or ['non enregistré']
+                print(f"⚠️ identifier: modèle indisponible ({'; '.join(errors)}), heuristique de repli")
+                self._id_fallback_logged = True
+            scores, threshold = heuristic_scores(features), ID_SCORE_THRESHOLD
+        else:
+            scores, threshold = scorer.score(features), scorer.threshold
+        
+        for info, score in zip(todo, scores):
+            info['id_ratio'] = float(score)
+            info['has_id'] = bool(score >= threshold)
+            info['id_scored'] = True
+    
+    def _full_column(self, col_data: pd.Series) -> Optional[List[str]]:
+        """Colonne complète pour les features email/téléphone, si bon marché"""
+        if len(col_data) > FEATURES_FULL_COLUMN_MAX_ROWS:
+            return None
+        return col_data.astype(str).tolist()
+    
+    def _sample(self, col_data: pd.Series, full: bool = False) -> pd.Series:
+        """Échantillon (200 max, ou toute la colonne si full) converti en texte"""
+        if full:
+            return col_data.astype(str)
+        sample = col_data.sample(n=min(200, len(col_data)), random_state=42)
+        return sample.astype(str)
+    
+    def _ner_texts(self, sample: pd.Series, full: bool = False) -> List[Tuple[int, str]]:
+        """Cellules envoyées au NER: (index ligne, texte complet ou tronqué)"""
+        texts = []
+        limit = len(sample) if full else NER_SAMPLE_SIZE
+        
+        for idx, text in zip(sample.index[:limit], sample.head(limit)):
+            text_str = str(text) if NER_LONG_TEXT else str(text)[:NER_MAX_CHARS]
             
             if len(text_str.strip()) < 3:
                 continue
             
-            try:
-                if USE_TRANSFORMERS:
-                    # NER médical
-                    try:
-                        ents = self.ner_medical(text_str)
-                        for e in ents:
-                            label = e['entity_group'].upper()
-                            entity_counts[label] = entity_counts.get(label, 0) + 1
-                            detected_entities.append({
-                                'text': e['word'],
-                                'type': label,
-                                'confidence': float(e['score']),
-                                'source': 'ClinicalBERT',
-                                'row_index': int(idx)
-                            })
-                    except:
-                        pass
-                    
-                    # NER général
-                    try:
-                        ents = self.ner_general(text_str)
-                        for e in ents:
-                            label = self._normalize_label(e['entity_group'])
-                            entity_counts[label] = entity_counts.get(label, 0) + 1
-                            detected_entities.append({
+            texts.append((idx, text_str))
+        
+        return texts
+    
+    def _extract_entities(self, sample: pd.Series) -> Tuple[Dict[str, int], List[Dict]]:
+        """Extraction entités NER (une colonne)"""
+        return self._extract_entities_batch({None: sample}).get(None, ({}, []))
+    
+    def _extract_entities_batch(self, samples: Dict[str, pd.Series],
+                                full_coverage: Optional[set] = None) -> Dict[str, Tuple[Dict[str, int], List[Dict]]]:
+        """
+        Extraction entités NER pour plusieurs colonnes en un seul batch
+        
+        Returns:
+            {colonne: (comptage par type, entités détectées avec row_index)}
+        """
+        owners = []
+        texts = []
+        
+        for col, sample in samples.items():
+            for idx, text_str in self._ner_texts(sample, full=col in (full_coverage or ())):
+                owners.append((col, idx))
+                texts.append(text_str)
+        
+        grouped = {col: ([], []) for col in samples}
+        
+        for (col, idx), text_str, ents in zip(owners, texts, self._run_ner_windows(texts)):
+            grouped[col][0].append((idx, text_str))
+            grouped[col][1].append(ents)
+        
+        return {
+            col: self._collect_entities(indexed_texts, outputs)
+            for col, (indexed_texts, outputs) in grouped.items()
+        }
+    
+    def _collect_entities(self, indexed_texts: List[Tuple[int, str]],
+                          outputs: List[List[Dict]]) -> Tuple[Dict[str, int], List[Dict]]:
+        """Rattache les entités à leur row_index et compte par type"""
+        entity_counts = {}
+        detected_entities = []
+        
+        for (idx, _), ents in zip(indexed_texts, outputs):
+            for ent in ents:
+                entity_counts[ent['type']] = entity_counts.get(ent['type'], 0) + 1
+                detected_entities.append({**ent, 'row_index': int(idx)})
+        
+        return entity_counts, detected_entities
+    
+    def _window_tokenizers(self) -> List:
+        """Tokenizers des modèles HF chargés (découpage en fenêtres de tokens)"""
+        if not USE_TRANSFORMERS:
+            return []
+        models = [getattr(self, attr, None) for attr in ('ner_medical', 'ner_general')]
+        return [model.tokenizer for model in models if getattr(model, 'tokenizer', None) is not None]
+    
+    def _split_windows(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Fenêtres couvrant tout le texte
+        
+        Les deux modèles n'ont pas le même vocabulaire: on garde le découpage
+        du tokenizer le plus fin, qui tient donc dans la longueur max des deux
+        """
+        tokenizers = self._window_tokenizers()
+        if not tokenizers:
+            return split_windows(text, max_tokens=NER_WINDOW_TOKENS - SPECIAL_TOKENS,
+                                 stride=NER_WINDOW_STRIDE, max_chars=NER_WINDOW_CHARS)
+        
+        candidates = [
+            split_windows(
+                text, tokenizer,
+                max_tokens=min(NER_WINDOW_TOKENS, tokenizer.model_max_length) - SPECIAL_TOKENS,
+                stride=NER_WINDOW_STRIDE, max_chars=NER_WINDOW_CHARS
+            )
+            for tokenizer in tokenizers
+        ]
+        return max(candidates, key=len)
+    
+    def _run_ner_windows(self, texts: List[str]) -> List[List[Dict]]:
+        """
+        NER sur textes complets
+        
+        Chaque texte long est découpé en fenêtres qui se recouvrent; les
+        fenêtres de tous les textes passent en un seul batch (celles que le
+        pré-scan regex juge vides sont sautées), puis les entités sont
+        ramenées au texte d'origine (offsets) et fusionnées aux frontières.
+        """
+        if not NER_LONG_TEXT:
+            return self._run_ner(texts)
+        
+        owners = []
+        windows = []
+        split = set()
+        skipped = 0
+        
+        for i, text in enumerate(texts):
+            text_windows = self._split_windows(text)
+            
+            if len(text_windows) > 1:
+                split.add(i)
+            
+            for offset, window in text_windows:
+                if i in split and NER_PRESCAN and not worth_scanning(window):
+                    skipped += 1
+                    continue
+                owners.append((i, offset))
+                windows.append(window)
+        
+        if split:
+            print(f"🪟 NER: {len(split)} texte(s) long(s), {len(windows)} fenêtres ({skipped} sautées)")
+        
+        entities = [[] for _ in texts]
+        
+        for (i, offset), ents in zip(owners, self._run_ner(windows)):
+            for e in ents:
+                if offset and e.get('start') is not None:
+                    e = {**e, 'start': e['start'] + offset, 'end': e['end'] + offset}
+                entities[i].append(e)
+        
+        return [
+            merge_entities(text, ents) if i in split else ents
+            for i, (text, ents) in enumerate(zip(texts, entities))
+        ]
+    
+    def _run_ner(self, texts: List[str]) -> List[List[Dict]]:
+        """NER batché: une passe par modèle pour tous les textes"""
+        entities = [[] for _ in texts]
+        
+        if not texts:
+            return entities
+        
+        if USE_TRANSFORMERS:
+            models = [
+                ('ner_medical', 'ClinicalBERT', lambda label: label.upper()),
+                ('ner_general', 'XLM-RoBERTa', self._normalize_label),
+            ]
+            
+            for attr, source, normalize in models:
+                model = getattr(self, attr, None)
+                if model is None:
+                    continue
+                
+                def run(batch, model=model, source=source, normalize=normalize):
+                    return [
+                        [
+                            {
                                 'text': e['word'],
-                                'type': label,
+                                'type': normalize(e['entity_group']),
                                 'confidence': float(e['score']),
-                                'source': 'XLM-RoBERTa',
-                                'row_index': int(idx)
-                            })
-                    except:
-                        pass
+                                'source': source,
+                                'start': e.get('start'),
+                                'end': e.get('end')
+                            }
+                            for e in ents
+                        ]
+                        for ents in self._hf_batch(model, batch)
+                    ]
                 
-                else:
-                    # spaCy
-                    nlp = self.nlp_fr if hasattr(self, 'nlp_fr') and self.nlp_fr else self.nlp_en
-                    doc = nlp(text_str)
-                    
-                    for ent in doc.ents:
-                        label = self._normalize_label(ent.label_)
-                        entity_counts[label] = entity_counts.get(label, 0) + 1
-                        detected_entities.append({
+                for i, ents in enumerate(self._cached_ner(self.models.model_id(attr), texts, run)):
+                    entities[i].extend(ents)
+        
+        else:
+            # spaCy
+            key = 'spacy_fr' if self.nlp_fr is not None else 'spacy_en'
+            nlp = self.models.get(key)
+            if nlp is None:
+                return entities
+            
+            def run(batch):
+                return [
+                    [
+                        {
                             'text': ent.text,
-                            'type': label,
+                            'type': self._normalize_label(ent.label_),
                             'confidence': 1.0,
                             'source': 'spaCy',
-                            'row_index': int(idx)
-                        })
+                            'start': ent.start_char,
+                            'end': ent.end_char
+                        }
+                        for ent in doc.ents
+                    ]
+                    for doc in nlp.pipe(batch, batch_size=NER_BATCH_SIZE)
+                ]
             
-            except:
-                continue
+            try:
+                entities = self._cached_ner(self.models.model_id(key), texts, run)
+            except Exception:
+                return entities
         
-        return entity_counts, detected_entities
+        return entities
+    
+    def _cached_ner(self, model_id: Optional[str], texts: List[str],
+                    run: Callable[[List[str]], List[List[Dict]]]) -> List[List[Dict]]:
+        """
+        NER d'un modèle via le cache par valeur
+        
+        Les textes déjà vus (même modèle, même texte normalisé) sont servis
+        par le cache; seuls les textes distincts absents partent au modèle.
+        """
+        cache = get_ner_cache()
+        if cache is None or model_id is None:
+            return run(texts)
+        
+        normalized = [normalize_text(text) for text in texts]
+        keys = [(model_id, core) for core, _ in normalized]
+        unique = list(dict.fromkeys(keys))
+        
+        found = cache.get_many(unique)
+        misses = [key for key in unique if key not in found]
+        
+        if misses:
+            computed = dict(zip(misses, run([core for _, core in misses])))
+            cache.put_many(computed)
+            found.update(computed)
+        
+        return [shift_entities(found[key], lead) for key, (_, lead) in zip(keys, normalized)]
+    
+    def _hf_batch(self, model, texts: List[str]) -> List[List[Dict]]:
+        """Appel batché d'un pipeline HF (repli texte par texte si le batch échoue)"""
+        try:
+            outputs = model(texts, batch_size=NER_BATCH_SIZE)
+            
+            # Un seul texte: certains pipelines ne renvoient pas de liste imbriquée
+            if len(texts) == 1 and outputs and isinstance(outputs[0], dict):
+                outputs = [outputs]
+            
+            return outputs
+        
+        except Exception:
+            outputs = []
+            
+            for text in texts:
+                try:
+                    outputs.append(model(text))
+                except Exception:
+                    outputs.append([])
+            
+            return outputs
     
     def _normalize_label(self, label: str) -> str:
         """Normalisation labels"""
@@ -239,84 +700,16 @@ class UltraProDetector:
         else:
             return label
     
-    def _detect_contact_identifiers(self, sample: pd.Series) -> Dict:
-        """Détection emails/phones/IDs"""
-        result = {
-            'has_email': False,
-            'has_phone': False,
-            'has_id': False,
-            'email_count': 0,
-            'phone_count': 0,
-            'id_ratio': 0.0
-        }
-        
-        email_count = 0
-        phone_count = 0
-        
-        for value in sample:
-            text = str(value)
-            
-            # Email
-            if '@' in text and '.' in text:
-                parts = text.split('@')
-                if len(parts) == 2 and '.' in parts[1]:
-                    email_count += 1
-            
-            # Phone
-            digit_ratio = sum(c.isdigit() for c in text) / max(len(text), 1)
-            if (digit_ratio > 0.6 and len(text) >= 8) or (text.startswith('+') and digit_ratio > 0.5):
-                phone_count += 1
-        
-        result['email_count'] = email_count
-        result['phone_count'] = phone_count
-        result['has_email'] = email_count > 0
-        result['has_phone'] = phone_count > 0
-        
-        # IDs via Isolation Forest
-        try:
-            features = []
-            
-            for value in sample.head(100):
-                text = str(value)
-                
-                feat = [
-                    len(text),
-                    sum(c.isdigit() for c in text),
-                    sum(c.isalpha() for c in text),
-                    sum(c.isupper() for c in text),
-                    sum(c.islower() for c in text),
-                    sum(not c.isalnum() and not c.isspace() for c in text),
-                    text.count('-'),
-                    text.count('_'),
-                    text.count('.'),
-                    text.count('@'),
-                    int(text.isalnum()),
-                    int(text.isdigit()),
-                ]
-                
-                features.append(feat)
-            
-            if len(features) >= 10:
-                X = np.array(features)
-                X_scaled = self.scaler.fit_transform(X)
-                predictions = self.anomaly_detector.fit_predict(X_scaled)
-                
-                result['id_ratio'] = (predictions == -1).sum() / len(predictions)
-                result['has_id'] = result['id_ratio'] > 0.2
-        
-        except:
-            pass
-        
-        return result
-    
     def _decide(self, entities: Dict[str, int], contact_info: Dict,
-                uniqueness: float, sample: pd.Series, detected_ents: List[Dict]) -> DetectionResult:
+                uniqueness: float, sample: pd.Series, detected_ents: List[Dict],
+                free_text: bool = False) -> DetectionResult:
         """Décision finale"""
         score = 0.0
         types = []
         reasons = []
         
-        sample_size = min(30, len(sample))
+        # Texte libre: ratios sur les paragraphes réellement scannés
+        sample_size = max(len(sample), 1) if free_text else min(30, len(sample))
         
         # Personnes
         person_count = entities.get('PERSON', 0)
@@ -333,7 +726,19 @@ class UltraProDetector:
             types.append('EMAIL')
             reasons.append(f"Emails ({email_ratio:.0%})")
             
-            for idx, val in enumerate(sample.head(30)):
+            if free_text:
+                # Emails extraits du texte (jamais le paragraphe entier)
+                for idx, val in sample.items():
+                    for email in EMAIL_PATTERN.findall(str(val)):
+                        detected_ents.append({
+                            'text': email,
+                            'type': 'EMAIL',
+                            'confidence': 0.95,
+                            'source': 'Pattern',
+                            'row_index': int(idx)
+                        })
+            
+            for idx, val in enumerate(sample.head(30) if not free_text else []):
                 if '@' in str(val):
                     detected_ents.append({
                         'text': str(val),
@@ -391,6 +796,12 @@ class UltraProDetector:
         confidence = min(score, 1.0)
         is_sensitive = confidence >= 0.50
         
+        # Texte libre: toute entité trouvée est remplacée, quel que soit le ratio
+        if free_text and detected_ents and not is_sensitive:
+            is_sensitive = True
+            confidence = max(confidence, 0.5)
+            reasons.append(f"Texte libre ({len(detected_ents)} entité(s) sur {len(sample)} paragraphes)")
+        
         reasoning = " | ".join(reasons) if reasons else "Catégoriel"
         samples = sample.head(5).astype(str).tolist()
         
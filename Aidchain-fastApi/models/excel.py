@@ -0,0 +1,195 @@
+"""
+Excel en streaming (openpyxl read-only / write-only)
+
+Toutes les feuilles sont lues ligne par ligne, sans construire le modèle
+objet complet du classeur. Un classeur à plusieurs feuilles devient un seul
+DataFrame aux colonnes préfixées "<feuille>!<colonne>", feuilles empilées
+en lignes (chaque ligne appartient à une seule feuille, vide ailleurs): la
+détection et l'anonymisation restent par colonne, et une ligne ne mélange
+jamais les enregistrements de deux feuilles (décalage de dates par patient).
+La disposition (première ligne, nombre de lignes, colonnes de chaque
+feuille) est gardée dans df.attrs['sheets'] pour ré-écrire chaque feuille.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from config import BATCH_SIZE
+
+SHEET_SEPARATOR = '!'
+EXCEL_MAX_ROWS = 1_048_576  # Lignes par feuille (en-tête compris)
+
+
+def _header(row) -> List[str]:
+    """Noms de colonnes uniques (vides → column_N, doublons → nom.1, nom.2...)"""
+    names, seen = [], {}
+
+    for i, value in enumerate(row):
+        name = str(value).strip() if value is not None and str(value).strip() else f"column_{i + 1}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+
+    return names
+
+
+def _read_sheet(worksheet) -> Optional[pd.DataFrame]:
+    rows = worksheet.iter_rows(values_only=True)
+
+    # Première ligne non vide = en-tête
+    header = None
+    for row in rows:
+        if any(value is not None for value in row):
+            header = _header(row)
+            break
+
+    if header is None:
+        return None
+
+    width = len(header)
+    records = [row[:width] for row in rows if any(value is not None for value in row)]
+
+    return pd.DataFrame.from_records(records, columns=header)
+
+
+def read_workbook(source, ext: str = '.xlsx') -> pd.DataFrame:
+    """Toutes les feuilles non vides; plusieurs feuilles → colonnes préfixées"""
+    if ext == '.xls':
+        # Format binaire: pas de lecteur streaming, lecture pandas (xlrd)
+        sheets = {name: df for name, df in pd.read_excel(source, sheet_name=None).items() if not df.empty}
+    else:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            sheets = {}
+            for worksheet in workbook.worksheets:
+                df = _read_sheet(worksheet)
+                if df is not None:
+                    sheets[worksheet.title] = df
+        finally:
+            workbook.close()
+
+    if not sheets:
+        return pd.DataFrame()
+
+    if len(sheets) == 1:
+        name, df = next(iter(sheets.items()))
+        df.attrs['sheets'] = {name: {'start': 0, 'rows': len(df), 'columns': list(df.columns)}}
+        return df
+
+    layout = {}
+    start = 0
+    for name, df in sheets.items():
+        layout[name] = {'start': start, 'rows': len(df), 'columns': list(df.columns)}
+        start += len(df)
+
+    combined = pd.concat(
+        [df.add_prefix(f"{name}{SHEET_SEPARATOR}") for name, df in sheets.items()],
+        ignore_index=True
+    )
+    combined.attrs['sheets'] = layout
+    print(f"📑 Excel: {len(sheets)} feuilles ({', '.join(sheets)})")
+    return combined
+
+
+def split_sheets(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Inverse de read_workbook: une DataFrame par feuille (ses lignes et ses colonnes seulement)"""
+    layout = df.attrs.get('sheets')
+
+    if not layout or len(layout) == 1:
+        name = next(iter(layout)) if layout else 'Sheet1'
+        return {name: df}
+
+    sheets = {}
+    for name, info in layout.items():
+        prefixed = [f"{name}{SHEET_SEPARATOR}{col}" for col in info['columns']]
+        start = info.get('start', 0)
+        sheet = df[prefixed].iloc[start:start + info['rows']].reset_index(drop=True)
+        sheet.columns = info['columns']
+        sheets[name] = sheet
+
+    return sheets
+
+
+def stack_sheets(df: pd.DataFrame) -> pd.DataFrame:
+    """Feuilles empilées avec une colonne 'sheet' (export CSV / Parquet d'un classeur)"""
+    sheets = split_sheets(df)
+
+    if len(sheets) == 1:
+        return next(iter(sheets.values()))
+
+    return pd.concat(
+        [sheet.assign(sheet=name)[['sheet', *sheet.columns]] for name, sheet in sheets.items()],
+        ignore_index=True
+    )
+
+
+def write_workbook(df: pd.DataFrame, path: Path):
+    """Export write-only (mémoire constante), une feuille par feuille d'origine"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+
+    for name, sheet in split_sheets(df).items():
+        worksheet = workbook.create_sheet(title=str(name)[:31])
+        worksheet.append([str(col) for col in sheet.columns])
+
+        for start in range(0, len(sheet), BATCH_SIZE):
+            for row in _rows(sheet.iloc[start:start + BATCH_SIZE]):
+                worksheet.append(row)
+
+    workbook.save(path)
+
+
+def _rows(block: pd.DataFrame):
+    """Lignes prêtes pour openpyxl (NaN → cellule vide)"""
+    block = block.astype(object)
+    return block.where(block.notna(), None).itertuples(index=False, name=None)
+
+
+class WorkbookWriter:
+    """
+    Export .xlsx par chunks (pipelines en streaming), en write-only
+
+    Une seule feuille, continuée sur "<feuille> (2)"... au-delà de la limite
+    de lignes d'Excel
+    """
+
+    def __init__(self, path: Path, sheet: str = 'Sheet1'):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.sheet = sheet
+        self._workbook = Workbook(write_only=True)
+        self._worksheet = None
+        self._columns: Optional[List[str]] = None
+        self._sheets = 0
+        self._rows = 0
+
+    def _new_sheet(self):
+        self._sheets += 1
+        title = self.sheet if self._sheets == 1 else f"{self.sheet} ({self._sheets})"
+        self._worksheet = self._workbook.create_sheet(title=title[:31])
+        self._worksheet.append(self._columns)
+        self._rows = 1
+
+    def write(self, df: pd.DataFrame):
+        if self._columns is None:
+            self._columns = [str(col) for col in df.columns]
+            self._new_sheet()
+
+        for row in _rows(df):
+            if self._rows >= EXCEL_MAX_ROWS:
+                self._new_sheet()
+            self._worksheet.append(row)
+            self._rows += 1
+
+    def close(self):
+        if self._columns is None:
+            self._workbook.create_sheet(title=self.sheet)
+        self._workbook.save(self.path)
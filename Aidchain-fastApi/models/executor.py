@@ -0,0 +1,234 @@
+"""
+Exécuteur borné pour les runs du pipeline (hors boucle asyncio)
+"""
+import asyncio
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Union
+
+from config import EXECUTOR_MODE, MAX_QUEUE_SIZE, MAX_WORKERS, RETRY_AFTER_SECONDS
+
+from .upload import UploadedFile
+
+
+class ExecutorSaturatedError(Exception):
+    """Levée quand tous les workers et la file d'attente sont occupés"""
+
+    def __init__(self, retry_after: int = RETRY_AFTER_SECONDS):
+        super().__init__("Service saturé, réessayez plus tard")
+        self.retry_after = retry_after
+
+
+# Vrai uniquement dans les workers du pool (posé par _init_worker): les enfants
+# uvicorn (--reload, --workers) ont aussi un parent_process() mais créent leurs pools
+_IN_POOL_WORKER = False
+
+
+def in_worker_process() -> bool:
+    """
+    Exécuté dans un process enfant (worker du pool en EXECUTOR_MODE="process")
+
+    Les pools de process annexes (features, PDF) ne sont créés que dans le
+    parent: un worker utilise des threads ou travaille en séquentiel plutôt
+    que d'imbriquer des pools spawn
+    """
+    return _IN_POOL_WORKER
+
+
+def _init_worker():
+    """Préchargement des modèles dans chaque process worker"""
+    global _IN_POOL_WORKER
+    _IN_POOL_WORKER = True
+
+    from .pipeline import AidChainPipeline
+    AidChainPipeline()
+
+
+def _run_pipeline(file_path: Union[str, UploadedFile], options: Dict, token: Optional[str] = None, queue=None) -> Dict:
+    """Point d'entrée exécuté dans le worker (thread ou process)"""
+    from .pipeline import AidChainPipeline
+    
+    # Process: la progression remonte au parent via la queue partagée
+    if queue is not None:
+        options['progress'] = lambda *event: queue.put((token, *event))
+    
+    return AidChainPipeline().process(file_path, **options)
+
+
+def _discard(file_path: Union[str, UploadedFile]):
+    """Supprime l'upload confié à l'exécuteur (un chemin fourni par l'appelant reste à lui)"""
+    if isinstance(file_path, UploadedFile):
+        file_path.cleanup()
+
+
+class PipelineExecutor:
+    """
+    ⚙️ POOL BORNÉ POUR LE PIPELINE
+
+    - Pool de threads ou de process (config.EXECUTOR_MODE)
+    - Taille: config.MAX_WORKERS
+    - Admission: MAX_WORKERS en cours + MAX_QUEUE_SIZE en attente, au-delà → saturé
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, '_initialized'):
+            return
+
+        if EXECUTOR_MODE not in ('thread', 'process'):
+            raise ValueError(f"EXECUTOR_MODE invalide: {EXECUTOR_MODE}")
+
+        self.mode = EXECUTOR_MODE
+        self.max_workers = MAX_WORKERS
+        self.capacity = MAX_WORKERS + MAX_QUEUE_SIZE
+
+        self._pool: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        
+        # Relais de progression (mode process)
+        self._manager = None
+        self._progress_queue = None
+        self._progress_callbacks: Dict[str, Callable] = {}
+
+        self._initialized = True
+
+    def _get_pool(self) -> Executor:
+        """Création paresseuse du pool"""
+        with self._lock:
+            if self._pool is None:
+                if self.mode == 'process':
+                    # spawn: fork + torch n'est pas sûr
+                    ctx = multiprocessing.get_context('spawn')
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=ctx,
+                        initializer=_init_worker
+                    )
+                    self._manager = ctx.Manager()
+                    self._progress_queue = self._manager.Queue()
+                    threading.Thread(
+                        target=self._relay_progress,
+                        args=(self._progress_queue,),
+                        name='aidchain-progress',
+                        daemon=True
+                    ).start()
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='aidchain-pipeline'
+                    )
+            return self._pool
+
+    @property
+    def pending(self) -> int:
+        """Jobs en cours + en attente"""
+        return self._pending
+
+    def is_saturated(self) -> bool:
+        return self._pending >= self.capacity
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise ExecutorSaturatedError()
+            self._pending += 1
+
+    def _release(self, *_):
+        with self._lock:
+            self._pending -= 1
+
+    def _relay_progress(self, queue):
+        """Thread parent: redistribue les événements de progression des process"""
+        while True:
+            try:
+                event = queue.get()
+            except (EOFError, OSError):
+                return
+            if event is None:
+                return
+            
+            token, *args = event
+            callback = self._progress_callbacks.get(token)
+            if callback:
+                try:
+                    callback(*args)
+                except Exception:
+                    pass
+
+    def submit(self, file_path: Union[str, UploadedFile],
+               progress: Optional[Callable[[str, float, int], None]] = None,
+               **options) -> Future:
+        """
+        Soumet AidChainPipeline.process au pool
+
+        L'exécuteur devient propriétaire d'un UploadedFile: il est supprimé à
+        la fin réelle du job (ou tout de suite si la soumission échoue), jamais
+        par la requête, qu'une déconnexion du client peut annuler en cours de job
+
+        Args:
+            progress: callback (étape, pourcentage, lignes traitées), appelé hors boucle
+
+        Raises:
+            ExecutorSaturatedError: si la capacité est atteinte
+        """
+        try:
+            self._acquire()
+        except ExecutorSaturatedError:
+            _discard(file_path)
+            raise
+
+        try:
+            pool = self._get_pool()
+            
+            if self.mode == 'process' and progress is not None:
+                token = uuid.uuid4().hex
+                self._progress_callbacks[token] = progress
+                future = pool.submit(_run_pipeline, file_path, options, token, self._progress_queue)
+                future.add_done_callback(lambda _: self._progress_callbacks.pop(token, None))
+            else:
+                if progress is not None:
+                    options['progress'] = progress
+                future = pool.submit(_run_pipeline, file_path, options)
+        except Exception:
+            self._release()
+            _discard(file_path)
+            raise
+
+        # Libération à la fin réelle du job (même si le client se déconnecte)
+        future.add_done_callback(self._release)
+        future.add_done_callback(lambda _: _discard(file_path))
+
+        return future
+
+    async def run(self, file_path: Union[str, UploadedFile], **options) -> Dict:
+        """Exécute AidChainPipeline.process dans le pool sans bloquer la boucle"""
+        return await asyncio.wrap_future(self.submit(file_path, **options))
+
+    def stats(self) -> Dict:
+        return {
+            'mode': self.mode,
+            'max_workers': self.max_workers,
+            'capacity': self.capacity,
+            'pending': self._pending
+        }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+                self._pool = None
+            
+            if self._manager is not None:
+                self._progress_queue.put(None)
+                self._manager.shutdown()
+                self._manager = None
+                self._progress_queue = None
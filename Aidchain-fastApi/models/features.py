@@ -0,0 +1,200 @@
+"""
+Features bon marché (regex / statistiques) calculées par colonne
+
+Fonctions pures, sans état partagé: exécutables dans un pool de process.
+Toutes les features caractère sont calculées en une passe NumPy sur une
+matrice de points de code (lignes × caractères), sans boucle Python par valeur.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Classes de caractères (bits)
+DIGIT = 1
+ALPHA = 2
+UPPER = 4
+LOWER = 8
+ALNUM = 16
+PUNCT = 32  # ni alphanumérique ni espace
+
+FEATURE_NAMES = [
+    'length', 'digits', 'alpha', 'upper', 'lower', 'punct',
+    'dash', 'underscore', 'dot', 'at', 'is_alnum', 'is_digit'
+]
+
+COLUMN_FEATURE_NAMES = (
+    [f'mean_{name}' for name in FEATURE_NAMES]
+    + [f'std_{name}' for name in FEATURE_NAMES]
+    + ['uniqueness']
+)
+
+SAMPLE_SIZE = 200  # Taille de l'échantillon de référence du détecteur
+_CHAR_BUDGET = 4_000_000  # Cellules max de la matrice de caractères par bloc
+_TABLE_SIZE = 0x10000  # Plan multilingue de base en table; au-delà → prédicats par caractère
+
+
+def _char_flags(code: int) -> int:
+    """Bits de classe d'un point de code (prédicats str, 0 pour le remplissage)"""
+    if code == 0:
+        return 0
+
+    c = chr(code)
+    flags = 0
+    if c.isdigit():
+        flags |= DIGIT
+    if c.isalpha():
+        flags |= ALPHA
+    if c.isupper():
+        flags |= UPPER
+    if c.islower():
+        flags |= LOWER
+    if c.isalnum():
+        flags |= ALNUM
+    elif not c.isspace():
+        flags |= PUNCT
+    return flags
+
+
+def _build_char_table() -> np.ndarray:
+    """Table point de code → bits de classe (calculée une fois à l'import)"""
+    return np.array([_char_flags(code) for code in range(_TABLE_SIZE)], dtype=np.uint8)
+
+
+_CHAR_TABLE = _build_char_table()
+_astral_flags = lru_cache(maxsize=4096)(_char_flags)
+
+
+def _lookup_flags(codes: np.ndarray) -> np.ndarray:
+    """Bits de classe d'une matrice de points de code"""
+    astral = codes >= _TABLE_SIZE
+    flags = _CHAR_TABLE[np.minimum(codes, _TABLE_SIZE - 1)]
+
+    # Hors BMP (emojis, idéogrammes des plans supplémentaires, lettres mathématiques...):
+    # rares, classés un par un, une fois par point de code distinct
+    if astral.any():
+        unique, inverse = np.unique(codes[astral], return_inverse=True)
+        flags[astral] = np.array([_astral_flags(int(code)) for code in unique], dtype=np.uint8)[inverse]
+
+    return flags
+
+
+def char_features(values: Iterable[str]) -> Dict[str, np.ndarray]:
+    """
+    Features caractère de chaque valeur, en une passe vectorisée
+
+    Returns:
+        {'matrix': (n, 12) selon FEATURE_NAMES, 'is_email': bool[n], 'is_phone': bool[n]}
+    """
+    text = pd.Series(values, dtype=object).astype(str)
+    n = len(text)
+
+    matrix = np.zeros((n, len(FEATURE_NAMES)), dtype=np.float64)
+    is_email = np.zeros(n, dtype=bool)
+    is_phone = np.zeros(n, dtype=bool)
+
+    if n == 0:
+        return {'matrix': matrix, 'is_email': is_email, 'is_phone': is_phone}
+
+    lengths = text.str.len().to_numpy()
+    max_len = max(int(lengths.max()), 1)
+    step = max(1, _CHAR_BUDGET // max_len)
+
+    for start in range(0, n, step):
+        stop = min(start + step, n)
+        block = np.array(text.iloc[start:stop].tolist(), dtype=f'<U{max_len}')
+        codes = block.view(np.uint32).reshape(stop - start, max_len)
+
+        flags = _lookup_flags(codes)
+        length = lengths[start:stop]
+
+        digits = (flags & DIGIT).astype(bool).sum(axis=1)
+        alnum = (flags & ALNUM).astype(bool).sum(axis=1)
+        ats = codes == ord('@')
+        dots = codes == ord('.')
+
+        m = matrix[start:stop]
+        m[:, 0] = length
+        m[:, 1] = digits
+        m[:, 2] = (flags & ALPHA).astype(bool).sum(axis=1)
+        m[:, 3] = (flags & UPPER).astype(bool).sum(axis=1)
+        m[:, 4] = (flags & LOWER).astype(bool).sum(axis=1)
+        m[:, 5] = (flags & PUNCT).astype(bool).sum(axis=1)
+        m[:, 6] = (codes == ord('-')).sum(axis=1)
+        m[:, 7] = (codes == ord('_')).sum(axis=1)
+        m[:, 8] = dots.sum(axis=1)
+        m[:, 9] = ats.sum(axis=1)
+        m[:, 10] = (alnum == length) & (length > 0)
+        m[:, 11] = (digits == length) & (length > 0)
+
+        # Email: exactement un '@' suivi d'au moins un '.'
+        dot_after_at = (dots & (np.cumsum(ats, axis=1) >= 1)).any(axis=1)
+        is_email[start:stop] = (m[:, 9] == 1) & dot_after_at
+
+        # Téléphone: majorité de chiffres, ou préfixe '+'
+        digit_ratio = digits / np.maximum(length, 1)
+        starts_plus = codes[:, 0] == ord('+')
+        is_phone[start:stop] = ((digit_ratio > 0.6) & (length >= 8)) | (starts_plus & (digit_ratio > 0.5))
+
+    return {'matrix': matrix, 'is_email': is_email, 'is_phone': is_phone}
+
+
+def column_features(values: Iterable[str], matrix: Optional[np.ndarray] = None) -> np.ndarray:
+    """Vecteur de features d'une colonne (moyennes/écarts-types + unicité)"""
+    values = [str(v) for v in values]
+
+    if not values:
+        return np.zeros(len(COLUMN_FEATURE_NAMES))
+
+    if matrix is None:
+        matrix = char_features(values)['matrix']
+
+    uniqueness = len(set(values)) / len(values)
+
+    return np.concatenate([matrix.mean(axis=0), matrix.std(axis=0), [uniqueness]])
+
+
+def contact_features(sample: Iterable[str], column: Optional[Iterable[str]] = None) -> Dict:
+    """
+    Détection emails/phones/IDs
+
+    Args:
+        sample: échantillon (≤ 200 valeurs) du détecteur
+        column: colonne complète optionnelle (quand c'est bon marché) pour les
+            comptages email/téléphone; ils sont ramenés à l'échelle de
+            l'échantillon pour garder les seuils de décision inchangés
+    """
+    sample = [str(v) for v in sample]
+
+    result = {
+        'has_email': False,
+        'has_phone': False,
+        'has_id': False,
+        'email_count': 0,
+        'phone_count': 0,
+        'id_ratio': 0.0,
+        'id_features': None,  # Vecteur de colonne, scoré par IdentifierScorer
+        'id_scored': False
+    }
+
+    sample_feats = char_features(sample)
+
+    if column is not None:
+        column_feats = char_features(column)
+        n = len(column_feats['is_email'])
+        scale = min(n, SAMPLE_SIZE) / max(n, 1)
+        email_count = int(round(column_feats['is_email'].sum() * scale))
+        phone_count = int(round(column_feats['is_phone'].sum() * scale))
+    else:
+        email_count = int(sample_feats['is_email'].sum())
+        phone_count = int(sample_feats['is_phone'].sum())
+
+    result['email_count'] = email_count
+    result['phone_count'] = phone_count
+    result['has_email'] = email_count > 0
+    result['has_phone'] = phone_count > 0
+
+    result['id_features'] = column_features(sample, sample_feats['matrix'])
+
+    return result
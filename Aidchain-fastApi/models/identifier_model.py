@@ -0,0 +1,205 @@
+"""
+Score "identifiant" pré-entraîné au niveau colonne
+
+Remplace l'Isolation Forest ré-entraînée à chaque colonne: le modèle est
+entraîné hors ligne sur des features de colonne, sérialisé sur disque et
+chargé une seule fois. Le scoring est un unique predict_proba vectorisé.
+
+Entraînement (déterministe: générateurs et Faker à graine fixe), artefact
+versionné avec le code; un artefact absent ou obsolète est une erreur au
+démarrage:
+    python -m models.identifier_model
+"""
+import random
+import string
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import joblib
+import numpy as np
+
+from config import IDENTIFIER_MODEL_PATH, ID_SCORE_THRESHOLD
+
+from .features import COLUMN_FEATURE_NAMES, SAMPLE_SIZE, column_features
+
+MODEL_VERSION = 1
+
+# Repli heuristique (modèle indisponible): colonne unique, de longueur stable, sans espace, avec chiffres
+HEURISTIC_UNIQUENESS = 0.9
+HEURISTIC_DIGIT_SHARE = 0.3
+HEURISTIC_MAX_LENGTH_STD = 2.0
+
+
+# ================== CORPUS SYNTHÉTIQUE ==================
+
+
+def _synthetic_generators(fake) -> Dict[str, List[Callable[[int], List[str]]]]:
+    """Générateurs de colonnes étiquetées (1 = identifiant, 0 = autre)"""
+    rng = random.Random(42)
+
+    def uuid4(n):
+        # UUID v4 tirés du générateur à graine (uuid.uuid4() n'est pas reproductible)
+        return [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(n)]
+
+    def prefixed(n):
+        prefix = rng.choice(['PAT', 'MRN', 'ID', 'P', 'DOS', 'ENC'])
+        sep = rng.choice(['-', '_', ''])
+        start = rng.randint(0, 90000)
+        return [f"{prefix}{sep}{start + i:05d}" for i in range(n)]
+
+    def numeric_ids(n):
+        digits = rng.randint(6, 12)
+        return [str(rng.randrange(10 ** (digits - 1), 10 ** digits)) for _ in range(n)]
+
+    def hex_ids(n):
+        size = rng.choice([8, 12, 16, 32])
+        return [u.hex[:size] for u in uuid4(n)]
+
+    def alnum_codes(n):
+        size = rng.randint(6, 12)
+        alphabet = string.ascii_uppercase + string.digits
+        return [''.join(rng.choice(alphabet) for _ in range(size)) for _ in range(n)]
+
+    def ssn_like(n):
+        return [fake.ssn() for _ in range(n)]
+
+    def categorical(n):
+        choices = rng.choice([['A+', 'A-', 'B+', 'O+', 'O-', 'AB+'], ['M', 'F'], ['oui', 'non'],
+                              ['E11.9', 'I10', 'J45', 'C50.9', 'K21.0', 'F32.1', 'N18.3']])
+        return [rng.choice(choices) for _ in range(n)]
+
+    def measures(n):
+        scale = rng.choice([1, 10, 100, 1000])
+        return [f"{rng.random() * scale:.{rng.randint(1, 3)}f}" for _ in range(n)]
+
+    def small_ints(n):
+        return [str(rng.randint(0, 120)) for _ in range(n)]
+
+    return {
+        'positive': [
+            lambda n: [str(u) for u in uuid4(n)],
+            prefixed, numeric_ids, hex_ids, alnum_codes, ssn_like,
+        ],
+        'negative': [
+            lambda n: [fake.name() for _ in range(n)],
+            lambda n: [fake.first_name() for _ in range(n)],
+            lambda n: [fake.city() for _ in range(n)],
+            lambda n: [fake.company() for _ in range(n)],
+            lambda n: [fake.sentence() for _ in range(n)],
+            lambda n: [fake.address().replace('\n', ', ') for _ in range(n)],
+            lambda n: [fake.email() for _ in range(n)],
+            lambda n: [fake.phone_number() for _ in range(n)],
+            lambda n: [fake.date() for _ in range(n)],
+            categorical, measures, small_ints,
+        ],
+    }
+
+
+def train_identifier_model(path: Path = IDENTIFIER_MODEL_PATH, columns_per_generator: int = 40) -> Dict:
+    """Entraîne le modèle sur un corpus synthétique (Faker) et le sérialise"""
+    from faker import Faker
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    fake = Faker(['fr_FR', 'en_US'])
+    Faker.seed(42)
+    rng = random.Random(42)
+
+    X, y = [], []
+
+    for label, generators in ((1, _synthetic_generators(fake)['positive']),
+                              (0, _synthetic_generators(fake)['negative'])):
+        for generate in generators:
+            for _ in range(columns_per_generator):
+                X.append(column_features(generate(rng.randint(20, SAMPLE_SIZE))))
+                y.append(label)
+
+    model = HistGradientBoostingClassifier(max_iter=200, random_state=42)
+    model.fit(np.array(X), np.array(y))
+
+    bundle = {
+        'model': model,
+        'version': MODEL_VERSION,
+        'features': COLUMN_FEATURE_NAMES,
+        'trained_at': time.time(),
+        'n_columns': len(y)
+    }
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(bundle, path)
+
+    return bundle
+
+
+def heuristic_scores(features: np.ndarray) -> np.ndarray:
+    """Score 0/1 par règles sur les features de colonne, quand le modèle n'a pas pu être chargé"""
+    features = np.atleast_2d(features)
+    if features.size == 0:
+        return np.zeros(0)
+
+    col = {name: features[:, i] for i, name in enumerate(COLUMN_FEATURE_NAMES)}
+    length = np.maximum(col['mean_length'], 1)
+    spaces = col['mean_length'] - col['mean_alpha'] - col['mean_digits'] - col['mean_punct']
+
+    is_id = (
+        (col['uniqueness'] >= HEURISTIC_UNIQUENESS)
+        & (col['mean_digits'] / length >= HEURISTIC_DIGIT_SHARE)
+        & (col['std_length'] <= HEURISTIC_MAX_LENGTH_STD)
+        & (col['mean_length'] >= 4)
+        & (spaces < 0.5)
+        & (col['mean_at'] == 0)
+    )
+    return is_id.astype(float)
+
+
+class IdentifierScorer:
+    """
+    🆔 SCORE D'IDENTIFIANT (singleton, chargé une fois au démarrage)
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance._load()
+                cls._instance = instance
+        return cls._instance
+
+    def _load(self):
+        path = Path(IDENTIFIER_MODEL_PATH)
+        hint = "régénérer avec: python -m models.identifier_model"
+
+        # Pas d'entraînement implicite au démarrage: l'artefact versionné fait foi
+        if not path.exists():
+            raise RuntimeError(f"Modèle identifiants absent ({path}), {hint}")
+
+        try:
+            bundle: Dict = joblib.load(path)
+        except Exception as e:
+            raise RuntimeError(f"Modèle identifiants illisible ({path}: {e}), {hint}") from e
+
+        if bundle.get('version') != MODEL_VERSION or bundle.get('features') != COLUMN_FEATURE_NAMES:
+            raise RuntimeError(f"Modèle identifiants obsolète ({path}), {hint}")
+
+        self.model = bundle['model']
+        self.threshold = ID_SCORE_THRESHOLD
+        print(f"✅ Modèle identifiants ({bundle['n_columns']} colonnes d'entraînement)")
+
+    def score(self, features: np.ndarray) -> np.ndarray:
+        """Probabilité "identifiant" pour chaque ligne (une colonne par ligne)"""
+        features = np.atleast_2d(features)
+        if len(features) == 0:
+            return np.zeros(0)
+        return self.model.predict_proba(features)[:, 1]
+
+
+if __name__ == "__main__":
+    started = time.time()
+    bundle = train_identifier_model()
+    print(f"✅ {IDENTIFIER_MODEL_PATH} ({bundle['n_columns']} colonnes, {time.time() - started:.1f}s)")
@@ -0,0 +1,181 @@
+"""
+Stockage de l'état des jobs d'anonymisation asynchrones
+
+Les jobs plus vieux que FILE_EXPIRATION_HOURS sont purgés à la création
+d'un job (au plus une fois par PURGE_INTERVAL_SECONDS).
+"""
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional
+
+from config import FILE_EXPIRATION_HOURS, JOB_STORE_BACKEND, JOB_STORE_PATH
+
+PURGE_INTERVAL_SECONDS = 300
+
+
+@dataclass
+class JobRecord:
+    job_id: str
+    original_filename: str
+    status: str = 'queued'  # queued | running | completed | failed
+    stage: str = 'queued'   # loading | detecting | anonymizing | exporting
+    progress: float = 0.0
+    rows_processed: int = 0
+    error: Optional[str] = None
+    result: Optional[str] = None  # AnonymizationResponse sérialisée (JSON)
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+
+class JobStore(ABC):
+    """Interface commune des stores de jobs"""
+
+    _last_purge = 0.0
+
+    def create(self, original_filename: str) -> JobRecord:
+        record = JobRecord(job_id=uuid.uuid4().hex, original_filename=original_filename)
+        self._save(record)
+
+        # Purge périodique des jobs expirés (sans tâche de fond)
+        if record.created_at - self._last_purge > PURGE_INTERVAL_SECONDS:
+            self._last_purge = record.created_at
+            self.purge_expired()
+
+        return record
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        ...
+
+    @abstractmethod
+    def update(self, job_id: str, **fields) -> Optional[JobRecord]:
+        ...
+
+    @abstractmethod
+    def purge_expired(self, max_age_seconds: float = FILE_EXPIRATION_HOURS * 3600) -> int:
+        ...
+
+    @abstractmethod
+    def _save(self, record: JobRecord):
+        ...
+
+
+class InMemoryJobStore(JobStore):
+    """Store par défaut (un seul process uvicorn)"""
+
+    def __init__(self):
+        self._jobs: Dict[str, JobRecord] = {}
+        self._lock = threading.Lock()
+
+    def _save(self, record: JobRecord):
+        with self._lock:
+            self._jobs[record.job_id] = record
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def update(self, job_id: str, **fields) -> Optional[JobRecord]:
+        with self._lock:
+            record = self._jobs.get(job_id)
+            if record is None:
+                return None
+            for key, value in fields.items():
+                setattr(record, key, value)
+            record.updated_at = time.time()
+            return record
+
+    def purge_expired(self, max_age_seconds: float = FILE_EXPIRATION_HOURS * 3600) -> int:
+        limit = time.time() - max_age_seconds
+        with self._lock:
+            expired = [job_id for job_id, rec in self._jobs.items() if rec.updated_at < limit]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """Store persistant, partagé entre workers uvicorn d'une même machine"""
+
+    _FIELDS = list(JobRecord.__dataclass_fields__)
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                original_filename TEXT,
+                status TEXT,
+                stage TEXT,
+                progress REAL,
+                rows_processed INTEGER,
+                error TEXT,
+                result TEXT,
+                created_at REAL,
+                updated_at REAL
+            )
+            """
+        )
+        self._lock = threading.Lock()
+
+    def _save(self, record: JobRecord):
+        data = asdict(record)
+        columns = ', '.join(self._FIELDS)
+        placeholders = ', '.join('?' for _ in self._FIELDS)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({columns}) VALUES ({placeholders})",
+                [data[name] for name in self._FIELDS]
+            )
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self._FIELDS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return JobRecord(*row) if row else None
+
+    def update(self, job_id: str, **fields) -> Optional[JobRecord]:
+        unknown = set(fields) - set(self._FIELDS)
+        if unknown:
+            raise ValueError(f"Champs inconnus: {unknown}")
+
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                [*fields.values(), job_id]
+            )
+        return self.get(job_id)
+
+    def purge_expired(self, max_age_seconds: float = FILE_EXPIRATION_HOURS * 3600) -> int:
+        limit = time.time() - max_age_seconds
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM jobs WHERE updated_at < ?", (limit,))
+        return cursor.rowcount
+
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Store configuré (config.JOB_STORE_BACKEND: "memory" ou "sqlite")"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if JOB_STORE_BACKEND == 'sqlite':
+                _store = SQLiteJobStore(JOB_STORE_PATH)
+            elif JOB_STORE_BACKEND == 'memory':
+                _store = InMemoryJobStore()
+            else:
+                raise ValueError(f"JOB_STORE_BACKEND invalide: {JOB_STORE_BACKEND}")
+        return _store
+
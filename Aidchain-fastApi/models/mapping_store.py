@@ -0,0 +1,338 @@
+"""
+Stores de correspondances pseudonymes (valeur originale → remplacement)
+
+Remplace le dict global _mapping_cache: un store par portée (job ou tenant),
+borné (LRU en nombre d'entrées et en octets), optionnellement adossé à SQLite
+pour garder des pseudonymes cohérents entre versions d'un dataset sans tout
+conserver en RAM.
+"""
+import json
+import re
+import sqlite3
+import sys
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import (
+    MAPPING_STORE_BACKEND,
+    MAPPING_STORE_DIR,
+    MAPPING_STORE_MAX_ENTRIES,
+    MAPPING_STORE_MAX_MB,
+    MAPPING_STORE_MAX_SCOPES
+)
+
+SCOPE_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+PINNED_PREFIX = 'date_offset'  # Décalages de dates: jamais évincés (cohérence entre chunks)
+
+
+class MappingStore(ABC):
+    """Interface commune"""
+
+    def __init__(self):
+        # Store hors registre: portée propre, jamais partagée (décalage de dates inclus)
+        self.scope = f"anonymous-{uuid.uuid4().hex}"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any):
+        ...
+
+    def get_or_create(self, key: str, generate: Callable[[], Any]) -> Any:
+        """Pseudonyme cohérent: même clé → même valeur"""
+        value = self.get(key)
+        if value is None:
+            value = generate()
+            self.set(key, value)
+        return value
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        ...
+
+    def close(self):
+        pass
+
+
+class LRUMappingStore(MappingStore):
+    """
+    Store mémoire borné
+
+    - cache=True (façade d'un store durable): éviction LRU au-delà de
+      max_entries ou max_bytes, les entrées évincées restent sur disque
+    - cache=False (seule copie des correspondances): jamais d'éviction, une
+      entrée perdue donnerait un autre pseudonyme à la même valeur; les
+      bornes ne servent qu'à prévenir
+    - Décalages de dates (clés 'date_offset...') épinglés hors LRU
+    """
+
+    def __init__(self, max_entries: int = MAPPING_STORE_MAX_ENTRIES,
+                 max_bytes: int = MAPPING_STORE_MAX_MB * 1024 * 1024, cache: bool = False):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache = cache
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._pinned: Dict[str, Any] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._warned = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _size(key: str, value: Any) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(value)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            return self._get(key)
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._set(key, value)
+
+    def get_or_create(self, key: str, generate: Callable[[], Any]) -> Any:
+        """Atomique: deux threads qui demandent la même clé obtiennent la même valeur"""
+        with self._lock:
+            value = self._get(key)
+            if value is None:
+                value = generate()
+                self._set(key, value)
+            return value
+
+    def _get(self, key: str) -> Optional[Any]:
+        value = self._pinned.get(key)
+        if value is None:
+            value = self._data.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def _set(self, key: str, value: Any):
+        if key.startswith(PINNED_PREFIX):
+            self._pinned[key] = value
+            return
+
+        if key in self._data:
+            self._bytes -= self._size(key, self._data[key])
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._bytes += self._size(key, value)
+
+        over = len(self._data) > self.max_entries or self._bytes > self.max_bytes
+        if over and not self.cache:
+            if not self._warned:
+                print(f"⚠️ Portée {self.scope}: plus de {self.max_entries} correspondances en mémoire "
+                      f"(MAPPING_STORE_BACKEND='sqlite' pour les garder sur disque)")
+                self._warned = True
+            return
+
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            old_key, old_value = self._data.popitem(last=False)
+            self._bytes -= self._size(old_key, old_value)
+            self._evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'entries': len(self._data) + len(self._pinned),
+                'pinned': len(self._pinned),
+                'bytes': self._bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions
+            }
+
+
+class SQLiteMappingStore(MappingStore):
+    """Store sur disque (un fichier par portée) avec un LRU mémoire en façade"""
+
+    def __init__(self, path: Path, cache: Optional[LRUMappingStore] = None):
+        super().__init__()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._cache = cache or LRUMappingStore(cache=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS mappings (key TEXT PRIMARY KEY, value TEXT)")
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._cache.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM mappings WHERE key = ?", (key,)).fetchone()
+
+        if row is None:
+            return None
+
+        value = json.loads(row[0])
+        self._cache.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mappings (key, value) VALUES (?, ?)",
+                (key, json.dumps(value, ensure_ascii=False))
+            )
+        self._cache.set(key, value)
+
+    def get_or_create(self, key: str, generate: Callable[[], Any]) -> Any:
+        """
+        Atomique entre threads (verrou) et entre process (INSERT OR IGNORE:
+        la première valeur écrite sur disque gagne et est relue)
+        """
+        value = self._cache.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM mappings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO mappings (key, value) VALUES (?, ?)",
+                    (key, json.dumps(generate(), ensure_ascii=False))
+                )
+                row = self._conn.execute("SELECT value FROM mappings WHERE key = ?", (key,)).fetchone()
+
+        value = json.loads(row[0])
+        self._cache.set(key, value)
+        return value
+
+    def stats(self) -> Dict:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM mappings").fetchone()
+        return {
+            **self._cache.stats(),
+            'backend': 'sqlite',
+            'disk_entries': entries,
+            'disk_bytes': self.path.stat().st_size if self.path.exists() else 0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class MappingStoreRegistry:
+    """
+    🗂️ UN STORE PAR PORTÉE (job ou tenant)
+
+    - Portées éphémères (job): store mémoire, libéré en fin de job
+    - Portées persistantes (tenant/dataset): backend configuré (memory ou sqlite)
+    - Au-delà de MAPPING_STORE_MAX_SCOPES portées ouvertes, les moins récentes
+      sont fermées si elles sont inactives et sur disque (rouvertes à la
+      demande); une portée utilisée par un job ou gardée en mémoire seule
+      n'est jamais fermée (ses correspondances seraient perdues)
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, '_initialized'):
+            return
+
+        self._stores: "OrderedDict[str, MappingStore]" = OrderedDict()
+        self._active: Dict[str, int] = {}  # Jobs en cours par portée
+        self._lock = threading.Lock()
+        self._initialized = True
+
+    @staticmethod
+    def validate_scope(scope: str) -> str:
+        if not SCOPE_PATTERN.match(scope):
+            raise ValueError(f"Portée invalide: {scope!r} (lettres, chiffres, '_', '.', '-', 64 max)")
+        return scope
+
+    @contextmanager
+    def use(self, scope: str, persistent: bool = False) -> Iterator[MappingStore]:
+        """
+        Store de la portée pour la durée d'un job (jamais fermé pendant ce temps)
+
+        Portée éphémère: libérée à la sortie si aucun autre job ne l'utilise
+        """
+        store = self._open(scope, persistent)
+        try:
+            yield store
+        finally:
+            with self._lock:
+                self._active[scope] -= 1
+                idle = self._active[scope] == 0
+                if idle:
+                    del self._active[scope]
+            if idle and not persistent:
+                self.release(scope)
+
+    def _open(self, scope: str, persistent: bool = False) -> MappingStore:
+        """Store de la portée (créé si besoin), compté actif jusqu'à la sortie de use()"""
+        self.validate_scope(scope)
+
+        with self._lock:
+            store = self._stores.get(scope)
+
+            if store is None:
+                if persistent and MAPPING_STORE_BACKEND == 'sqlite':
+                    store = SQLiteMappingStore(Path(MAPPING_STORE_DIR) / f"{scope}.sqlite3")
+                else:
+                    store = LRUMappingStore()
+                store.scope = scope
+                self._stores[scope] = store
+
+            self._stores.move_to_end(scope)
+            self._active[scope] = self._active.get(scope, 0) + 1
+            closed = self._evict_idle()
+
+        for old in closed:
+            old.close()
+
+        return store
+
+    def _evict_idle(self) -> List[MappingStore]:
+        """Portées inactives sur disque, des moins récentes aux plus récentes, tant qu'on dépasse la borne"""
+        closed = []
+        excess = len(self._stores) - MAPPING_STORE_MAX_SCOPES
+
+        for scope, store in list(self._stores.items()):
+            if excess <= 0:
+                break
+            if self._active.get(scope) or not isinstance(store, SQLiteMappingStore):
+                continue
+            del self._stores[scope]
+            closed.append(store)
+            excess -= 1
+
+        return closed
+
+    def release(self, scope: str):
+        """Libère la portée (fin de job éphémère)"""
+        with self._lock:
+            if self._active.get(scope):
+                return
+            store = self._stores.pop(scope, None)
+        if store is not None:
+            store.close()
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            stores = dict(self._stores)
+        return {scope: store.stats() for scope, store in stores.items()}
@@ -0,0 +1,186 @@
+"""
+Registre des modèles: chargement paresseux, cache local, mode hors ligne
+
+- Chaque modèle est enregistré (clé, candidats, loader) sans être chargé:
+  torch / transformers / spaCy ne sont importés qu'au premier chargement
+- Les artefacts du hub sont résolus dans MODEL_CACHE_DIR; avec MODEL_OFFLINE
+  seul ce cache est lu (aucun accès réseau)
+- État par modèle (pending / loading / ready / failed), candidat et backend
+  retenus, repli éventuel, temps de chargement et erreurs: exposés par /health
+- Préchauffage au démarrage, bloquant ou en arrière-plan (MODEL_WARMUP)
+"""
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config import MODEL_CACHE_DIR, MODEL_OFFLINE
+
+# Fichiers inutiles à l'inférence PyTorch (poids TF / Flax / Rust, exports ONNX du hub)
+IGNORE_PATTERNS = ['*.h5', '*.msgpack', '*.ot', '*.tflite', 'onnx/*', 'tf_model*', 'flax_model*']
+
+
+@dataclass
+class Loaded:
+    """Retour de loader précisant le backend effectivement utilisé (repli ONNX → torch...)"""
+    model: Any
+    backend: str
+    fallback: Optional[str] = None  # Raison du repli hors du backend demandé
+
+
+@dataclass
+class ModelState:
+    key: str
+    candidates: List[str]
+    status: str = 'pending'  # pending | loading | ready | failed
+    model: Optional[str] = None  # Candidat effectivement chargé
+    backend: Optional[str] = None  # Backend demandé, remplacé par celui du loader s'il renvoie Loaded
+    required: bool = True  # Un modèle optionnel en échec ne dégrade pas l'état global
+    load_seconds: Optional[float] = None
+    fallback: Optional[str] = None  # Backend de repli chargé (et pourquoi), exposé par /health
+    errors: List[str] = field(default_factory=list)
+
+
+class ModelRegistry:
+    """
+    📦 REGISTRE DES MODÈLES (singleton)
+
+    Un modèle est chargé une seule fois, au premier get() ou au préchauffage;
+    les appels concurrents attendent le même chargement.
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        # Avant tout import de huggingface_hub / transformers
+        os.environ.setdefault('HF_HUB_CACHE', str(MODEL_CACHE_DIR))
+        if MODEL_OFFLINE:
+            os.environ['HF_HUB_OFFLINE'] = '1'
+            os.environ['TRANSFORMERS_OFFLINE'] = '1'
+
+        self._lock = threading.Lock()
+        self._loaders: Dict[str, Callable[[str], Any]] = {}
+        self._states: Dict[str, ModelState] = {}
+        self._models: Dict[str, Any] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._initialized = True
+
+    def register(self, key: str, candidates: List[str], loader: Callable[[str], Any],
+                 backend: Optional[str] = None, required: bool = True):
+        """Déclare un modèle: loader(candidat) est essayé sur chaque candidat, dans l'ordre"""
+        with self._lock:
+            if key in self._states:
+                return
+            self._loaders[key] = loader
+            self._states[key] = ModelState(key=key, candidates=list(candidates),
+                                           backend=backend, required=required)
+            self._key_locks[key] = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Modèle chargé (chargement au premier appel), None s'il n'a pas pu l'être"""
+        if key in self._models:
+            return self._models[key]
+
+        state = self._states.get(key)
+        if state is None:
+            return None
+
+        with self._key_locks[key]:
+            if state.status in ('pending', 'loading'):
+                self._load(key)
+
+        return self._models.get(key)
+
+    def _load(self, key: str):
+        state = self._states[key]
+        state.status = 'loading'
+        state.errors = []
+        state.fallback = None
+        started = time.time()
+
+        for candidate in state.candidates:
+            try:
+                model = self._loaders[key](candidate)
+            except Exception as e:
+                state.errors.append(f"{candidate}: {e}")
+                print(f"⚠️ {key}: {candidate} non chargé ({e})")
+                continue
+
+            if isinstance(model, Loaded):
+                model, state.backend, state.fallback = model.model, model.backend, model.fallback
+
+            state.load_seconds = round(time.time() - started, 2)
+            state.model = candidate
+            state.status = 'ready'
+            self._models[key] = model
+            print(f"✅ {key}: {state.backend}:{candidate} ({state.load_seconds}s)")
+            return
+
+        state.load_seconds = round(time.time() - started, 2)
+        state.status = 'failed'
+        print(f"❌ {key}: aucun modèle chargé")
+
+    def resolve(self, model_name: str) -> str:
+        """
+        Dossier local d'un modèle du hub (téléchargé une fois dans MODEL_CACHE_DIR)
+
+        Un chemin local existant est renvoyé tel quel. Hors ligne, un modèle
+        absent du cache lève une erreur au lieu de tenter le réseau.
+        """
+        if Path(model_name).exists():
+            return model_name
+
+        from huggingface_hub import snapshot_download
+
+        try:
+            return snapshot_download(model_name, cache_dir=MODEL_CACHE_DIR,
+                                     local_files_only=MODEL_OFFLINE, ignore_patterns=IGNORE_PATTERNS)
+        except Exception as e:
+            if MODEL_OFFLINE:
+                raise RuntimeError(f"absent du cache local {MODEL_CACHE_DIR} (mode hors ligne)") from e
+            raise
+
+    def model_id(self, key: str) -> Optional[str]:
+        """Identifiant du modèle chargé pour une clé (backend:candidat), None s'il ne l'est pas"""
+        state = self._states.get(key)
+        if state is None or state.status != 'ready':
+            return None
+        return f"{state.backend}:{state.model}"
+
+    def warm_up(self, keys: Optional[List[str]] = None, background: bool = False) -> Optional[threading.Thread]:
+        """Charge les modèles d'avance (dans un thread si background)"""
+        keys = list(self._states) if keys is None else keys
+
+        def run():
+            started = time.time()
+            for key in keys:
+                self.get(key)
+            print(f"🔥 Modèles préchauffés ({time.time() - started:.1f}s)")
+
+        if not background:
+            run()
+            return None
+
+        thread = threading.Thread(target=run, name='aidchain-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def ready(self) -> bool:
+        """Tous les modèles requis sont chargés"""
+        return bool(self._states) and all(
+            s.status == 'ready' for s in self._states.values() if s.required
+        )
+
+    def status(self) -> Dict[str, Dict]:
+        return {key: asdict(state) for key, state in self._states.items()}
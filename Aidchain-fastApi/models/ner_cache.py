@@ -0,0 +1,172 @@
+"""
+Cache des résultats NER par valeur
+
+Les mêmes cellules reviennent sans cesse d'une colonne et d'un upload à
+l'autre (diagnostics, hôpitaux, villes): leurs entités sont gardées dans un
+LRU borné, clé = (modèle, texte normalisé). Seuls les textes absents du cache
+partent au modèle.
+
+Normalisation: espaces de début / fin retirés; les offsets des entités sont
+stockés relativement au texte normalisé et recalés à la lecture.
+
+Persistance optionnelle (NER_CACHE_PATH): les entrées calculées sont écrites
+dans un SQLite relu au démarrage suivant (et partagé entre workers).
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import NER_CACHE_ENABLED, NER_CACHE_MAX_ENTRIES, NER_CACHE_PATH
+
+Key = Tuple[str, str]  # (modèle, texte normalisé)
+
+
+def normalize(text: str) -> Tuple[str, int]:
+    """Texte normalisé et décalage de son premier caractère dans le texte d'origine"""
+    stripped = text.lstrip()
+    return stripped.rstrip(), len(text) - len(stripped)
+
+
+def shift(entities: List[Dict], offset: int) -> List[Dict]:
+    """Copies des entités, offsets décalés"""
+    if not offset:
+        return [dict(e) for e in entities]
+    return [
+        {**e, 'start': e['start'] + offset, 'end': e['end'] + offset} if e.get('start') is not None else dict(e)
+        for e in entities
+    ]
+
+
+class NERCache:
+    """LRU thread-safe des entités par (modèle, texte), avec compteurs hits / misses"""
+
+    def __init__(self, max_entries: int = NER_CACHE_MAX_ENTRIES, path: Optional[Path] = None):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Key, List[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._writes_since_trim = 0  # Écritures disque depuis la dernière purge
+
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ner_cache (
+                    model TEXT,
+                    text TEXT,
+                    entities TEXT,
+                    accessed_at REAL,
+                    PRIMARY KEY (model, text)
+                )
+                """
+            )
+
+    def get_many(self, keys: List[Key]) -> Dict[Key, List[Dict]]:
+        """Entrées présentes (mémoire, puis disque); compteurs mis à jour"""
+        found = {}
+        missing = []
+
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+                else:
+                    missing.append(key)
+
+        if missing and self._conn is not None:
+            for key, entities in self._load(missing).items():
+                found[key] = entities
+                self._remember(key, entities)
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        return found
+
+    def put_many(self, items: Dict[Key, List[Dict]]):
+        for key, entities in items.items():
+            self._remember(key, entities)
+
+        if self._conn is not None and items:
+            now = time.time()
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO ner_cache VALUES (?, ?, ?, ?)",
+                    [(model, text, json.dumps(entities), now) for (model, text), entities in items.items()]
+                )
+                self._writes_since_trim += len(items)
+                if self._writes_since_trim > self.max_entries // 10:
+                    self._trim_disk()
+                    self._writes_since_trim = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM ner_cache")
+
+    def _remember(self, key: Key, entities: List[Dict]):
+        with self._lock:
+            self._entries[key] = entities
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, keys: List[Key]) -> Dict[Key, List[Dict]]:
+        found = {}
+        with self._lock:
+            for model, text in keys:
+                row = self._conn.execute(
+                    "SELECT entities FROM ner_cache WHERE model = ? AND text = ?", (model, text)
+                ).fetchone()
+                if row is not None:
+                    found[(model, text)] = json.loads(row[0])
+        return found
+
+    def _trim_disk(self):
+        # Même borne que la mémoire: les entrées les moins récemment écrites partent
+        self._conn.execute(
+            """
+            DELETE FROM ner_cache WHERE rowid IN (
+                SELECT rowid FROM ner_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,)
+        )
+
+
+_cache: Optional[NERCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_ner_cache() -> Optional[NERCache]:
+    """Cache NER du process (None si NER_CACHE_ENABLED est désactivé)"""
+    global _cache
+    if not NER_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = NERCache(NER_CACHE_MAX_ENTRIES, NER_CACHE_PATH)
+        return _cache
@@ -0,0 +1,83 @@
+"""
+File NER partagée: regroupe les requêtes concurrentes en batches
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class NERBatchQueue:
+    """
+    🧵 UN SEUL THREAD PROPRIÉTAIRE DES MODÈLES
+
+    Les colonnes analysées en parallèle soumettent leurs textes; le thread
+    regroupe les requêtes en attente (jusqu'à max_batch textes ou max_wait
+    secondes) et fait une seule passe modèle. Le modèle n'est jamais dupliqué.
+    """
+
+    def __init__(self, run_batch: Callable[[List[str]], List[List[Dict]]],
+                 max_batch: int = 64, max_wait: float = 0.01):
+        self._run_batch = run_batch
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._requests: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, name='aidchain-ner', daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """Soumet des textes, le Future renvoie une liste d'entités par texte"""
+        future = Future()
+
+        if not texts:
+            future.set_result([])
+        else:
+            self._requests.put((list(texts), future))
+
+        return future
+
+    def _worker(self):
+        while True:
+            first = self._requests.get()
+            if first is None:
+                return
+
+            batch = [first]
+            size = len(first[0])
+            deadline = time.monotonic() + self._max_wait
+
+            # Regroupement des requêtes arrivées pendant la fenêtre
+            while size < self._max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._requests.put(None)
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+
+            try:
+                outputs = self._run_batch(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for request_texts, future in batch:
+                future.set_result(outputs[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+    def close(self, timeout: Optional[float] = None):
+        """Arrêt du thread après les requêtes déjà soumises (attente bornée par timeout)"""
+        self._requests.put(None)
+        if timeout != 0:
+            self._thread.join(timeout)
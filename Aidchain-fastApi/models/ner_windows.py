@@ -0,0 +1,113 @@
+"""
+NER sur textes longs: fenêtres glissantes au lieu d'une troncature
+
+- Découpage en fenêtres de tokens qui se recouvrent (taille = longueur max du
+  modèle), en caractères si aucun tokenizer n'est disponible (spaCy)
+- Pré-scan regex: une fenêtre sans majuscule, chiffre ni '@' ne contient
+  pratiquement jamais d'entité et n'est pas envoyée au modèle
+- Les entités vues dans plusieurs fenêtres (ou coupées par une frontière)
+  sont fusionnées, offsets exprimés dans le texte complet
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+PRESCAN_PATTERN = re.compile(r"[A-ZÀ-Ý]|\d|@")
+SPECIAL_TOKENS = 2  # [CLS] / [SEP] (ou <s> / </s>) ajoutés par le modèle
+
+Window = Tuple[int, str]  # (offset du premier caractère, texte de la fenêtre)
+
+
+def worth_scanning(window: str) -> bool:
+    """Pré-scan bon marché: la fenêtre peut-elle contenir une entité ?"""
+    return PRESCAN_PATTERN.search(window) is not None
+
+
+def _token_windows(text: str, tokenizer, max_tokens: int, stride: int) -> Optional[List[Window]]:
+    try:
+        offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)['offset_mapping']
+    except Exception:
+        # Tokenizer "slow" (pas d'offsets): repli en caractères
+        return None
+
+    if len(offsets) <= max_tokens:
+        return [(0, text)]
+
+    windows = []
+    step = max_tokens - min(stride, max_tokens // 2)  # Recouvrement ≤ une demi-fenêtre
+
+    for start in range(0, len(offsets), step):
+        stop = min(start + max_tokens, len(offsets))
+        begin, end = offsets[start][0], offsets[stop - 1][1]
+        windows.append((begin, text[begin:end]))
+        if stop == len(offsets):
+            break
+
+    return windows
+
+
+def _char_windows(text: str, max_chars: int, stride: int) -> List[Window]:
+    if len(text) <= max_chars:
+        return [(0, text)]
+
+    windows = []
+    stride = min(stride, max_chars // 2)
+    start = 0
+
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        # Coupe sur un espace pour ne pas trancher un mot
+        if end < len(text):
+            space = text.rfind(' ', start + stride + 1, end)
+            if space > 0:
+                end = space
+        windows.append((start, text[start:end]))
+        if end == len(text):
+            break
+        # Recouvrement: la fenêtre suivante repart stride caractères plus tôt, sur un début de mot
+        restart = text.find(' ', end - stride, end)
+        start = restart + 1 if restart >= 0 else end
+
+    return windows
+
+
+def split_windows(text: str, tokenizer=None, max_tokens: int = 510,
+                  stride: int = 64, max_chars: int = 2000) -> List[Window]:
+    """Fenêtres (offset, texte) couvrant tout le texte, avec recouvrement"""
+    if tokenizer is not None:
+        windows = _token_windows(text, tokenizer, max_tokens, stride)
+        if windows is not None:
+            return windows
+
+    return _char_windows(text, max_chars, stride * 4)
+
+
+def merge_entities(text: str, entities: List[Dict]) -> List[Dict]:
+    """
+    Fusionne les entités (offsets absolus) de fenêtres qui se recouvrent
+
+    Deux entités du même type qui se chevauchent ou se touchent deviennent
+    une seule (texte repris du texte complet, meilleure confiance)
+    """
+    positioned = sorted(
+        (e for e in entities if e.get('start') is not None),
+        key=lambda e: (e['type'], e['start'], -e['end'])
+    )
+    merged = []
+
+    for ent in positioned:
+        last = merged[-1] if merged else None
+        if last and last['type'] == ent['type'] and ent['start'] <= last['end']:
+            last['end'] = max(last['end'], ent['end'])
+            last['confidence'] = max(last['confidence'], ent['confidence'])
+            last['text'] = text[last['start']:last['end']].strip()
+        else:
+            merged.append({**ent, 'text': text[ent['start']:ent['end']].strip()})
+
+    # Entités sans offsets (modèle qui ne les fournit pas): dédoublonnées telles quelles
+    seen = set()
+    for ent in entities:
+        if ent.get('start') is None and (ent['type'], ent['text']) not in seen:
+            seen.add((ent['type'], ent['text']))
+            merged.append(ent)
+
+    return sorted(merged, key=lambda e: (e.get('start') is None, e.get('start') or 0))
@@ -0,0 +1,222 @@
+"""
+Backend NER ONNX Runtime (int8)
+
+Les modèles de token classification sont exportés une fois en ONNX puis
+quantifiés en int8 dynamique (poids int8, activations quantifiées à la
+volée): sur CPU, latence par batch et mémoire résidente bien plus faibles
+que les pipelines PyTorch fp32, sans torch à l'inférence.
+
+OnnxTokenClassifier s'appelle comme un pipeline HF "ner" avec
+aggregation_strategy="simple" et renvoie le même format d'entités
+(entity_group, word, score, start, end).
+
+Export (machine avec torch + onnx):
+    python -m models.onnx_ner                 # modèles de config.py
+    python -m models.onnx_ner <modèle HF> ...
+"""
+import json
+import shutil
+import sys
+import tempfile
+import time
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from config import NER_BATCH_SIZE, NER_GENERAL_MODELS, NER_MEDICAL_MODELS, ONNX_MODEL_DIR, ONNX_THREADS
+
+# onnxruntime / transformers importés au chargement d'un modèle seulement
+ONNX_AVAILABLE = find_spec('onnxruntime') is not None and find_spec('transformers') is not None
+
+MODEL_FILE = 'model.onnx'
+MAX_LENGTH = 512
+
+
+def model_dir(model_name: str) -> Path:
+    """Dossier de l'export d'un modèle HF (ex: Davlan/xlm-... → Davlan--xlm-...)"""
+    return ONNX_MODEL_DIR / model_name.replace('/', '--')
+
+
+# ================== EXPORT ==================
+
+
+def export_model(model_name: str, quantize: bool = True) -> Path:
+    """
+    Export ONNX (axes batch/séquence dynamiques) + quantification int8 dynamique
+
+    Le dossier produit contient model.onnx, le tokenizer et config.json (labels).
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForTokenClassification, AutoTokenizer
+
+    target = model_dir(model_name)
+    target.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForTokenClassification.from_pretrained(model_name).eval()
+
+    dummy = tokenizer(["Jean Dupont, diabète de type 2, suivi à Lyon."], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in dummy]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in [*input_names, 'logits']}
+
+    # fp32 dans un dossier temporaire (poids externes possibles au-delà de 2 Go)
+    with tempfile.TemporaryDirectory() as tmp:
+        fp32_path = Path(tmp) / MODEL_FILE
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model, tuple(dummy[name] for name in input_names), str(fp32_path),
+                input_names=input_names, output_names=['logits'],
+                dynamic_axes=dynamic_axes, opset_version=14
+            )
+
+        if quantize:
+            quantize_dynamic(str(fp32_path), str(target / MODEL_FILE), weight_type=QuantType.QInt8,
+                             use_external_data_format=fp32_path.stat().st_size > 2 * 1024 ** 3)
+        else:
+            for path in Path(tmp).iterdir():
+                shutil.move(str(path), target / path.name)
+
+    tokenizer.save_pretrained(target)
+    model.config.save_pretrained(target)
+
+    return target
+
+
+# ================== INFÉRENCE ==================
+
+
+class OnnxTokenClassifier:
+    """Équivalent ONNX Runtime d'un pipeline HF "ner" (aggregation simple)"""
+
+    def __init__(self, path: Path, threads: int = ONNX_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.path = Path(path)
+        self.tokenizer = AutoTokenizer.from_pretrained(self.path)
+
+        with open(self.path / 'config.json', encoding='utf-8') as f:
+            self.id2label = {int(k): v for k, v in json.load(f)['id2label'].items()}
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(str(self.path / MODEL_FILE), options,
+                                            providers=['CPUExecutionProvider'])
+        self._input_names = [i.name for i in self.session.get_inputs()]
+        self.max_length = min(self.tokenizer.model_max_length, MAX_LENGTH)
+
+    def __call__(self, inputs: Union[str, List[str]],
+                 batch_size: int = NER_BATCH_SIZE) -> Union[List[Dict], List[List[Dict]]]:
+        single = isinstance(inputs, str)
+        texts = [inputs] if single else list(inputs)
+
+        # Textes triés par longueur: moins de padding dans chaque batch
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        outputs: List[Optional[List[Dict]]] = [None] * len(texts)
+
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            for i, ents in zip(indices, self._predict([texts[i] for i in indices])):
+                outputs[i] = ents
+
+        return outputs[0] if single else outputs
+
+    def _predict(self, texts: List[str]) -> List[List[Dict]]:
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length,
+            return_offsets_mapping=True, return_special_tokens_mask=True, return_tensors='np'
+        )
+        feeds = {name: encoded[name].astype(np.int64) for name in self._input_names}
+        logits = self.session.run(None, feeds)[0]
+
+        # Softmax stable
+        scores = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        scores /= scores.sum(axis=-1, keepdims=True)
+
+        ignored = (encoded['special_tokens_mask'] == 1) | (encoded['attention_mask'] == 0)
+
+        return [
+            self._aggregate(text, scores[i], encoded['offset_mapping'][i], ignored[i])
+            for i, text in enumerate(texts)
+        ]
+
+    def _aggregate(self, text: str, scores: np.ndarray, offsets: np.ndarray,
+                   ignored: np.ndarray) -> List[Dict]:
+        """
+        Regroupement "simple" des tokens (comme HF): tokens consécutifs du même
+        type fusionnés, un B- ouvre une nouvelle entité, 'O' sépare
+        """
+        label_ids = scores.argmax(axis=-1)
+        entities = []
+        current = None
+
+        def flush():
+            if current is not None:
+                start, end = current['start'], current['end']
+                entities.append({
+                    'entity_group': current['tag'],
+                    'score': float(np.mean(current['scores'])),
+                    'word': text[start:end],
+                    'start': start,
+                    'end': end
+                })
+
+        for k, label_id in enumerate(label_ids):
+            if ignored[k]:
+                continue
+
+            label = self.id2label[int(label_id)]
+            start, end = int(offsets[k][0]), int(offsets[k][1])
+
+            if label == 'O':
+                flush()
+                current = None
+                continue
+
+            if label[:2] in ('B-', 'I-'):
+                bi, tag = label[0], label[2:]
+            else:
+                bi, tag = 'I', label
+
+            if current is not None and current['tag'] == tag and bi != 'B':
+                current['end'] = end
+                current['scores'].append(scores[k, label_id])
+            else:
+                flush()
+                current = {'tag': tag, 'start': start, 'end': end, 'scores': [scores[k, label_id]]}
+
+        flush()
+        return entities
+
+
+def load_onnx_ner(model_name: str) -> Optional[OnnxTokenClassifier]:
+    """Runner ONNX d'un modèle exporté, None si onnxruntime ou l'export manque"""
+    if not ONNX_AVAILABLE:
+        print("⚠️ onnxruntime indisponible (pip install onnxruntime)")
+        return None
+
+    path = model_dir(model_name)
+    if not (path / MODEL_FILE).exists():
+        print(f"⚠️ {model_name}: pas d'export ONNX ({path}), lancer python -m models.onnx_ner")
+        return None
+
+    return OnnxTokenClassifier(path)
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or [*NER_MEDICAL_MODELS, *NER_GENERAL_MODELS]
+
+    for name in names:
+        started = time.time()
+        try:
+            path = export_model(name)
+            print(f"✅ {name} → {path} ({time.time() - started:.1f}s)")
+        except Exception as e:
+            print(f"❌ {name}: {e}")
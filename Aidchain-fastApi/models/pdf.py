@@ -0,0 +1,159 @@
+"""
+PDF page par page
+
+- Extraction parallèle par plages de pages (pool de process du parent,
+  séquentielle dans un worker du pool de pipelines); un PDF en mémoire est
+  écrit une fois dans TEMP_DIR et les tâches reçoivent son chemin
+- Chaque page découpée en paragraphes ≤ PDF_CHUNK_CHARS: une ligne par
+  paragraphe (colonnes 'page', 'text'), tout le document passe au NER
+- Export texte écrit page par page, paragraphes séparés par une ligne vide
+"""
+import io
+import multiprocessing
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import pandas as pd
+
+from config import PDF_CHUNK_CHARS, PDF_PAGES_PER_TASK, PDF_PARALLEL_MIN_PAGES, PDF_WORKERS, TEMP_DIR
+
+from .executor import in_worker_process
+
+PdfSource = Union[str, bytes]
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+CONTINUED_ATTR = 'continued_rows'  # df.attrs: lignes qui prolongent le paragraphe de la précédente
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _open(source: PdfSource):
+    try:
+        import pdfplumber
+    except:
+        raise ImportError("pip install pdfplumber requis")
+
+    return pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def _extract_range(source: PdfSource, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Texte des pages [start, stop) (exécuté dans un worker)"""
+    with _open(source) as pdf:
+        return [(number, pdf.pages[number].extract_text() or '') for number in range(start, stop)]
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def shutdown_pool(wait: bool = True):
+    """Arrêt du pool d'extraction (recréé au prochain PDF)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def extract_pages(source: PdfSource) -> List[Tuple[int, str]]:
+    """(numéro de page, texte) pour toutes les pages, dans l'ordre"""
+    with _open(source) as pdf:
+        page_count = len(pdf.pages)
+
+    # Dans un worker du pool de pipelines: séquentiel (pas de pool spawn imbriqué)
+    if page_count < PDF_PARALLEL_MIN_PAGES or PDF_WORKERS <= 1 or in_worker_process():
+        return _extract_range(source, 0, page_count)
+
+    print(f"📄 PDF: {page_count} pages, extraction sur {PDF_WORKERS} process")
+
+    if not isinstance(source, bytes):
+        return _extract_parallel(source, page_count)
+
+    # Octets écrits une fois: chaque tâche rouvre le fichier au lieu de recevoir tout le PDF picklé
+    with tempfile.NamedTemporaryFile(dir=TEMP_DIR, prefix='pdf_', suffix='.pdf', delete=False) as f:
+        f.write(source)
+    try:
+        return _extract_parallel(f.name, page_count)
+    finally:
+        Path(f.name).unlink(missing_ok=True)
+
+
+def _extract_parallel(path: str, page_count: int) -> List[Tuple[int, str]]:
+    ranges = [(start, min(start + PDF_PAGES_PER_TASK, page_count))
+              for start in range(0, page_count, PDF_PAGES_PER_TASK)]
+
+    pool = _get_pool()
+    futures = [pool.submit(_extract_range, path, start, stop) for start, stop in ranges]
+
+    return [page for future in futures for page in future.result()]
+
+
+def _split_lines(paragraph: str, max_chars: int) -> List[str]:
+    """Paragraphe regroupé par lignes en morceaux ≤ max_chars"""
+    chunks = []
+    current = ''
+    for line in paragraph.split('\n'):
+        if current and len(current) + 1 + len(line) > max_chars:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def split_paragraphs(text: str, max_chars: int = PDF_CHUNK_CHARS) -> List[str]:
+    """Paragraphes (lignes vides) regroupés par lignes jusqu'à max_chars"""
+    return [chunk for paragraph in PARAGRAPH_BREAK.split(text) for chunk in _split_lines(paragraph, max_chars)]
+
+
+def read_pdf(source) -> pd.DataFrame:
+    """
+    Une ligne par paragraphe: colonnes 'page' (1-based) et 'text'
+
+    Les morceaux d'un paragraphe trop long sont repérés dans
+    df.attrs[CONTINUED_ATTR] pour que l'export remette les lignes vides
+    entre paragraphes seulement
+    """
+    if hasattr(source, 'read'):
+        source = source.read()
+
+    pages, texts, continued = [], [], []
+
+    for number, text in extract_pages(source):
+        for paragraph in PARAGRAPH_BREAK.split(text):
+            for i, chunk in enumerate(_split_lines(paragraph, PDF_CHUNK_CHARS)):
+                if i:
+                    continued.append(len(texts))
+                pages.append(number + 1)
+                texts.append(chunk)
+
+    df = pd.DataFrame({'page': pages, 'text': texts})
+    df.attrs[CONTINUED_ATTR] = continued
+    return df
+
+
+def write_pages(df: pd.DataFrame, path: Path):
+    """
+    Texte anonymisé écrit page par page: pages séparées par un saut de
+    ligne, paragraphes par une ligne vide
+    """
+    continued = set(df.attrs.get(CONTINUED_ATTR, []))
+
+    with open(path, 'w', encoding='utf-8') as f:
+        previous = None
+        for row, (page, text) in enumerate(zip(df['page'], df['text'].astype(str))):
+            if previous is not None:
+                f.write('\n' if page != previous or row in continued else '\n\n')
+            f.write(text)
+            previous = page
@@ -4,65 +4,165 @@ warnings.filterwarnings('ignore')
 
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Tuple
+from typing import BinaryIO, Callable, Dict, Optional, Tuple, Union
 import pandas as pd
+import pyarrow as pa
+import io
 import json
+import uuid
 
+from config import BATCH_SIZE, ENABLE_STREAMING, STREAMING_SAMPLE_CHUNKS, STREAMING_THRESHOLD_MB
+
+from .columnar import (
+    COLUMNAR_FORMATS,
+    ColumnarWriter,
+    DataFrameWriter,
+    iter_tables,
+    num_rows,
+    read_columnar,
+    to_arrow,
+    write_columnar
+)
+from .csv_dialect import name_columns, read_csv, read_options, read_sample, sniff_csv, validate_encoding
 from .detector import UltraProDetector
+from .excel import WorkbookWriter, read_workbook, stack_sheets, write_workbook
+from .pdf import read_pdf, write_pages
+from . import artifacts
 from .anonymizer import UltraProAnonymizer
+from .datasets import (
+    APPENDABLE_FORMATS,
+    DURABLE_MAPPINGS_REQUIRED,
+    DatasetConflictError,
+    DatasetRecord,
+    classification,
+    durable_mappings,
+    get_dataset_store
+)
+from .mapping_store import MappingStoreRegistry
+from .upload import UploadedFile
+
+# Source d'un loader: chemin sur disque ou flux binaire (upload gardé en mémoire)
+Source = Union[str, BinaryIO]
+
+
+class CsvWriter:
+    """Export CSV par chunks (en-tête écrit avec le premier)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._started = False
+
+    def write(self, df: pd.DataFrame):
+        df.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started,
+                  index=False, encoding='utf-8')
+        self._started = True
+
+    def close(self):
+        if not self._started:
+            self.path.touch()
 
 
 class FileLoader:
     """Chargeur universel de fichiers"""
     
     @staticmethod
-    def load(file_path: str) -> Tuple[pd.DataFrame, str]:
-        """Charge un fichier et retourne (DataFrame, format)"""
-        path = Path(file_path)
-        
-        if not path.exists():
-            raise FileNotFoundError(f"Fichier introuvable: {file_path}")
+    def load(file_path: Union[str, UploadedFile]) -> Tuple[pd.DataFrame, str]:
+        """
+        Charge un fichier et retourne (DataFrame, format)
         
-        ext = path.suffix.lower()
+        Args:
+            file_path: chemin, ou UploadedFile (lu depuis son buffer mémoire
+                ou son fichier temporaire, sans copie intermédiaire)
+        """
+        if isinstance(file_path, UploadedFile):
+            ext = file_path.suffix
+            source = file_path.open() if file_path.in_memory else str(file_path.path)
+        else:
+            path = Path(file_path)
+            
+            if not path.exists():
+                raise FileNotFoundError(f"Fichier introuvable: {file_path}")
+            
+            ext = path.suffix.lower()
+            source = str(path)
         
         loaders = {
             '.csv': FileLoader._csv,
             '.xlsx': FileLoader._excel,
-            '.xls': FileLoader._excel,
+            '.xls': FileLoader._xls,
             '.json': FileLoader._json,
             '.txt': FileLoader._txt,
             '.pdf': FileLoader._pdf,
+            '.parquet': FileLoader._parquet,
+            '.feather': FileLoader._feather,
+            '.arrow': FileLoader._feather,
         }
         
         if ext in loaders:
-            df = loaders[ext](file_path)
+            df = loaders[ext](source)
             return df, ext
         
         raise ValueError(f"Format {ext} non supporté")
     
     @staticmethod
-    def _csv(path: str) -> pd.DataFrame:
-        for enc in ['utf-8', 'latin1', 'cp1252']:
-            for sep in [',', ';', '\t']:
-                try:
-                    return pd.read_csv(path, sep=sep, encoding=enc)
-                except:
-                    continue
-        raise ValueError("CSV non lisible")
+    def _text(source: Source):
+        """Flux texte UTF-8 sur un chemin ou un flux binaire"""
+        if isinstance(source, str):
+            return open(source, 'r', encoding='utf-8')
+        return io.TextIOWrapper(source, encoding='utf-8')
+    
+    @staticmethod
+    def _csv(source: Source) -> pd.DataFrame:
+        """Dialecte détecté sur les premiers Ko, puis un seul parse"""
+        dialect = FileLoader.csv_dialect(source)
+        df = read_csv(source, dialect)
+        df.attrs['dialect'] = dialect
+        return df
     
     @staticmethod
-    def _excel(path: str) -> pd.DataFrame:
-        return pd.read_excel(path)
+    def csv_dialect(source: Source) -> Dict:
+        """Encodage, séparateur, guillemets et en-tête du CSV"""
+        sample = read_sample(source)
+        dialect = sniff_csv(sample)
+        
+        # Encodage vérifié jusqu'au bout (read_csv n'a plus à le refaire en cas d'erreur)
+        encoding = validate_encoding(source, dialect['encoding'])
+        if encoding != dialect['encoding']:
+            print(f"⚠️ CSV: {dialect['encoding']} invalide au-delà de l'échantillon, lecture en {encoding}")
+            dialect['encoding'] = encoding
+        dialect['encoding_validated'] = True
+        
+        print(f"🧾 CSV: {dialect['encoding']}, séparateur {dialect['delimiter']!r}, "
+              f"en-tête {'oui' if dialect['has_header'] else 'non'}")
+        return dialect
     
     @staticmethod
-    def _json(path: str) -> pd.DataFrame:
-        with open(path, 'r', encoding='utf-8') as f:
+    def _excel(source: Source) -> pd.DataFrame:
+        """Toutes les feuilles, lues ligne par ligne (openpyxl read-only)"""
+        return read_workbook(source, '.xlsx')
+    
+    @staticmethod
+    def _xls(source: Source) -> pd.DataFrame:
+        return read_workbook(source, '.xls')
+    
+    @staticmethod
+    def _parquet(source: Source) -> pd.DataFrame:
+        return read_columnar(source, '.parquet')
+    
+    @staticmethod
+    def _feather(source: Source) -> pd.DataFrame:
+        """Feather v2 = Arrow IPC (fichier)"""
+        return read_columnar(source, '.feather')
+    
+    @staticmethod
+    def _json(source: Source) -> pd.DataFrame:
+        with FileLoader._text(source) as f:
             data = json.load(f)
         return pd.DataFrame(data if isinstance(data, list) else [data])
     
     @staticmethod
-    def _txt(path: str) -> pd.DataFrame:
-        with open(path, 'r', encoding='utf-8') as f:
+    def _txt(source: Source) -> pd.DataFrame:
+        with FileLoader._text(source) as f:
             content = f.read()
         
         try:
@@ -81,22 +181,9 @@ class FileLoader:
         return pd.DataFrame({'text': lines})
     
     @staticmethod
-    def _pdf(path: str) -> pd.DataFrame:
-        """Charge PDF en mode texte complet"""
-        try:
-            import pdfplumber
-        except:
-            raise ImportError("pip install pdfplumber requis")
-        
-        full_text = []
-        
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                if text := page.extract_text():
-                    full_text.append(text)
-        
-        combined_text = '\n'.join(full_text)
-        return pd.DataFrame({'full_text': [combined_text]})
+    def _pdf(source: Source) -> pd.DataFrame:
+        """PDF → une ligne par paragraphe (colonnes 'page', 'text'), pages extraites en parallèle"""
+        return read_pdf(source)
 
 
 class AidChainPipeline:
@@ -118,16 +205,37 @@ class AidChainPipeline:
         self.detector = UltraProDetector()
         self.anonymizer = UltraProAnonymizer()
         self.loader = FileLoader()
+        self.mappings = MappingStoreRegistry()
         
         self.output_dir = Path("anonymized")
         self.output_dir.mkdir(exist_ok=True)
         
         self._initialized = True
     
-    def process(self, file_path: str) -> Dict:
+    def process(self, file_path: Union[str, UploadedFile],
+                progress: Optional[Callable[[str, float, int], None]] = None,
+                scope: Optional[str] = None,
+                output_format: Optional[str] = None,
+                incremental: bool = False,
+                dataset_id: Optional[str] = None,
+                contains_previous: bool = False) -> Dict:
         """
         Pipeline complet
         
+        Args:
+            file_path: chemin, ou UploadedFile reçu par l'API (buffer ou fichier temporaire)
+            progress: callback optionnel (étape, pourcentage, lignes traitées)
+            scope: portée des pseudonymes (tenant/dataset). Absente → portée
+                éphémère propre au job, libérée à la fin
+            output_format: format de sortie des fichiers tabulaires ('xlsx',
+                'csv', 'parquet'); par défaut celui du fichier source (CSV pour
+                le streaming CSV), y compris en streaming
+            incremental: enregistre un dataset (classification + portée
+                persistante) pour les ajouts suivants; 'dataset_id' dans le résultat
+            dataset_id: ajout de lignes à un dataset existant (voir append)
+            contains_previous: avec dataset_id, le fichier contient aussi les
+                lignes déjà traitées (seules les suivantes sont anonymisées)
+        
         Returns:
             {
                 'detection': {...},
@@ -137,18 +245,198 @@ class AidChainPipeline:
                 'sensitive_columns': [...],  # ← CLÉ AJOUTÉE
                 'update_example': str
             }
+            
+            Gros CSV (streaming): original_df / anonymized_df ne contiennent
+            que l'échantillon de détection / le premier chunk anonymisé
         """
-        # 1. Chargement
-        df_original, source_format = self.loader.load(file_path)
+        report = progress or (lambda stage, percent, rows: None)
+        
+        if dataset_id is not None:
+            return self.append(file_path, dataset_id, report, output_format, contains_previous)
+        
+        name = file_path.filename if isinstance(file_path, UploadedFile) else str(file_path)
+        if incremental:
+            if Path(name).suffix.lower() not in APPENDABLE_FORMATS:
+                raise ValueError(f"Mode incrémental réservé aux formats tabulaires {sorted(APPENDABLE_FORMATS)}")
+            if not durable_mappings():
+                raise ValueError(DURABLE_MAPPINGS_REQUIRED)
+            # Les ajouts suivants réutilisent la portée: elle doit survivre au job
+            dataset_id = get_dataset_store().new_id()
+            scope = scope or f"dataset-{dataset_id}"
+        
+        persistent = scope is not None
+        scope = scope if persistent else f"job-{uuid.uuid4().hex}"
+        with self.mappings.use(scope, persistent=persistent) as store:
+            result = self._process(file_path, report, store, output_format)
+        
+        # Stockage compressé éventuel (output_path reste le nom logique)
+        artifacts.store(result['output_path'])
+        
+        if incremental:
+            detection = result['detection']
+            get_dataset_store().create(
+                dataset_id, scope, name, detection['format'], list(detection['columns']),
+                classification(detection), detection['shape'][0]
+            )
+            result['dataset_id'] = dataset_id
+        
+        return result
+    
+    def append(self, file_path: Union[str, UploadedFile], dataset_id: str,
+               report: Callable[[str, float, int], None],
+               output_format: Optional[str] = None, contains_previous: bool = False) -> Dict:
+        """
+        Ajout de lignes à un dataset incrémental
+        
+        Pas de détection: la classification et la portée enregistrées sont
+        réutilisées, seules les nouvelles lignes sont anonymisées et exportées
+        (le fichier produit ne contient que le delta).
+        
+        Raises:
+            KeyError: dataset inconnu
+            ValueError: colonnes différentes de celles du dataset
+        """
+        dataset = get_dataset_store().get(dataset_id)
+        if dataset is None:
+            raise KeyError(f"Dataset '{dataset_id}' introuvable")
+        
+        name = file_path.filename if isinstance(file_path, UploadedFile) else str(file_path)
+        
+        # 1. Chargement des lignes ajoutées
+        report('loading', 0.0, 0)
+        df_new, source_format = self.loader.load(file_path)
+        
+        if contains_previous:
+            df_new = df_new.iloc[dataset.rows:]
+        
+        columns = [str(col) for col in df_new.columns]
+        if columns != dataset.columns:
+            raise ValueError(
+                f"Colonnes différentes de celles du dataset: {columns} (attendu: {dataset.columns})"
+            )
+        
+        first_row = dataset.rows
+        df_new = df_new.reset_index(drop=True)
+        
+        # 2. Anonymisation avec la classification enregistrée (10% → 90%)
+        report('anonymizing', 10.0, 0)
+        detection_results = self._dataset_detection(dataset, df_new, name, source_format)
+        with self.mappings.use(dataset.scope, persistent=True) as store:
+            df_anonymized = self.anonymizer.anonymize_dataframe(
+                df_new, detection_results,
+                progress=lambda done, total: report('anonymizing', 10.0 + 80.0 * done / total,
+                                                    len(df_new) * done // total),
+                store=store
+            )
+        
+        # 3. Export du delta seul
+        report('exporting', 90.0, len(df_new))
+        delta_name = f"{Path(dataset.original_filename).stem}_rows{first_row}-{first_row + len(df_new)}{source_format}"
+        output_path = self._export(df_anonymized, delta_name, source_format, output_format)
+        artifacts.store(output_path)
+        
+        # Un ajout concurrent a déjà avancé le compteur: ce delta n'est pas publié
+        try:
+            dataset = get_dataset_store().add_rows(dataset_id, len(df_new), expected_rows=first_row)
+        except DatasetConflictError:
+            artifacts.remove(output_path)
+            raise
+        print(f"➕ Dataset {dataset_id}: {len(df_new)} ligne(s) ajoutée(s), {dataset.rows} au total (v{dataset.version})")
+        
+        report('exporting', 100.0, len(df_new))
+        
+        return {
+            'detection': detection_results,
+            'original_df': df_new,
+            'anonymized_df': df_anonymized,
+            'output_path': str(output_path),
+            'sensitive_columns': dataset.sensitive_columns,
+            'update_example': self._generate_update_example(df_anonymized),
+            'dataset_id': dataset_id,
+            'first_row': first_row,
+            'dataset_rows': dataset.rows
+        }
+    
+    @staticmethod
+    def _dataset_detection(dataset: DatasetRecord, df: pd.DataFrame, file_path: str,
+                           source_format: str) -> Dict:
+        """Résultat de détection reconstruit depuis la classification du dataset"""
+        columns = {}
+        
+        for col, info in dataset.detection.items():
+            # Exemples de la réponse pris dans les lignes ajoutées
+            sample = df[col].dropna().astype(str).head(5).tolist() if col in df.columns else []
+            columns[col] = {**info, 'sample_values': sample}
+        
+        sensitive = len(dataset.sensitive_columns)
+        
+        return {
+            'file': file_path,
+            'format': source_format,
+            'shape': list(df.shape),
+            'columns': columns,
+            'summary': {
+                'total': len(columns),
+                'sensitive': sensitive,
+                'public': len(columns) - sensitive,
+                'fast_path': sum(1 for info in columns.values() if info['fast_path'])
+            },
+            'incremental': True
+        }
+    
+    @staticmethod
+    def _should_stream(file_path: Union[str, UploadedFile]) -> bool:
+        """Gros CSV sur disque → pipeline par chunks"""
+        if isinstance(file_path, UploadedFile):
+            if file_path.in_memory:
+                return False
+            suffix, size = file_path.suffix, file_path.size
+        else:
+            path = Path(file_path)
+            suffix, size = path.suffix.lower(), path.stat().st_size
+        
+        streamable = suffix == '.csv' or suffix in COLUMNAR_FORMATS
+        return ENABLE_STREAMING and streamable and size > STREAMING_THRESHOLD_MB * 1024 * 1024
+    
+    def _process(self, file_path: Union[str, UploadedFile],
+                 report: Callable[[str, float, int], None], store,
+                 output_format: Optional[str] = None) -> Dict:
+        """Étapes du pipeline avec le store de correspondances de la portée"""
+        if isinstance(file_path, UploadedFile):
+            name = file_path.filename
+            path = str(file_path.path) if file_path.path else None
+        else:
+            name = path = file_path
         
-        # 2. Détection
-        detection_results = self._detect(df_original, file_path, source_format)
+        if self._should_stream(file_path):
+            if Path(name).suffix.lower() in COLUMNAR_FORMATS:
+                return self._process_columnar_streaming(path, name, report, store, output_format)
+            return self._process_streaming(path, name, report, store, output_format)
         
-        # 3. Anonymisation
-        df_anonymized = self.anonymizer.anonymize_dataframe(df_original, detection_results)
+        # 1. Chargement
+        report('loading', 0.0, 0)
+        df_original, source_format = self.loader.load(file_path)
+        total_rows = len(df_original)
+        
+        # 2. Détection (10% → 50%)
+        report('detecting', 10.0, 0)
+        detection_results = self._detect(
+            df_original, name, source_format,
+            progress=lambda done, total: report('detecting', 10.0 + 40.0 * done / total, 0)
+        )
+        
+        # 3. Anonymisation (50% → 90%)
+        report('anonymizing', 50.0, 0)
+        df_anonymized = self.anonymizer.anonymize_dataframe(
+            df_original, detection_results,
+            progress=lambda done, total: report('anonymizing', 50.0 + 40.0 * done / total,
+                                                total_rows * done // total),
+            store=store
+        )
         
         # 4. Export
-        output_path = self._export(df_anonymized, file_path, source_format)
+        report('exporting', 90.0, total_rows)
+        output_path = self._export(df_anonymized, name, source_format, output_format)
         
         # 5. Générer exemple de mise à jour (5 premières lignes)
         update_example = self._generate_update_example(df_anonymized)
@@ -159,6 +447,8 @@ class AidChainPipeline:
             if col_info['is_sensitive']
         ]
         
+        report('exporting', 100.0, total_rows)
+        
         return {
             'detection': detection_results,
             'original_df': df_original,
@@ -168,7 +458,181 @@ class AidChainPipeline:
             'update_example': update_example
         }
     
-    def _detect(self, df: pd.DataFrame, file_path: str, source_format: str) -> Dict:
+    def _process_streaming(self, file_path: str, name: str,
+                           report: Callable[[str, float, int], None], store,
+                           output_format: Optional[str] = None) -> Dict:
+        """
+        CSV par chunks de BATCH_SIZE lignes: détection sur les premiers chunks,
+        puis chaque chunk est anonymisé et ajouté au fichier de sortie
+        
+        Args:
+            file_path: fichier lu (upload temporaire éventuellement)
+            name: nom d'origine (rapport de détection, nom de sortie)
+            output_format: format de sortie (csv par défaut), écrit lui aussi par chunks
+        """
+        print(f"🌊 Streaming CSV ({Path(file_path).stat().st_size / 1024 / 1024:.0f} MB, chunks de {BATCH_SIZE} lignes)")
+        
+        # 1. Échantillon de détection (premiers chunks)
+        report('loading', 0.0, 0)
+        dialect = {**self.loader.csv_dialect(file_path), 'engine': 'c'}
+        options = read_options(dialect)
+        sample_chunks = []
+        
+        for chunk in pd.read_csv(file_path, chunksize=BATCH_SIZE, **options):
+            sample_chunks.append(name_columns(chunk, dialect))
+            if len(sample_chunks) >= STREAMING_SAMPLE_CHUNKS:
+                break
+        
+        df_sample = pd.concat(sample_chunks, ignore_index=True)
+        df_sample.attrs['dialect'] = dialect
+        del sample_chunks
+        
+        # 2. Détection sur l'échantillon (10% → 30%)
+        report('detecting', 10.0, 0)
+        detection_results = self._detect(
+            df_sample, name, '.csv',
+            progress=lambda done, total: report('detecting', 10.0 + 20.0 * done / total, 0)
+        )
+        
+        # 3. Anonymisation + écriture chunk par chunk (30% → 95%)
+        report('anonymizing', 30.0, 0)
+        target = f".{output_format}" if output_format else '.csv'
+        output_file = self._output_file(name, target)
+        writer = self._chunk_writer(output_file, target)
+        file_size = max(Path(file_path).stat().st_size, 1)
+        total_rows = 0
+        df_head = None
+        
+        try:
+            with open(file_path, 'rb') as source:
+                for chunk in pd.read_csv(source, chunksize=BATCH_SIZE, **options):
+                    chunk = name_columns(chunk, dialect)
+                    anonymized = self.anonymizer.anonymize_dataframe(chunk, detection_results, store=store)
+                    writer.write(anonymized)
+                    
+                    # Seul le premier chunk est gardé (exemples de la réponse)
+                    if df_head is None:
+                        df_head = anonymized
+                    
+                    total_rows += len(chunk)
+                    report('anonymizing', 30.0 + 65.0 * min(source.tell() / file_size, 1.0), total_rows)
+        finally:
+            writer.close()
+        
+        detection_results['shape'] = [total_rows, df_sample.shape[1]]
+        detection_results['streamed'] = True
+        
+        sensitive_columns = [
+            col_name for col_name, col_info in detection_results['columns'].items()
+            if col_info['is_sensitive']
+        ]
+        
+        report('exporting', 100.0, total_rows)
+        
+        return {
+            'detection': detection_results,
+            'original_df': df_sample,
+            'anonymized_df': df_head,
+            'output_path': str(output_file),
+            'sensitive_columns': sensitive_columns,
+            'update_example': self._generate_update_example(df_head)
+        }
+    
+    def _process_columnar_streaming(self, file_path: str, name: str,
+                                    report: Callable[[str, float, int], None], store,
+                                    output_format: Optional[str] = None) -> Dict:
+        """
+        Parquet / Arrow IPC par row group: détection sur les premiers row groups,
+        puis seules les colonnes sensibles passent par pandas; les colonnes
+        publiques restent en Arrow (types et encodage conservés)
+        
+        Sortie CSV / Excel demandée (output_format): chaque row group anonymisé
+        est converti et écrit par chunks
+        """
+        source_format = Path(name).suffix.lower()
+        total = max(num_rows(file_path, source_format), 1)
+        print(f"🌊 Streaming {source_format} ({total} lignes, par row group)")
+        
+        # 1. Échantillon de détection (premiers row groups)
+        report('loading', 0.0, 0)
+        sample_tables = []
+        sample_rows = 0
+        
+        for table in iter_tables(file_path, source_format):
+            sample_tables.append(table)
+            sample_rows += table.num_rows
+            if sample_rows >= STREAMING_SAMPLE_CHUNKS * BATCH_SIZE:
+                break
+        
+        df_sample = pa.concat_tables(sample_tables).to_pandas()
+        del sample_tables
+        
+        # 2. Détection (10% → 30%)
+        report('detecting', 10.0, 0)
+        detection_results = self._detect(
+            df_sample, name, source_format,
+            progress=lambda done, total_cols: report('detecting', 10.0 + 20.0 * done / total_cols, 0)
+        )
+        
+        sensitive_columns = [
+            col_name for col_name, col_info in detection_results['columns'].items()
+            if col_info['is_sensitive']
+        ]
+        
+        # 3. Anonymisation par row group (30% → 95%): projection sur les colonnes sensibles
+        report('anonymizing', 30.0, 0)
+        target = f".{output_format}" if output_format else source_format
+        output_file = self._output_file(name, target)
+        # Parquet / Arrow → format colonnes: tables écrites telles quelles (types conservés)
+        frames = None if target in COLUMNAR_FORMATS else self._chunk_writer(output_file, target)
+        writer = None
+        total_rows = 0
+        df_head = None
+        
+        try:
+            for table in iter_tables(file_path, source_format):
+                if sensitive_columns:
+                    df_sensitive = table.select(sensitive_columns).to_pandas()
+                    anonymized = self.anonymizer.anonymize_dataframe(df_sensitive, detection_results, store=store)
+                    
+                    for col_name in sensitive_columns:
+                        index = table.schema.get_field_index(col_name)
+                        table = table.set_column(index, col_name, to_arrow(anonymized[col_name]))
+                
+                if df_head is None:
+                    df_head = table.slice(0, BATCH_SIZE).to_pandas()
+                
+                if frames is not None:
+                    frames.write(table.to_pandas())
+                else:
+                    if writer is None:
+                        writer = ColumnarWriter(output_file, target, table.schema)
+                    writer.write(table)
+                
+                total_rows += table.num_rows
+                report('anonymizing', 30.0 + 65.0 * min(total_rows / total, 1.0), total_rows)
+        finally:
+            if writer is not None:
+                writer.close()
+            if frames is not None:
+                frames.close()
+        
+        detection_results['shape'] = [total_rows, df_sample.shape[1]]
+        detection_results['streamed'] = True
+        
+        report('exporting', 100.0, total_rows)
+        
+        return {
+            'detection': detection_results,
+            'original_df': df_sample,
+            'anonymized_df': df_head,
+            'output_path': str(output_file),
+            'sensitive_columns': sensitive_columns,
+            'update_example': self._generate_update_example(df_head)
+        }
+    
+    def _detect(self, df: pd.DataFrame, file_path: str, source_format: str,
+                progress: Optional[Callable[[int, int], None]] = None) -> Dict:
         """Détection des colonnes sensibles"""
         
         detection_results = {
@@ -176,21 +640,33 @@ class AidChainPipeline:
             'format': source_format,
             'shape': list(df.shape),
             'columns': {},
-            'summary': {'total': len(df.columns), 'sensitive': 0, 'public': 0}
+            'summary': {'total': len(df.columns), 'sensitive': 0, 'public': 0, 'fast_path': 0}
         }
         
-        for col in df.columns:
-            det = self.detector.analyze_column(df, col)
-            
+        # CSV: dialecte détecté au chargement
+        if 'dialect' in df.attrs:
+            detection_results['summary']['dialect'] = dict(df.attrs['dialect'])
+        
+        # PDF: tous les paragraphes passent au NER (pas d'échantillon)
+        free_text = ['text'] if source_format == '.pdf' and 'text' in df.columns else []
+        
+        detections = self.detector.analyze_columns(df, progress=progress, full_coverage=free_text)
+        
+        for col, det in detections.items():
             detection_results['columns'][col] = {
                 'is_sensitive': det.is_sensitive,
                 'confidence': float(det.confidence),
                 'entity_types': det.entity_types,
                 'reasoning': det.reasoning,
                 'sample_values': det.sample_values,
-                'detected_entities': det.detected_entities
+                'detected_entities': det.detected_entities,
+                'fast_path': det.fast_path,
+                'free_text': col in free_text
             }
             
+            if det.fast_path:
+                detection_results['summary']['fast_path'] += 1
+            
             if det.is_sensitive:
                 detection_results['summary']['sensitive'] += 1
             else:
@@ -198,42 +674,72 @@ class AidChainPipeline:
         
         return detection_results
     
-    def _export(self, df: pd.DataFrame, original_path: str, source_format: str) -> Path:
-        """Export fichier anonymisé"""
-        
+    @staticmethod
+    def _chunk_writer(output_file: Path, target: str):
+        """Écriture par chunks de DataFrames (streaming) dans le format de sortie"""
+        if target == '.xlsx':
+            return WorkbookWriter(output_file)
+        if target in COLUMNAR_FORMATS:
+            return DataFrameWriter(output_file, target)
+        return CsvWriter(output_file)
+    
+    def _output_file(self, original_path: str, extension: str) -> Path:
+        """
+        Chemin de sortie unique: <nom>_anonymized_<timestamp>_<uuid8><extension>
+
+        L'horodatage à la seconde seul ne suffit pas: deux jobs concurrents
+        sur le même fichier écraseraient mutuellement leur sortie
+        """
         original_name = Path(original_path).stem
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return self.output_dir / f"{original_name}_anonymized_{timestamp}_{uuid.uuid4().hex[:8]}{extension}"
+    
+    def _export(self, df: pd.DataFrame, original_path: str, source_format: str,
+                output_format: Optional[str] = None) -> Path:
+        """Export fichier anonymisé"""
+        
+        # Format de sortie demandé (fichiers tabulaires seulement)
+        if output_format and source_format not in ('.pdf', '.txt'):
+            target = f".{output_format}"
+            if target != source_format and not (target == '.xlsx' and source_format == '.xls'):
+                # Classeur multi-feuilles → feuilles empilées (colonne 'sheet')
+                if source_format in ('.xlsx', '.xls') and target != '.xlsx':
+                    df = stack_sheets(df)
+                source_format = target
         
-        # PDF → TXT
+        # PDF → TXT (écrit page par page)
         if source_format == '.pdf':
-            output_file = self.output_dir / f"{original_name}_anonymized_{timestamp}.txt"
+            output_file = self._output_file(original_path, '.txt')
             
-            if 'full_text' in df.columns:
-                anonymized_text = df['full_text'].iloc[0]
+            if {'page', 'text'} <= set(df.columns):
+                write_pages(df, output_file)
             else:
-                anonymized_text = '\n'.join(df.astype(str).values.flatten())
-            
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(anonymized_text)
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(df.astype(str).values.flatten()))
         
         # CSV
         elif source_format == '.csv':
-            output_file = self.output_dir / f"{original_name}_anonymized_{timestamp}.csv"
+            output_file = self._output_file(original_path, '.csv')
             df.to_csv(output_file, index=False, encoding='utf-8')
         
-        # Excel
+        # Excel (write-only, une feuille par feuille d'origine)
         elif source_format in ['.xlsx', '.xls']:
-            output_file = self.output_dir / f"{original_name}_anonymized_{timestamp}.xlsx"
-            df.to_excel(output_file, index=False)
+            output_file = self._output_file(original_path, '.xlsx')
+            write_workbook(df, output_file)
+        
+        # Parquet / Arrow IPC (types conservés, compressé)
+        elif source_format in COLUMNAR_FORMATS:
+            output_file = self._output_file(original_path, source_format)
+            write_columnar(df, output_file, source_format)
         
         # JSON
         elif source_format == '.json':
-            output_file = self.output_dir / f"{original_name}_anonymized_{timestamp}.json"
+            output_file = self._output_file(original_path, '.json')
             df.to_json(output_file, orient='records', force_ascii=False, indent=2)
         
         # TXT
         elif source_format == '.txt':
-            output_file = self.output_dir / f"{original_name}_anonymized_{timestamp}.txt"
+            output_file = self._output_file(original_path, '.txt')
             
             if 'text' in df.columns:
                 with open(output_file, 'w', encoding='utf-8') as f:
@@ -243,7 +749,7 @@ class AidChainPipeline:
         
         # Par défaut → CSV
         else:
-            output_file = self.output_dir / f"{original_name}_anonymized_{timestamp}.csv"
+            output_file = self._output_file(original_path, '.csv')
             df.to_csv(output_file, index=False, encoding='utf-8')
         
         return output_file
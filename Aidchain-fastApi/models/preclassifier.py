@@ -0,0 +1,154 @@
+"""
+Pré-classification vectorisée des colonnes (sans modèles transformers)
+
+Seules les colonnes de texte libre ambiguës doivent atteindre le NER.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .dates import ENGLISH_MONTHS, FRENCH_MONTHS
+
+_MONTHS = '|'.join(sorted(set(FRENCH_MONTHS) | set(ENGLISH_MONTHS), key=len, reverse=True))
+_TIME = r"(?:[T ]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?"
+# ISO (2023-01-15), jour/mois/année (15/01/2023, 15.01.23), mois en toutes lettres (1er janvier 2023)
+DATE_PATTERN = (
+    rf"(?:\d{{4}}[-/.]\d{{1,2}}[-/.]\d{{1,2}}{_TIME}"
+    rf"|\d{{1,2}}[-/.]\d{{1,2}}[-/.]\d{{2,4}}{_TIME}"
+    rf"|(?:(?:1er|\d{{1,2}})\s+)?(?:{_MONTHS})\.?\s+\d{{4}})"
+)
+EMAIL_PATTERN = r"[^@\s]+@[^@\s]+\.[A-Za-z]{2,}"
+PHONE_PATTERN = r"\+?[\d\s().-]{8,20}"
+PHONE_PREFIX_PATTERN = r"[+0(]"  # Numéros nationaux (0...) ou internationaux (+33...)
+CODE_PATTERN = r"(?=.*\d)[A-Za-z0-9_.+/#-]{1,16}"
+LETTER_PATTERN = r"[A-Za-zÀ-ÿ]"
+
+BOOLEAN_VALUES = {'true', 'false', 'yes', 'no', 'oui', 'non', 'vrai', 'faux', 'y', 'n', 't', 'f', '0', '1'}
+
+LOW_CARDINALITY_MAX = 20  # Valeurs distinctes max pour une colonne de codes
+PATTERN_HIT_RATIO = 0.9   # Taux minimal pour conclure email/téléphone/dates
+NUMERIC_PARSE_RATIO = 0.95
+ID_UNIQUENESS = 0.9
+ID_MIN_DIGITS = 6
+
+
+@dataclass
+class PreClassification:
+    """
+    Décision de la pré-classification
+
+    route:
+        - 'decided':    colonne tranchée ici (publique ou sensible), pas de NER
+        - 'structured': identifiants/codes possibles → features contact/ID seulement, pas de NER
+        - 'text':       texte libre ambigu → chemin complet avec NER
+    """
+    route: str
+    reasoning: str
+    is_sensitive: bool = False
+    confidence: float = 0.0
+    entity_types: List[str] = field(default_factory=list)
+    stats: Dict = field(default_factory=dict)
+
+
+def preclassify(series: pd.Series) -> PreClassification:
+    """Classe une colonne à partir du dtype, de la cardinalité et de regex vectorisées"""
+    col = series.dropna()
+    n = len(col)
+
+    if n == 0:
+        return PreClassification('decided', "Fast-path: vide")
+
+    nunique = int(col.nunique())
+    stats = {'dtype': str(series.dtype), 'rows': n, 'unique': nunique, 'uniqueness': round(nunique / n, 3)}
+
+    # Booléens
+    if pd.api.types.is_bool_dtype(col):
+        return PreClassification('decided', "Fast-path: booléen", stats=stats)
+
+    # Dates typées: la décision DATE dépend du NER
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return PreClassification('text', "Dates typées", stats=stats)
+
+    # Numériques
+    if pd.api.types.is_numeric_dtype(col):
+        return _numeric(col, stats)
+
+    text = col.astype(str).str.strip()
+    lengths = text.str.len()
+    stats.update({
+        'mean_length': round(float(lengths.mean()), 1),
+        'max_length': int(lengths.max()),
+    })
+
+    lowered = text.str.lower()
+    if lowered.isin(BOOLEAN_VALUES).all():
+        return PreClassification('decided', "Fast-path: booléen (texte)", stats=stats)
+
+    numeric = pd.to_numeric(text.str.replace(',', '.', regex=False), errors='coerce')
+    numeric_ratio = float(numeric.notna().mean())
+    stats['numeric_ratio'] = round(numeric_ratio, 3)
+
+    # Dates en texte: avant téléphones et codes ('2023-01-15' a la forme d'un numéro)
+    date_ratio = float(text.str.fullmatch(DATE_PATTERN, case=False).mean())
+    stats['date_ratio'] = round(date_ratio, 3)
+
+    if date_ratio >= PATTERN_HIT_RATIO:
+        return PreClassification('text', f"Dates (texte, {date_ratio:.0%})", stats=stats)
+
+    email_ratio = float(text.str.fullmatch(EMAIL_PATTERN).mean())
+    stats['email_ratio'] = round(email_ratio, 3)
+
+    if email_ratio >= PATTERN_HIT_RATIO:
+        return PreClassification(
+            'decided', f"Fast-path: emails ({email_ratio:.0%})",
+            is_sensitive=True, confidence=0.95, entity_types=['EMAIL'], stats=stats
+        )
+
+    # Téléphones: motif + préfixe 0/+ + majorité de chiffres (sinon simples nombres ou dates)
+    digits = text.str.count(r"\d")
+    phone_like = text.str.fullmatch(PHONE_PATTERN) & text.str.match(PHONE_PREFIX_PATTERN)
+    phone_ratio = float((phone_like & (digits >= 8)).mean())
+    stats['phone_ratio'] = round(phone_ratio, 3)
+
+    if phone_ratio >= PATTERN_HIT_RATIO and numeric_ratio < NUMERIC_PARSE_RATIO:
+        return PreClassification(
+            'decided', f"Fast-path: téléphones ({phone_ratio:.0%})",
+            is_sensitive=True, confidence=0.9, entity_types=['PHONE'], stats=stats
+        )
+
+    if numeric_ratio >= NUMERIC_PARSE_RATIO:
+        return _numeric(numeric.dropna(), stats)
+
+    letters_ratio = float(text.str.contains(LETTER_PATTERN).mean())
+    code_ratio = float(text.str.fullmatch(CODE_PATTERN).mean())
+    stats.update({'letters_ratio': round(letters_ratio, 3), 'code_ratio': round(code_ratio, 3)})
+
+    # Codes courts à faible cardinalité (groupe sanguin, sexe, codes CIM...)
+    if nunique <= LOW_CARDINALITY_MAX and (stats['max_length'] <= 4 or code_ratio >= PATTERN_HIT_RATIO):
+        return PreClassification(
+            'decided', f"Fast-path: codes catégoriels ({nunique} valeurs)", stats=stats
+        )
+
+    # Jetons sans espaces avec chiffres (PAT-00123...) ou sans lettres → features ID seulement
+    if code_ratio >= PATTERN_HIT_RATIO or letters_ratio == 0:
+        return PreClassification('structured', "Identifiants/codes possibles", stats=stats)
+
+    return PreClassification('text', "Texte libre", stats=stats)
+
+
+def _numeric(values: pd.Series, stats: Dict) -> PreClassification:
+    """Colonne numérique: publique sauf si elle ressemble à des identifiants"""
+    values = values.astype(float)
+    integral = bool(np.all(np.mod(values.to_numpy(), 1) == 0))
+    uniqueness = values.nunique() / len(values)
+
+    if integral and uniqueness >= ID_UNIQUENESS:
+        max_digits = int(np.floor(np.log10(np.abs(values).max() + 1)) + 1)
+        stats['max_digits'] = max_digits
+        if max_digits >= ID_MIN_DIGITS:
+            return PreClassification('structured', "Numérique unique (ID/téléphone possible)", stats=stats)
+
+    kind = "entier" if integral else "continu"
+    return PreClassification('decided', f"Fast-path: numérique {kind}", stats=stats)
@@ -0,0 +1,157 @@
+"""
+Pseudonymisation déterministe par clé (HMAC-SHA256)
+
+Chaque remplacement est dérivé d'un HMAC de la valeur originale, qui indexe
+des pools de valeurs Faker construits avec une graine fixe: même clé + même
+valeur → même pseudonyme, quels que soient l'ordre des requêtes, le process
+ou le nœud. Aucun état partagé, aucun cache de correspondances.
+"""
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from faker import Faker
+
+from config import DEFAULT_LOCALE, PSEUDONYM_KEY_PATH, PSEUDONYM_POOL_SIZE, PSEUDONYM_SECRET_KEY
+
+POOL_SEED = 20240101  # Graine des pools: la changer change tous les pseudonymes
+
+
+def secret_key(path: Path = PSEUDONYM_KEY_PATH) -> str:
+    """
+    Clé HMAC du déploiement
+
+    AIDCHAIN_PSEUDONYM_KEY si définie, sinon clé aléatoire persistée dans
+    PSEUDONYM_KEY_PATH (créée au premier appel, lisible par le seul
+    propriétaire). Jamais de clé par défaut connue.
+    """
+    if PSEUDONYM_SECRET_KEY:
+        return PSEUDONYM_SECRET_KEY
+
+    path = Path(path)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_hex(32))
+        try:
+            # Lien atomique: deux workers qui démarrent ensemble gardent la même clé
+            os.link(tmp, path)
+            print(f"🔑 Clé de pseudonymisation générée: {path}")
+        except FileExistsError:
+            pass
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    key = path.read_text().strip()
+    if not key:
+        raise RuntimeError(f"Clé de pseudonymisation vide: {path}")
+    return key
+
+
+class KeyedPseudonymizer:
+    """
+    🔑 PSEUDONYMES SANS ÉTAT (singleton, pools construits une fois)
+
+    Exemple:
+        p = KeyedPseudonymizer()
+        p.name("Jean Dupont")  # → toujours le même nom Faker pour cette clé
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance._build()
+                cls._instance = instance
+        return cls._instance
+
+    def _build(self):
+        self._key = secret_key().encode('utf-8')
+
+        fake = Faker(DEFAULT_LOCALE)
+        fake.seed_instance(POOL_SEED)
+
+        # Noms = prénom × nom: ~POOL_SIZE² combinaisons, peu de collisions
+        self.pools: Dict[str, List[str]] = {
+            'first_name': self._pool(fake.first_name),
+            'last_name': self._pool(fake.last_name),
+            'city': self._pool(fake.city),
+            'company': self._pool(fake.company),
+            'email_user': self._pool(fake.user_name),
+            'email_domain': self._pool(fake.free_email_domain),
+            'phone': self._pool(fake.phone_number),
+        }
+        print(f"✅ Pools de pseudonymes ({PSEUDONYM_POOL_SIZE} valeurs par pool)")
+
+    @staticmethod
+    def _pool(generate: Callable[[], str]) -> List[str]:
+        """Valeurs distinctes dans l'ordre de génération (déterministe via la graine)"""
+        values = dict.fromkeys(generate() for _ in range(PSEUDONYM_POOL_SIZE))
+        return list(values)
+
+    def digest(self, kind: str, value: str) -> bytes:
+        """HMAC de la valeur, séparé par type (un même texte diffère selon le type)"""
+        return hmac.new(self._key, f"{kind}\x00{value}".encode('utf-8'), hashlib.sha256).digest()
+
+    def _pick(self, pool: str, digest: bytes, part: int) -> str:
+        values = self.pools[pool]
+        index = int.from_bytes(digest[part * 8:(part + 1) * 8], 'big') % len(values)
+        return values[index]
+
+    def name(self, value: str) -> str:
+        d = self.digest('person', value)
+        return f"{self._pick('first_name', d, 0)} {self._pick('last_name', d, 1)}"
+
+    def city(self, value: str) -> str:
+        return self._pick('city', self.digest('location', value), 0)
+
+    def company(self, value: str) -> str:
+        return self._pick('company', self.digest('organization', value), 0)
+
+    def email(self, value: str) -> str:
+        d = self.digest('email', value)
+        # Suffixe numérique: évite que deux adresses partagent le même pseudonyme
+        suffix = int.from_bytes(d[16:18], 'big') % 1000
+        return f"{self._pick('email_user', d, 0)}{suffix}@{self._pick('email_domain', d, 1)}"
+
+    def phone(self, value: str) -> str:
+        """Format d'un numéro Faker du pool, chiffres de fin dérivés du HMAC"""
+        d = self.digest('phone', value)
+        template = self._pick('phone', d, 0)
+        digits = iter(str(int.from_bytes(d[8:], 'big')).zfill(48))
+        kept = 0
+        chars = []
+
+        for c in template:
+            if c.isdigit():
+                # Indicatif / préfixe (4 premiers chiffres) conservé pour rester plausible
+                if kept >= 4:
+                    c = next(digits)
+                kept += 1
+            chars.append(c)
+
+        return ''.join(chars)
+
+    def identifier(self, value: str) -> str:
+        return f"ID_{self.digest('identifier', value).hex()[:8].upper()}"
+
+    def medical(self, value: str) -> str:
+        return f"MED_{int.from_bytes(self.digest('medical', value)[:8], 'big') % 10000:04d}"
+
+    def date_offset(self, subject: str = '', max_days: int = 365, scope: str = '') -> int:
+        """
+        Décalage de dates dérivé de la clé (identique sur tous les workers),
+        propre à la portée (job, tenant, dataset) et au patient / à l'entité
+        si subject est fourni
+        """
+        span = 2 * max_days + 1
+        return int.from_bytes(self.digest('date_offset', f"{scope}\x00{subject}")[:8], 'big') % span - max_days
@@ -0,0 +1,63 @@
+"""
+Moteur de remplacement multi-motifs en une seule passe
+
+Toutes les formes de surface sont compilées en une regex issue d'un trie
+(préfixes factorisés, correspondance la plus longue d'abord): chaque cellule
+est parcourue une seule fois, quel que soit le nombre d'entités.
+"""
+import re
+from typing import Dict, Iterable, Optional
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex équivalente à l'alternance des mots, factorisée par préfixes"""
+    trie: Dict = {}
+
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node: Dict) -> Optional[str]:
+        children = sorted(key for key in node if key)
+        if not children:
+            return None
+
+        branches = []
+        for char in children:
+            rest = build(node[char])
+            branches.append(re.escape(char) + (rest or ''))
+
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+        # Fin de mot possible ici: la suite est optionnelle (gourmande = plus long d'abord)
+        if '' in node:
+            pattern = '(?:' + pattern + ')?'
+
+        return pattern
+
+    return build(trie) or ''
+
+
+class ReplacementEngine:
+    """
+    🔁 REMPLACEMENT DE TOUTES LES ENTITÉS EN UN SEUL PARCOURS
+
+    Exemple:
+        engine = ReplacementEngine({'diabète': 'MED_0001', 'diabète de type 2': 'MED_0002'})
+        engine.replace("diabète de type 2 connu")  # → "MED_0002 connu"
+    """
+
+    def __init__(self, mapping: Dict[str, str]):
+        self.mapping = {original: fake for original, fake in mapping.items() if original}
+        self._regex = re.compile(_trie_pattern(self.mapping)) if self.mapping else None
+
+    def __len__(self) -> int:
+        return len(self.mapping)
+
+    def replace(self, text: str) -> str:
+        """Applique toutes les substitutions en un parcours (plus long motif d'abord)"""
+        if self._regex is None:
+            return text
+        return self._regex.sub(lambda match: self.mapping[match.group(0)], text)
@@ -0,0 +1,248 @@
+"""
+Cache de résultats adressé par contenu
+
+Clé = SHA-256 de l'upload (calculé pendant la réception) + extension +
+portée + format de sortie + empreinte de la configuration détecteur /
+anonymiseur. Un même fichier re-soumis avec la même configuration renvoie
+immédiatement l'AnonymizationResponse et le fichier anonymisé existants.
+
+Index SQLite (partagé entre workers uvicorn). Le cache garde sa propre
+référence de chaque fichier anonymisé (lien physique, copie à défaut) dans
+RESULT_CACHE_DIR: l'éviction ne supprime que l'entrée et cette référence,
+jamais le fichier qu'un demandeur est peut-être en train de télécharger.
+Éviction: entrées plus vieilles que FILE_EXPIRATION_HOURS, puis les moins
+récemment servies tant que les fichiers dépassent RESULT_CACHE_MAX_MB.
+
+Les modèles effectivement chargés font partie de la clé; tant que le
+registre n'est pas prêt, rien n'est mis en cache.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import config
+from . import artifacts
+from config import (
+    FILE_EXPIRATION_HOURS,
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MAX_MB,
+    RESULT_CACHE_PATH
+)
+
+CACHE_VERSION = 2  # À incrémenter quand la sortie du pipeline change à configuration égale
+
+# Réglages qui changent la détection ou l'anonymisation (donc le résultat)
+FINGERPRINT_SETTINGS = (
+    'DEFAULT_LOCALE', 'DETECTION_CONFIDENCE_THRESHOLD', 'NER_MEDICAL_MODELS', 'NER_GENERAL_MODELS',
+    'NER_BACKEND', 'NER_LONG_TEXT', 'NER_WINDOW_TOKENS', 'NER_WINDOW_STRIDE', 'NER_WINDOW_CHARS',
+    'NER_PRESCAN', 'FAST_PATH_ENABLED', 'ID_SCORE_THRESHOLD', 'PDF_CHUNK_CHARS',
+    'STREAMING_THRESHOLD_MB', 'COLUMNAR_COMPRESSION', 'PSEUDONYM_MODE', 'PSEUDONYM_POOL_SIZE',
+    'DATE_SHIFT_MAX_DAYS', 'DATE_SHIFT_KEY',
+)
+
+
+def config_fingerprint() -> str:
+    """Version de la configuration détecteur / anonymiseur (la clé HMAC n'y figure que hachée)"""
+    from .identifier_model import MODEL_VERSION
+    from .pseudonym import secret_key
+
+    values = {name: getattr(config, name, None) for name in FINGERPRINT_SETTINGS}
+    values['PSEUDONYM_SECRET_KEY'] = hashlib.sha256(secret_key().encode()).hexdigest()
+    values['IDENTIFIER_MODEL_VERSION'] = MODEL_VERSION
+    values['CACHE_VERSION'] = CACHE_VERSION
+
+    encoded = json.dumps(values, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def models_fingerprint() -> Optional[str]:
+    """Modèles chargés (backend:candidat par clé), None tant que le registre n'est pas prêt"""
+    from .model_registry import ModelRegistry
+
+    registry = ModelRegistry()
+    if not registry.ready():
+        return None
+
+    loaded = {key: registry.model_id(key) for key in sorted(registry.status())}
+    return json.dumps(loaded, sort_keys=True)
+
+
+def _json_default(value):
+    # Scalaires numpy des résultats de détection
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+@dataclass
+class CachedResult:
+    key: str
+    output_path: str
+    response: str  # AnonymizationResponse sérialisée (JSON)
+    detection: Dict
+    created_at: float
+
+
+class ResultCache:
+    """Index SQLite des résultats, fichiers anonymisés sur disque"""
+
+    def __init__(self, path: Path, max_bytes: int = RESULT_CACHE_MAX_MB * 1024 * 1024,
+                 max_age_seconds: float = FILE_EXPIRATION_HOURS * 3600, files_dir: Path = RESULT_CACHE_DIR):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.files_dir = Path(files_dir)
+        self.files_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+        # Index d'une version précédente (sans copie propre): repart de zéro
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(results)")}
+        if columns and 'cached_path' not in columns:
+            self._conn.execute("DROP TABLE results")
+
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                sha256 TEXT,
+                output_path TEXT,
+                cached_path TEXT,
+                size INTEGER,
+                response TEXT,
+                detection TEXT,
+                created_at REAL,
+                accessed_at REAL
+            )
+            """
+        )
+        self._lock = threading.Lock()
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.fingerprint = config_fingerprint()
+
+    def make_key(self, sha256: str, ext: str, scope: Optional[str] = None,
+                 output_format: Optional[str] = None) -> Optional[str]:
+        """Clé du résultat, None (pas de cache) si les modèles ne sont pas tous chargés"""
+        models = models_fingerprint()
+        if models is None:
+            return None
+        parts = [sha256, ext.lower(), scope or '', output_format or '', self.fingerprint, models]
+        return hashlib.sha256('\x00'.join(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        """Résultat encore valide (copie présente, non expiré), None sinon"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output_path, cached_path, response, detection, created_at FROM results WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        output_path, cached_path, response, detection, created_at = row
+        cached_path = Path(cached_path)
+
+        if time.time() - created_at > self.max_age_seconds or not cached_path.is_file():
+            self._drop(key, cached_path)
+            return None
+
+        # Fichier servi supprimé entre-temps: restauré depuis la copie du cache
+        if artifacts.resolve(output_path) is None:
+            _link_or_copy(cached_path, Path(output_path).with_name(cached_path.name.split('-', 1)[1]))
+
+        with self._lock:
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+
+        return CachedResult(key, output_path, response, json.loads(detection), created_at)
+
+    def put(self, key: str, sha256: str, output_path: str, response: str, detection: Dict):
+        """
+        Enregistre un résultat (remplace l'entrée précédente de la même clé)
+
+        Le cache référence sa propre copie du fichier stocké: le fichier servi
+        au demandeur n'est jamais supprimé par le cache
+        """
+        now = time.time()
+        stored = artifacts.resolve(output_path)[0]  # Fichier stocké (éventuellement compressé)
+        cached_path = self.files_dir / f"{key}-{stored.name}"
+        _link_or_copy(stored, cached_path)
+        size = cached_path.stat().st_size
+
+        with self._lock:
+            previous = self._conn.execute("SELECT cached_path FROM results WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, sha256, str(output_path), str(cached_path), size, response,
+                 json.dumps(detection, default=_json_default), now, now)
+            )
+
+        # Deux soumissions simultanées du même fichier: seule l'ancienne copie du cache part
+        if previous and previous[0] != str(cached_path):
+            Path(previous[0]).unlink(missing_ok=True)
+
+        self.evict()
+
+    def evict(self) -> int:
+        """Entrées expirées, puis les moins récemment servies au-delà de max_bytes"""
+        limit = time.time() - self.max_age_seconds
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, cached_path, size, created_at FROM results ORDER BY accessed_at DESC"
+            ).fetchall()
+
+        evicted = []
+        total = 0
+        full = False
+
+        for key, cached_path, size, created_at in rows:
+            if created_at < limit:
+                evicted.append((key, cached_path))
+            elif full or total + size > self.max_bytes:
+                # Budget atteint: toutes les entrées moins récentes partent
+                full = True
+                evicted.append((key, cached_path))
+            else:
+                total += size
+
+        for key, cached_path in evicted:
+            self._drop(key, cached_path)
+
+        return len(evicted)
+
+    def _drop(self, key: str, cached_path: Path):
+        """Entrée et copie du cache seulement (les fichiers servis suivent leur propre expiration)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+        Path(cached_path).unlink(missing_ok=True)
+
+
+def _link_or_copy(source: Path, target: Path):
+    """Lien physique (pas de copie des octets), copie si le système de fichiers le refuse"""
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}")
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copy2(source, tmp)
+    os.replace(tmp, target)
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Cache configuré (None si RESULT_CACHE_ENABLED est désactivé)"""
+    global _cache
+    if not RESULT_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(RESULT_CACHE_PATH)
+        return _cache
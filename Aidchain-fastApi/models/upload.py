@@ -0,0 +1,114 @@
+"""
+Réception des uploads sans copie superflue
+
+L'UploadFile est lu par gros blocs: gardé en mémoire sous un seuil, sinon
+déversé dans un fichier temporaire au nom unique. La taille est vérifiée
+pendant la lecture (rejet dès que MAX_FILE_SIZE_BYTES est dépassé) et le
+FileLoader lit ensuite directement le buffer ou le fichier temporaire.
+"""
+import hashlib
+import io
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from config import MAX_FILE_SIZE_BYTES, UPLOAD_CHUNK_SIZE, UPLOAD_MEMORY_THRESHOLD_MB
+
+
+class UploadTooLargeError(Exception):
+    """Levée dès que l'upload dépasse la taille maximale"""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Fichier trop volumineux (max {limit / 1024 / 1024:.0f} MB)")
+        self.limit = limit
+
+
+@dataclass
+class UploadedFile:
+    """Upload reçu: en mémoire (data) ou sur disque (path), jamais les deux"""
+    filename: str
+    size: int
+    path: Optional[Path] = None
+    data: Optional[bytes] = None
+    sha256: Optional[str] = None  # Empreinte du contenu (cache de résultats)
+
+    @property
+    def suffix(self) -> str:
+        return Path(self.filename).suffix.lower()
+
+    @property
+    def in_memory(self) -> bool:
+        return self.data is not None
+
+    def open(self) -> BinaryIO:
+        """Flux binaire sur le contenu (sans copie pour le buffer mémoire)"""
+        if self.data is not None:
+            return io.BytesIO(self.data)
+        return open(self.path, 'rb')
+
+    def head(self, size: int) -> bytes:
+        """Premiers octets (détection de dialecte, etc.)"""
+        if self.data is not None:
+            return self.data[:size]
+        with open(self.path, 'rb') as f:
+            return f.read(size)
+
+    def cleanup(self):
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+        self.data = None
+
+
+async def spool_upload(upload, directory: Path,
+                       max_bytes: int = MAX_FILE_SIZE_BYTES,
+                       memory_threshold: int = UPLOAD_MEMORY_THRESHOLD_MB * 1024 * 1024,
+                       chunk_size: int = UPLOAD_CHUNK_SIZE) -> UploadedFile:
+    """
+    Lit l'UploadFile par blocs de chunk_size
+
+    - taille ≤ memory_threshold → UploadedFile en mémoire
+    - au-delà → fichier temporaire unique dans `directory`
+    - taille > max_bytes → UploadTooLargeError (fichier partiel supprimé)
+    - SHA-256 calculé au passage (aucune relecture)
+    """
+    filename = Path(upload.filename or 'upload').name
+    buffer = io.BytesIO()
+    spool: Optional[BinaryIO] = None
+    spool_path: Optional[Path] = None
+    size = 0
+    digest = hashlib.sha256()
+
+    try:
+        while chunk := await upload.read(chunk_size):
+            size += len(chunk)
+            digest.update(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(max_bytes)
+
+            if spool is None and size > memory_threshold:
+                # Passage sur disque: nom unique, deux uploads homonymes ne s'écrasent plus
+                directory.mkdir(parents=True, exist_ok=True)
+                fd, name = tempfile.mkstemp(suffix=Path(filename).suffix, dir=directory)
+                spool_path = Path(name)
+                spool = os.fdopen(fd, 'wb')
+                spool.write(buffer.getbuffer())
+                buffer = None
+
+            if spool is not None:
+                spool.write(chunk)
+            else:
+                buffer.write(chunk)
+
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            spool_path.unlink(missing_ok=True)
+        raise
+
+    if spool is not None:
+        spool.close()
+        return UploadedFile(filename=filename, size=size, path=spool_path, sha256=digest.hexdigest())
+
+    return UploadedFile(filename=filename, size=size, data=buffer.getvalue(), sha256=digest.hexdigest())
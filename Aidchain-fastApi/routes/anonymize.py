@@ -1,11 +1,16 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from typing import Optional
 from pathlib import Path
-import shutil
 import traceback
 import time
 import json
 
-from models.pipeline import AidChainPipeline
+from models.datasets import APPENDABLE_FORMATS, DURABLE_MAPPINGS_REQUIRED, durable_mappings
+from models.executor import PipelineExecutor, ExecutorSaturatedError
+from models.mapping_store import MappingStoreRegistry
+from models.result_cache import CachedResult, get_result_cache
+from models.upload import UploadTooLargeError, spool_upload
+from config import ALLOWED_EXTENSIONS, OUTPUT_FORMATS
 from schemas.response import AnonymizationResponse, DetectionSummary, ColumnInfo, DetectedEntity
 
 router = APIRouter()
@@ -14,102 +19,119 @@ router = APIRouter()
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
-# Pipeline singleton
-pipeline = AidChainPipeline()
+# Exécuteur borné (le pipeline tourne hors de la boucle asyncio)
+executor = PipelineExecutor()
+
+# Cache de résultats adressé par contenu (None si désactivé)
+result_cache = get_result_cache()
+
+
+def _saturated(exc: ExecutorSaturatedError) -> HTTPException:
+    """503 + Retry-After quand le service est saturé"""
+    return HTTPException(
+        503,
+        f"⏳ Service saturé ({executor.pending}/{executor.capacity} jobs), réessayez plus tard",
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+def validate_tenant(tenant_id: Optional[str]) -> Optional[str]:
+    """Portée des pseudonymes: 400 si l'identifiant de tenant est invalide"""
+    if tenant_id is None:
+        return None
+    try:
+        return MappingStoreRegistry.validate_scope(tenant_id)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
+def validate_extension(filename: str) -> str:
+    """Extension du fichier envoyé: 400 si elle n'est pas supportée"""
+    file_ext = Path(filename).suffix.lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(400, f"Format {file_ext} non supporté. Formats acceptés: {ALLOWED_EXTENSIONS}")
+    return file_ext
+
+
+def validate_output_format(output_format: Optional[str]) -> Optional[str]:
+    """Format de sortie demandé: 400 s'il n'est pas supporté"""
+    if output_format is None:
+        return None
+    output_format = output_format.lower().lstrip('.')
+    if output_format not in OUTPUT_FORMATS:
+        raise HTTPException(400, f"Format de sortie {output_format} non supporté. Formats acceptés: {OUTPUT_FORMATS}")
+    return output_format
+
+
+def validate_incremental(incremental: bool, file_ext: str):
+    """Mode incrémental: 400 si le format n'accepte pas d'ajout de lignes ou si les pseudonymes ne sont pas persistants"""
+    if incremental and file_ext not in APPENDABLE_FORMATS:
+        raise HTTPException(400, f"Mode incrémental non supporté pour {file_ext}. Formats acceptés: {APPENDABLE_FORMATS}")
+    if incremental and not durable_mappings():
+        raise HTTPException(400, DURABLE_MAPPINGS_REQUIRED)
 
 
 @router.post(
     "/api/anonymize",
     response_model=AnonymizationResponse,
     summary="Anonymiser un fichier",
-    description="Anonymise un fichier (CSV, Excel, PDF, JSON, TXT) et retourne 5 premières lignes"
+    description="Anonymise un fichier (CSV, Excel, PDF, JSON, TXT, Parquet, Arrow) et retourne 5 premières lignes"
 )
-async def anonymize_file(file: UploadFile = File(...)):
+async def anonymize_file(
+    file: UploadFile = File(...),
+    tenant_id: Optional[str] = Query(None, description="Portée des pseudonymes (cohérents entre fichiers du même tenant)"),
+    output_format: Optional[str] = Query(None, description="Format de sortie: xlsx, csv ou parquet (défaut: format source)"),
+    incremental: bool = Query(False, description="Enregistre un dataset pour n'anonymiser ensuite que les lignes ajoutées")
+):
     """
     ✅ RETOURNE 5 PREMIÈRES LIGNES ANONYMISÉES
     """
     start_time = time.time()
+    scope = validate_tenant(tenant_id)
+    output_format = validate_output_format(output_format)
     
     # 1. Validation extension
-    allowed_extensions = {'.csv', '.xlsx', '.xls', '.json', '.txt', '.pdf'}
-    file_ext = Path(file.filename).suffix.lower()
+    file_ext = validate_extension(file.filename)
+    validate_incremental(incremental, file_ext)
     
-    if file_ext not in allowed_extensions:
-        raise HTTPException(400, f"Format {file_ext} non supporté. Formats acceptés: {allowed_extensions}")
+    # 2. Admission (rejet rapide avant d'écrire l'upload)
+    if executor.is_saturated():
+        raise _saturated(ExecutorSaturatedError())
     
-    # 2. Sauvegarde temporaire
-    temp_path = UPLOAD_DIR / file.filename
+    upload = None
     
     try:
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # 3. Réception par blocs: mémoire ou fichier temporaire unique, taille vérifiée au fil de l'eau
+        upload = await spool_upload(file, UPLOAD_DIR)
         
-        # 3. Pipeline complet
-        result = pipeline.process(str(temp_path))
+        # 4. Même contenu, même configuration → résultat déjà calculé
+        # (pas en incrémental: chaque traitement enregistre un nouveau dataset)
+        cache_key = None
+        if result_cache is not None and not incremental:
+            cache_key = result_cache.make_key(upload.sha256, file_ext, scope, output_format)
+            cached = result_cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                return cached_response(cached, file.filename, start_time)
         
-        # 4. Extraction données
-        detection = result['detection']
-        output_filename = Path(result['output_path']).name
+        # 5. Pipeline complet (dans le pool, la boucle reste libre)
+        # L'exécuteur devient propriétaire de l'upload: supprimé à la fin réelle du job
+        job_upload, upload = upload, None
+        result = await executor.run(job_upload, scope=scope, output_format=output_format, incremental=incremental)
         
-        # 5. Construction colonnes sensibles avec EXEMPLES
-        sensitive_columns = []
+        response = build_response(result, file.filename, start_time)
         
-        for col_name, col_info in detection['columns'].items():
-            if not col_info['is_sensitive']:
-                continue
-            
-            # Récupérer exemples AVANT (depuis détection)
-            sample_before = col_info['sample_values'][:5]
-            
-            # Récupérer exemples APRÈS (depuis DataFrame anonymisé)
-            df_anon = result['anonymized_df']
-            sample_after = df_anon[col_name].dropna().head(5).astype(str).tolist()
-            
-            # Entités détectées
-            detected_entities = [
-                DetectedEntity(**entity) 
-                for entity in col_info['detected_entities'][:10]  # Limiter à 10
-            ]
-            
-            sensitive_columns.append(
-                ColumnInfo(
-                    column_name=col_name,
-                    is_sensitive=True,
-                    confidence=col_info['confidence'],
-                    entity_types=col_info['entity_types'],
-                    reasoning=col_info['reasoning'],
-                    sample_before=sample_before,
-                    sample_after=sample_after,
-                    detected_entities=detected_entities
-                )
-            )
-        
-        # 6. Résumé
-        summary = DetectionSummary(
-            total_columns=detection['summary']['total'],
-            sensitive_columns=detection['summary']['sensitive'],
-            public_columns=detection['summary']['public'],
-            file_format=detection['format'],
-            rows=detection['shape'][0],
-            columns=detection['shape'][1]
-        )
+        cache_result(cache_key, job_upload.sha256, result, response)
         
-        # 7. Temps de traitement
-        processing_time = time.time() - start_time
-        
-        # 8. URL de téléchargement
-        download_url = f"/api/download/{output_filename}"
-        
-        return AnonymizationResponse(
-            success=True,
-            message=f"✅ Fichier anonymisé avec succès ({processing_time:.2f}s)",
-            original_filename=file.filename,
-            anonymized_filename=output_filename,
-            download_url=download_url,
-            summary=summary,
-            sensitive_columns=sensitive_columns,
-            processing_time_seconds=round(processing_time, 2)
-        )
+        return response
+    
+    except UploadTooLargeError as e:
+        raise HTTPException(413, f"❌ {e}")
+    
+    except ExecutorSaturatedError as e:
+        raise _saturated(e)
+    
+    except HTTPException:
+        raise
     
     except Exception as e:
         print(f"\n❌ ERREUR: {e}")
@@ -117,23 +139,102 @@ async def anonymize_file(file: UploadFile = File(...)):
         raise HTTPException(500, f"❌ Erreur : {str(e)}")
     
     finally:
-        # Nettoyage
-        if temp_path.exists():
-            temp_path.unlink()
+        # Nettoyage (upload jamais confié à l'exécuteur: erreur ou cache)
+        if upload is not None:
+            upload.cleanup()
 
 
-@router.get("/api/download/{filename}")
-async def download_file(filename: str):
-    """Télécharge un fichier anonymisé"""
-    from fastapi.responses import FileResponse
+def build_response(result: dict, original_filename: str, start_time: float) -> AnonymizationResponse:
+    """Construit l'AnonymizationResponse à partir du résultat du pipeline"""
+    # 1. Extraction données
+    detection = result['detection']
+    output_filename = Path(result['output_path']).name
+    
+    # 2. Construction colonnes sensibles avec EXEMPLES
+    sensitive_columns = []
+    
+    for col_name, col_info in detection['columns'].items():
+        if not col_info['is_sensitive']:
+            continue
+        
+        # Récupérer exemples AVANT (depuis détection)
+        sample_before = col_info['sample_values'][:5]
+        
+        # Récupérer exemples APRÈS (depuis DataFrame anonymisé)
+        df_anon = result['anonymized_df']
+        sample_after = df_anon[col_name].dropna().head(5).astype(str).tolist()
+        
+        # Entités détectées
+        detected_entities = [
+            DetectedEntity(**entity) 
+            for entity in col_info['detected_entities'][:10]  # Limiter à 10
+        ]
+        
+        sensitive_columns.append(
+            ColumnInfo(
+                column_name=col_name,
+                is_sensitive=True,
+                confidence=col_info['confidence'],
+                entity_types=col_info['entity_types'],
+                reasoning=col_info['reasoning'],
+                sample_before=sample_before,
+                sample_after=sample_after,
+                detected_entities=detected_entities
+            )
+        )
     
-    file_path = Path("anonymized") / filename
+    # 3. Résumé
+    summary = DetectionSummary(
+        total_columns=detection['summary']['total'],
+        sensitive_columns=detection['summary']['sensitive'],
+        public_columns=detection['summary']['public'],
+        fast_path_columns=detection['summary'].get('fast_path', 0),
+        file_format=detection['format'],
+        rows=detection['shape'][0],
+        columns=detection['shape'][1],
+        dialect=detection['summary'].get('dialect')
+    )
     
-    if not file_path.exists():
-        raise HTTPException(404, f"Fichier '{filename}' introuvable")
+    # 4. Temps de traitement
+    processing_time = time.time() - start_time
     
-    return FileResponse(
-        path=str(file_path),
-        filename=filename,
-        media_type='application/octet-stream'
-    )
\ No newline at end of file
+    # 5. URL de téléchargement
+    download_url = f"/api/download/{output_filename}"
+    
+    return AnonymizationResponse(
+        success=True,
+        message=f"✅ Fichier anonymisé avec succès ({processing_time:.2f}s)",
+        original_filename=original_filename,
+        anonymized_filename=output_filename,
+        download_url=download_url,
+        summary=summary,
+        sensitive_columns=sensitive_columns,
+        processing_time_seconds=round(processing_time, 2),
+        dataset_id=result.get('dataset_id'),
+        first_row=result.get('first_row'),
+        dataset_rows=result.get('dataset_rows')
+    )
+
+
+def cache_result(cache_key: Optional[str], sha256: str, result: dict, response: AnonymizationResponse):
+    """Mise en cache best-effort: un échec est journalisé, jamais propagé au résultat déjà produit"""
+    if cache_key is None:
+        return
+    try:
+        result_cache.put(cache_key, sha256, result['output_path'], response.model_dump_json(), result['detection'])
+    except Exception as e:
+        print(f"⚠️ Cache de résultats non écrit ({Path(result['output_path']).name}): {e}")
+
+
+def cached_response(cached: CachedResult, original_filename: str, start_time: float) -> AnonymizationResponse:
+    """AnonymizationResponse d'un résultat en cache (nom et temps propres à cette requête)"""
+    processing_time = time.time() - start_time
+    response = AnonymizationResponse.model_validate_json(cached.response)
+    
+    return response.model_copy(update={
+        'message': f"✅ Résultat en cache ({processing_time:.2f}s)",
+        'original_filename': original_filename,
+        'processing_time_seconds': round(processing_time, 2),
+        'cached': True
+    })
+
@@ -0,0 +1,102 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from typing import Optional
+from datetime import datetime
+from pathlib import Path
+import traceback
+import time
+
+from models.datasets import APPENDABLE_FORMATS, DatasetConflictError, get_dataset_store
+from models.executor import ExecutorSaturatedError
+from models.upload import UploadTooLargeError, spool_upload
+from routes.anonymize import UPLOAD_DIR, executor, build_response, validate_output_format, _saturated
+from schemas.response import AnonymizationResponse, DatasetResponse
+
+router = APIRouter()
+
+
+@router.get(
+    "/api/datasets/{dataset_id}",
+    response_model=DatasetResponse,
+    summary="État d'un dataset incrémental"
+)
+async def get_dataset(dataset_id: str):
+    """Colonnes attendues, lignes déjà anonymisées, version"""
+    dataset = get_dataset_store().get(dataset_id)
+
+    if dataset is None:
+        raise HTTPException(404, f"Dataset '{dataset_id}' introuvable")
+
+    return DatasetResponse(
+        dataset_id=dataset.dataset_id,
+        original_filename=dataset.original_filename,
+        file_format=dataset.source_format,
+        columns=dataset.columns,
+        sensitive_columns=dataset.sensitive_columns,
+        rows=dataset.rows,
+        version=dataset.version,
+        created_at=datetime.fromtimestamp(dataset.created_at),
+        updated_at=datetime.fromtimestamp(dataset.updated_at)
+    )
+
+
+@router.post(
+    "/api/datasets/{dataset_id}/rows",
+    response_model=AnonymizationResponse,
+    summary="Anonymiser les lignes ajoutées à un dataset",
+    description="Réutilise la classification et les pseudonymes du dataset; le fichier produit ne contient que les nouvelles lignes"
+)
+async def append_rows(
+    dataset_id: str,
+    file: UploadFile = File(...),
+    contains_previous: bool = Query(False, description="Le fichier contient aussi les lignes déjà traitées (seules les suivantes sont anonymisées)"),
+    output_format: Optional[str] = Query(None, description="Format de sortie: xlsx, csv ou parquet (défaut: format source)")
+):
+    """
+    ➕ MISE À JOUR INCRÉMENTALE (pas de nouvelle détection)
+    """
+    start_time = time.time()
+    output_format = validate_output_format(output_format)
+    file_ext = Path(file.filename).suffix.lower()
+
+    if file_ext not in APPENDABLE_FORMATS:
+        raise HTTPException(400, f"Format {file_ext} non supporté. Formats acceptés: {APPENDABLE_FORMATS}")
+
+    if get_dataset_store().get(dataset_id) is None:
+        raise HTTPException(404, f"Dataset '{dataset_id}' introuvable")
+
+    if executor.is_saturated():
+        raise _saturated(ExecutorSaturatedError())
+
+    upload = None
+
+    try:
+        upload = await spool_upload(file, UPLOAD_DIR)
+
+        # L'exécuteur devient propriétaire de l'upload: supprimé à la fin réelle du job
+        job_upload, upload = upload, None
+        result = await executor.run(job_upload, dataset_id=dataset_id, output_format=output_format,
+                                    contains_previous=contains_previous)
+
+        return build_response(result, file.filename, start_time)
+
+    except UploadTooLargeError as e:
+        raise HTTPException(413, f"❌ {e}")
+
+    except ExecutorSaturatedError as e:
+        raise _saturated(e)
+
+    except DatasetConflictError as e:
+        raise HTTPException(409, f"❌ {e}")
+
+    except ValueError as e:
+        # Colonnes différentes de celles du dataset
+        raise HTTPException(400, f"❌ {e}")
+
+    except Exception as e:
+        print(f"\n❌ ERREUR: {e}")
+        traceback.print_exc()
+        raise HTTPException(500, f"❌ Erreur : {str(e)}")
+
+    finally:
+        if upload is not None:
+            upload.cleanup()
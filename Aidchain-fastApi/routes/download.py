@@ -0,0 +1,168 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from typing import Dict, Optional, Tuple
+from pathlib import Path
+
+from models import artifacts
+from config import DOWNLOAD_MIN_COMPRESS_KB
+
+router = APIRouter()
+
+# Dossier des exports (AidChainPipeline.output_dir)
+OUTPUT_DIR = Path("anonymized")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding → {encodage: q}"""
+    accepted = {}
+
+    for part in (header or '').split(','):
+        token, *params = [item.strip() for item in part.split(';')]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[token.lower()] = q
+
+    return accepted
+
+
+def acceptable(accepted: Dict[str, float], encoding: str) -> bool:
+    return accepted.get(encoding, accepted.get('*', 0.0)) > 0
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Plage unique 'bytes=début-fin' / 'bytes=début-' / 'bytes=-suffixe' → (début, fin) inclus
+
+    None: en-tête absent, mal formé ou plages multiples (réponse complète)
+
+    Raises:
+        RangeNotSatisfiable: plage hors du fichier (416)
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+
+    spec = header[len('bytes='):].strip()
+    if ',' in spec:
+        return None
+
+    start_str, sep, end_str = spec.partition('-')
+    if not sep:
+        return None
+
+    try:
+        if start_str == '':
+            length = int(end_str)
+            if length <= 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+    except ValueError:
+        return None
+
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+
+    return start, min(end, size - 1)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match (comparaison faible: W/ ignoré)"""
+    if header.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == opaque for tag in header.split(','))
+
+
+@router.get("/api/download/{filename}")
+async def download_file(filename: str, request: Request):
+    """
+    Télécharge un fichier anonymisé
+
+    - Compression négociée (Accept-Encoding: zstd, gzip): fichier stocké
+      compressé servi tel quel, sinon compression à la volée
+    - Reprise (Range / If-Range) sur le fichier tel que stocké
+    - ETag (SHA-256 du fichier stocké) et If-None-Match → 304
+    """
+    found = artifacts.resolve(OUTPUT_DIR / filename)
+
+    if found is None:
+        raise HTTPException(404, f"Fichier '{filename}' introuvable")
+
+    stored_path, stored_encoding = found
+    size = stored_path.stat().st_size
+    accepted = parse_accept_encoding(request.headers.get('accept-encoding'))
+    range_header = request.headers.get('range')
+
+    # 1. Représentation: fichier stocké si son encodage est accepté, sinon transformé à la volée
+    if stored_encoding is not None and acceptable(accepted, stored_encoding):
+        encoding = stored_encoding
+    elif stored_encoding is None and (range_header or size < DOWNLOAD_MIN_COMPRESS_KB * 1024):
+        # Reprise d'un transfert: octets du fichier tel quel (plages stables)
+        encoding = None
+    elif artifacts.compressible(Path(filename)):
+        encoding = next((e for e in artifacts.download_encodings() if acceptable(accepted, e)), None)
+    else:
+        encoding = None
+
+    as_is = encoding == stored_encoding
+    digest = await run_in_threadpool(artifacts.digest, stored_path)
+    etag = f'"{digest}"' if as_is else f'W/"{digest}-{encoding or "identity"}"'
+
+    headers = {
+        'ETag': etag,
+        'Vary': 'Accept-Encoding',
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Accept-Ranges': 'bytes' if as_is else 'none',
+    }
+    if encoding:
+        headers['Content-Encoding'] = encoding
+
+    # 2. Requête conditionnelle
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    # 3. Plage (fichier tel que stocké seulement; If-Range périmé → fichier complet)
+    if as_is and range_header:
+        if_range = request.headers.get('if-range')
+        if if_range is None or if_range.strip() == etag:
+            try:
+                bounds = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={**headers, 'Content-Range': f'bytes */{size}'})
+
+            if bounds is not None:
+                start, end = bounds
+                headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+                headers['Content-Length'] = str(end - start + 1)
+                return StreamingResponse(
+                    artifacts.read_chunks(stored_path, start, end), status_code=206,
+                    headers=headers, media_type='application/octet-stream'
+                )
+
+    # 4. Fichier complet, par blocs
+    body = artifacts.read_chunks(stored_path)
+
+    if as_is:
+        headers['Content-Length'] = str(size)
+    else:
+        if stored_encoding:
+            body = artifacts.decode(body, stored_encoding)
+        if encoding:
+            body = artifacts.encode(body, encoding)
+
+    return StreamingResponse(body, headers=headers, media_type='application/octet-stream')
@@ -0,0 +1,161 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from typing import Optional
+from datetime import datetime
+import traceback
+
+from models.executor import ExecutorSaturatedError
+from models.upload import UploadTooLargeError, spool_upload
+from models.jobs import JobRecord, get_job_store
+from routes.anonymize import (
+    UPLOAD_DIR, executor, result_cache, build_response, cache_result, cached_response,
+    validate_extension, validate_incremental, validate_output_format, validate_tenant, _saturated
+)
+from schemas.response import AnonymizationResponse, JobStatusResponse
+
+router = APIRouter()
+
+# Store des jobs (mémoire ou SQLite selon config)
+store = get_job_store()
+
+
+def _status(record: JobRecord) -> JobStatusResponse:
+    return JobStatusResponse(
+        job_id=record.job_id,
+        status=record.status,
+        stage=record.stage,
+        progress_percent=round(record.progress, 1),
+        rows_processed=record.rows_processed,
+        original_filename=record.original_filename,
+        error=record.error,
+        result_url=f"/api/jobs/{record.job_id}/result" if record.status == 'completed' else None,
+        created_at=datetime.fromtimestamp(record.created_at),
+        updated_at=datetime.fromtimestamp(record.updated_at)
+    )
+
+
+@router.post(
+    "/api/jobs",
+    response_model=JobStatusResponse,
+    status_code=202,
+    summary="Soumettre un job d'anonymisation",
+    description="Retourne immédiatement un job_id, à interroger via GET /api/jobs/{job_id}"
+)
+async def submit_job(
+    file: UploadFile = File(...),
+    tenant_id: Optional[str] = Query(None, description="Portée des pseudonymes (cohérents entre fichiers du même tenant)"),
+    output_format: Optional[str] = Query(None, description="Format de sortie: xlsx, csv ou parquet (défaut: format source)"),
+    incremental: bool = Query(False, description="Enregistre un dataset pour n'anonymiser ensuite que les lignes ajoutées")
+):
+    """
+    ⏱️ ANONYMISATION ASYNCHRONE (gros PDF / Excel)
+    """
+    scope = validate_tenant(tenant_id)
+    output_format = validate_output_format(output_format)
+    file_ext = validate_extension(file.filename)
+    validate_incremental(incremental, file_ext)
+
+    if executor.is_saturated():
+        raise _saturated(ExecutorSaturatedError())
+
+    # Réception par blocs: mémoire ou fichier temporaire unique, taille vérifiée au fil de l'eau
+    try:
+        upload = await spool_upload(file, UPLOAD_DIR)
+    except UploadTooLargeError as e:
+        raise HTTPException(413, f"❌ {e}")
+
+    record = store.create(file.filename)
+    job_id = record.job_id
+
+    # Résultat déjà en cache: job terminé immédiatement, rien à soumettre
+    cache_key = None
+    if result_cache is not None and not incremental:
+        cache_key = result_cache.make_key(upload.sha256, file_ext, scope, output_format)
+        cached = result_cache.get(cache_key) if cache_key is not None else None
+        if cached is not None:
+            upload.cleanup()
+            response = cached_response(cached, file.filename, record.created_at)
+            store.update(
+                job_id,
+                status='completed',
+                stage='exporting',
+                progress=100.0,
+                rows_processed=response.summary.rows,
+                result=response.model_dump_json()
+            )
+            return _status(store.get(job_id))
+
+    def on_progress(stage: str, percent: float, rows: int):
+        # Un événement tardif (mode process) ne doit pas écraser l'état final
+        current = store.get(job_id)
+        if current is None or current.status in ('completed', 'failed'):
+            return
+        store.update(job_id, status='running', stage=stage, progress=percent, rows_processed=rows)
+
+    def on_done(future):
+        try:
+            result = future.result()
+            response = build_response(result, record.original_filename, record.created_at)
+            store.update(
+                job_id,
+                status='completed',
+                stage='exporting',
+                progress=100.0,
+                rows_processed=result['detection']['shape'][0],
+                result=response.model_dump_json()
+            )
+        except Exception as e:
+            print(f"\n❌ ERREUR JOB {job_id}: {e}")
+            traceback.print_exception(e)
+            store.update(job_id, status='failed', error=str(e))
+            return
+
+        # Hors du try: un échec d'écriture du cache ne fait pas échouer un job terminé
+        cache_result(cache_key, upload.sha256, result, response)
+
+    try:
+        future = executor.submit(upload, progress=on_progress, scope=scope, output_format=output_format,
+                                 incremental=incremental)
+    except ExecutorSaturatedError as e:
+        # Upload déjà supprimé par l'exécuteur
+        store.update(job_id, status='failed', error=str(e))
+        raise _saturated(e)
+
+    future.add_done_callback(on_done)
+
+    return _status(store.get(job_id))
+
+
+@router.get(
+    "/api/jobs/{job_id}",
+    response_model=JobStatusResponse,
+    summary="État d'un job"
+)
+async def get_job(job_id: str):
+    """Étape, pourcentage et lignes traitées"""
+    record = store.get(job_id)
+
+    if record is None:
+        raise HTTPException(404, f"Job '{job_id}' introuvable")
+
+    return _status(record)
+
+
+@router.get(
+    "/api/jobs/{job_id}/result",
+    response_model=AnonymizationResponse,
+    summary="Résultat d'un job terminé"
+)
+async def get_job_result(job_id: str):
+    """AnonymizationResponse finale (409 tant que le job n'est pas terminé)"""
+    record = store.get(job_id)
+
+    if record is None:
+        raise HTTPException(404, f"Job '{job_id}' introuvable")
+
+    if record.status == 'failed':
+        raise HTTPException(500, f"❌ Job échoué : {record.error}")
+
+    if record.status != 'completed':
+        raise HTTPException(409, f"Job en cours ({record.stage}, {record.progress:.0f}%)")
+
+    return AnonymizationResponse.model_validate_json(record.result)
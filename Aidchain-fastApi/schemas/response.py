@@ -44,14 +44,25 @@ class ColumnInfo(BaseModel):
     )
 
 
+class CsvDialect(BaseModel):
+    """Dialecte CSV détecté au chargement"""
+    encoding: str = Field(..., description="Encodage détecté")
+    delimiter: str = Field(..., description="Séparateur de champs")
+    quotechar: str = Field('"', description="Caractère de citation")
+    has_header: bool = Field(True, description="Première ligne = noms de colonnes")
+    engine: Optional[str] = Field(None, description="Moteur de parsing (pyarrow ou c)")
+
+
 class DetectionSummary(BaseModel):
     """Résumé de la détection"""
     total_columns: int = Field(..., description="Nombre total de colonnes")
     sensitive_columns: int = Field(..., description="Nombre de colonnes sensibles")
     public_columns: int = Field(..., description="Nombre de colonnes publiques")
+    fast_path_columns: int = Field(0, description="Colonnes décidées sans NER (pré-classification)")
     file_format: str = Field(..., description="Format du fichier source")
     rows: int = Field(..., description="Nombre de lignes")
     columns: int = Field(..., description="Nombre de colonnes")
+    dialect: Optional[CsvDialect] = Field(None, description="Dialecte détecté (CSV uniquement)")
 
 
 class AnonymizationResponse(BaseModel):
@@ -84,13 +95,71 @@ class AnonymizationResponse(BaseModel):
         None,
         description="Temps de traitement en secondes"
     )
+    cached: bool = Field(
+        False,
+        description="Résultat servi depuis le cache (même fichier, même configuration)"
+    )
+    
+    # Mode incrémental
+    dataset_id: Optional[str] = Field(
+        None,
+        description="Dataset incrémental (POST /api/datasets/{dataset_id}/rows pour les ajouts)"
+    )
+    first_row: Optional[int] = Field(
+        None,
+        description="Ajout: position de la première ligne anonymisée dans le dataset"
+    )
+    dataset_rows: Optional[int] = Field(
+        None,
+        description="Ajout: lignes du dataset après cet ajout"
+    )
+
+
+class JobStatusResponse(BaseModel):
+    """État d'un job d'anonymisation asynchrone"""
+    job_id: str = Field(..., description="Identifiant du job")
+    status: str = Field(..., description="queued, running, completed ou failed")
+    stage: str = Field(..., description="Étape en cours (loading, detecting, anonymizing, exporting)")
+    progress_percent: float = Field(..., ge=0.0, le=100.0, description="Avancement (%)")
+    rows_processed: int = Field(0, description="Lignes traitées")
+    original_filename: str = Field(..., description="Nom du fichier original")
+    error: Optional[str] = Field(None, description="Message d'erreur si échec")
+    result_url: Optional[str] = Field(None, description="URL du résultat (si terminé)")
+    created_at: datetime = Field(..., description="Date/heure de soumission")
+    updated_at: datetime = Field(..., description="Dernière mise à jour")
+
+
+class DatasetResponse(BaseModel):
+    """État d'un dataset incrémental"""
+    dataset_id: str = Field(..., description="Identifiant du dataset")
+    original_filename: str = Field(..., description="Nom du fichier initial")
+    file_format: str = Field(..., description="Format du fichier initial")
+    columns: List[str] = Field(..., description="Colonnes attendues dans les ajouts")
+    sensitive_columns: List[str] = Field(..., description="Colonnes anonymisées")
+    rows: int = Field(..., description="Lignes déjà anonymisées")
+    version: int = Field(..., description="Nombre de versions (traitement initial + ajouts)")
+    created_at: datetime = Field(..., description="Date/heure du traitement initial")
+    updated_at: datetime = Field(..., description="Dernier ajout")
+
+
+class ModelStatus(BaseModel):
+    """État de chargement d'un modèle"""
+    status: str = Field(..., description="pending, loading, ready ou failed")
+    model: Optional[str] = Field(None, description="Modèle chargé (premier candidat disponible)")
+    backend: Optional[str] = Field(None, description="torch, onnx, spacy ou sklearn")
+    required: bool = Field(True, description="Nécessaire à l'état healthy ?")
+    load_seconds: Optional[float] = Field(None, description="Temps de chargement (secondes)")
+    fallback: Optional[str] = Field(None, description="Repli hors du backend demandé (ex: onnx → torch)")
+    errors: List[str] = Field(default_factory=list, description="Échecs par candidat")
 
 
 class HealthCheckResponse(BaseModel):
     """Réponse du health check"""
-    status: str = Field(..., description="Statut de l'API")
+    status: str = Field(..., description="Statut de l'API (healthy, loading, degraded)")
     version: str = Field(..., description="Version de l'API")
-    models_loaded: bool = Field(..., description="Modèles IA chargés ?")
+    models_loaded: bool = Field(..., description="Modèles IA requis tous chargés ?")
+    models: Dict[str, ModelStatus] = Field(default_factory=dict, description="État par modèle")
+    ner_cache: Optional[Dict[str, float]] = Field(None, description="Cache NER par valeur (entrées, hits, misses)")
     uptime_seconds: float = Field(..., description="Temps depuis démarrage (secondes)")
     
 
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from faker import Faker
+
+from models.anonymizer import UltraProAnonymizer
+from models.mapping_store import LRUMappingStore
+
+
+def _anonymizer():
+    anonymizer = object.__new__(UltraProAnonymizer)
+    anonymizer.fake = Faker('fr_FR')
+    anonymizer.keyed = None
+    return anonymizer
+
+
+def test_replace_runs_once_per_distinct_value():
+    calls = []
+
+    def replace(value):
+        calls.append(value)
+        return None if value == "garder" else value.upper()
+
+    col = pd.Series(["a", "b", "a", None, "garder", "b"], index=[10, 11, 12, 13, 14, 15])
+    result = _anonymizer()._map_unique(col, replace)
+
+    assert sorted(calls) == ["a", "b", "garder"]
+    assert result.tolist()[:3] == ["A", "B", "A"] and result.tolist()[4:] == ["garder", "B"]
+    assert result.isna().tolist() == [False, False, False, True, False, False]
+    assert result.index.equals(col.index)
+
+
+def test_untouched_column_and_string_dtype_are_preserved():
+    anonymizer = _anonymizer()
+    ints = pd.Series([1, 2, np.nan])
+    strings = pd.Series(["x", None, "y"], dtype="string")
+
+    assert anonymizer._map_unique(ints, lambda value: None) is ints
+    assert anonymizer._map_unique(strings, lambda value: value + "!").dtype == "string"
+
+
+def test_same_name_gets_same_pseudonym_through_the_store():
+    anonymizer = _anonymizer()
+    store = LRUMappingStore()
+    col = pd.Series(["Jean Dupont", "Marie Curie", "Jean Dupont"])
+
+    first = anonymizer._anonymize_persons(col, [], store)
+    again = anonymizer._anonymize_persons(col.iloc[::-1], [], store)
+
+    assert first[0] == first[2] != first[1]
+    assert again[2] == first[0]
+    assert "Jean Dupont" not in first.tolist()
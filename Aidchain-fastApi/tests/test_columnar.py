@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from models.columnar import DataFrameWriter, iter_tables, num_rows, read_columnar, to_arrow, write_columnar
+
+
+def test_mixed_object_column_becomes_text_with_nulls():
+    array = to_arrow(pd.Series(["a", 1, None, 2.5], dtype=object))
+
+    assert array.type == pa.string()
+    assert array.to_pylist() == ["a", "1", None, "2.5"]
+
+
+@pytest.mark.parametrize("ext", [".parquet", ".feather", ".arrow"])
+def test_write_then_read_keeps_types_and_projects_columns(tmp_path, ext):
+    df = pd.DataFrame({'id': [1, 2, 3], 'score': [0.5, np.nan, 1.5], 'nom': ["a", None, "c"]})
+    path = tmp_path / f"out{ext}"
+
+    write_columnar(df, path, ext)
+
+    pd.testing.assert_frame_equal(read_columnar(path, ext), df)
+    assert list(read_columnar(path, ext, columns=['nom']).columns) == ['nom']
+
+
+@pytest.mark.parametrize("ext", [".parquet", ".arrow"])
+def test_streamed_chunks_share_first_schema(tmp_path, ext):
+    path = tmp_path / f"stream{ext}"
+    writer = DataFrameWriter(path, ext)
+    writer.write(pd.DataFrame({'code': [1, 2], 'nom': ["a", "b"]}))
+    writer.write(pd.DataFrame({'code': ["X3", None], 'nom': ["c", "d"]}))
+    writer.close()
+
+    tables = list(iter_tables(str(path), ext, columns=['code']))
+
+    assert num_rows(str(path), ext) == 4
+    assert [table.num_rows for table in tables] == [2, 2]
+    assert pa.concat_tables(tables).column('code').to_pylist() == ["1", "2", "X3", None]
@@ -0,0 +1,77 @@
+import io
+
+import pandas as pd
+import pytest
+
+from models import csv_dialect
+from models.csv_dialect import SNIFF_BYTES, read_csv, read_options, read_sample, sniff_csv, validate_encoding
+
+CSV = (
+    "id;nom;naissance;admission;poids;actif;vide\n"
+    "1;Dupont;1984-03-02;2023-01-15T08:30;72,5;true;\n"
+    "2;Martin;02/11/1990;2023-02-01 09:00:00;80;false;\n"
+)
+
+
+def test_sniff_semicolon_with_header():
+    dialect = sniff_csv(CSV.encode('utf-8'))
+    assert dialect == {'encoding': 'utf-8', 'delimiter': ';', 'quotechar': '"', 'has_header': True}
+
+
+def test_sniff_headerless_and_encodings():
+    assert sniff_csv(b"1,2,3\n4,5,6\n")['has_header'] is False
+    assert sniff_csv('﻿a,b\n1,2\n'.encode('utf-8'))['encoding'] == 'utf-8-sig'
+    assert sniff_csv("nom,ville\nHélène,Orléans\n".encode('cp1252'))['encoding'] == 'cp1252'
+    assert sniff_csv(b"")['delimiter'] == ','
+
+
+@pytest.mark.parametrize('as_stream', [False, True])
+def test_pyarrow_schema_matches_c_engine(tmp_path, as_stream):
+    path = tmp_path / 'patients.csv'
+    path.write_text(CSV, encoding='utf-8')
+    dialect = sniff_csv(read_sample(str(path)))
+    source = io.BytesIO(path.read_bytes()) if as_stream else str(path)
+
+    df = read_csv(source, dialect)
+    expected = pd.read_csv(str(path), **read_options(dialect))
+
+    if csv_dialect.PYARROW_AVAILABLE:
+        assert dialect['engine'] == 'pyarrow'
+    assert df.dtypes.to_dict() == expected.dtypes.to_dict()
+    # Dates telles qu'écrites (pas de réécriture ISO 'T' → ' ', secondes ajoutées)
+    assert df['admission'].tolist() == ['2023-01-15T08:30', '2023-02-01 09:00:00']
+    assert df['naissance'].tolist() == ['1984-03-02', '02/11/1990']
+    assert df['vide'].isna().all()
+
+
+def test_encoding_error_beyond_sample_is_recovered(tmp_path):
+    path = tmp_path / 'long.csv'
+    rows = "".join(f"{i},patient {i}\n" for i in range(SNIFF_BYTES // 10))
+    path.write_bytes(("id,nom\n" + rows + "999,Hélène\n").encode('cp1252'))
+
+    dialect = sniff_csv(read_sample(str(path)))
+    assert dialect['encoding'] == 'utf-8'
+
+    df = read_csv(str(path), dialect)
+    assert dialect['encoding'] == 'cp1252' and dialect['encoding_validated']
+    assert df['nom'].iloc[-1] == 'Hélène'
+
+
+def test_validated_encoding_skips_second_decode_pass(tmp_path, monkeypatch):
+    path = tmp_path / 'ok.csv'
+    path.write_text("a,b\n1,é\n", encoding='utf-8')
+    dialect = {**sniff_csv(read_sample(str(path))), 'encoding_validated': True}
+
+    def fail(*args):
+        raise AssertionError("décodage complet refait")
+
+    monkeypatch.setattr(csv_dialect, 'validate_encoding', fail)
+    monkeypatch.setattr(csv_dialect, 'PYARROW_AVAILABLE', False)
+
+    assert read_csv(str(path), dialect)['b'].tolist() == ['é']
+
+
+def test_validate_encoding_chain():
+    assert validate_encoding(io.BytesIO("é".encode('utf-8')), 'utf-8') == 'utf-8'
+    assert validate_encoding(io.BytesIO("é".encode('cp1252')), 'utf-8') == 'cp1252'
+    assert validate_encoding(io.BytesIO(b"\x81\x8d"), 'utf-8') == 'latin1'
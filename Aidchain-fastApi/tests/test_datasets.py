@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+
+from models.datasets import DatasetConflictError, DatasetStore, classification
+
+
+def _create(store, rows=10):
+    dataset_id = store.new_id()
+    store.create(dataset_id, 'tenant-a', 'patients.csv', '.csv', ['id', 'nom'],
+                 {'nom': {'is_sensitive': True}}, rows)
+    return dataset_id
+
+
+def test_add_rows_advances_counter_and_version(tmp_path):
+    store = DatasetStore(tmp_path / 'datasets.sqlite3')
+    dataset_id = _create(store)
+
+    record = store.add_rows(dataset_id, 5, expected_rows=10)
+    assert (record.rows, record.version) == (15, 2)
+    assert record.sensitive_columns == ['nom']
+
+
+def test_stale_expected_rows_is_a_conflict(tmp_path):
+    store = DatasetStore(tmp_path / 'datasets.sqlite3')
+    dataset_id = _create(store)
+    store.add_rows(dataset_id, 5, expected_rows=10)
+
+    with pytest.raises(DatasetConflictError):
+        store.add_rows(dataset_id, 5, expected_rows=10)
+    with pytest.raises(DatasetConflictError):
+        store.add_rows('absent', 1, expected_rows=0)
+    assert store.get(dataset_id).rows == 15
+
+
+def test_concurrent_appends_from_two_stores_one_wins(tmp_path):
+    # Deux connexions sur le même fichier: comme deux process du pool
+    path = tmp_path / 'datasets.sqlite3'
+    stores = [DatasetStore(path), DatasetStore(path)]
+    dataset_id = _create(stores[0])
+    barrier = threading.Barrier(8)
+    outcomes = []
+
+    def append(store):
+        expected = store.get(dataset_id).rows
+        barrier.wait()
+        try:
+            store.add_rows(dataset_id, 3, expected_rows=expected)
+            outcomes.append('ok')
+        except DatasetConflictError:
+            outcomes.append('conflict')
+
+    threads = [threading.Thread(target=append, args=(stores[i % 2],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count('ok') == 1 and outcomes.count('conflict') == 7
+    record = stores[1].get(dataset_id)
+    assert (record.rows, record.version) == (13, 2)
+
+
+def test_classification_drops_samples():
+    detection = {'columns': {'nom': {
+        'is_sensitive': True, 'confidence': 0.9, 'entity_types': ['PERSON'], 'reasoning': 'NER',
+        'sample_values': ['Jean Dupont'],
+        'detected_entities': [{'text': 'Jean', 'type': 'PERSON', 'confidence': 0.9, 'start': 0}],
+    }}}
+    info = classification(detection)['nom']
+    assert 'sample_values' not in info
+    assert info['detected_entities'] == [{'text': 'Jean', 'type': 'PERSON', 'confidence': 0.9}]
+    assert info['fast_path'] is False
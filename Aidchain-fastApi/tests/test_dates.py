@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from models.dates import find_subject_column, infer_date_format, shift_dates, subject_offsets
+
+
+def test_shift_keeps_iso_format():
+    shifted = shift_dates(pd.Series(['2023-01-15', '2023-12-31', None]), 10)
+    assert shifted.tolist() == ['2023-01-25', '2024-01-10', None]
+
+
+def test_shift_keeps_day_first_format():
+    col = pd.Series(['15/01/2023', '28/02/2024', '31/12/2022'])
+    assert infer_date_format(col) == '%d/%m/%Y'
+    assert shift_dates(col, 1).tolist() == ['16/01/2023', '29/02/2024', '01/01/2023']
+
+
+def test_shift_french_month_names():
+    shifted = shift_dates(pd.Series(['15 janvier 2023', '1er mars 2023']), -1)
+    assert shifted.tolist() == ['14 janvier 2023', '28 février 2023']
+
+
+def test_per_row_offsets_and_typed_dates():
+    col = pd.Series(pd.to_datetime(['2023-01-01', '2023-01-01']))
+    shifted = shift_dates(col, np.array([1, 2]))
+    assert pd.api.types.is_datetime64_any_dtype(shifted)
+    assert shifted.dt.strftime('%Y-%m-%d').tolist() == ['2023-01-02', '2023-01-03']
+
+    text = shift_dates(pd.Series(['2023-01-01', '2023-01-01']), np.array([1, 2]))
+    assert text.tolist() == ['2023-01-02', '2023-01-03']
+
+
+def test_outlier_formats_and_unreadable_values():
+    col = pd.Series(['2023-01-15'] * 8 + ['15/01/2023', 'inconnu'])
+    shifted = shift_dates(col, 5)
+    assert shifted.iloc[0] == '2023-01-20'
+    assert shifted.iloc[8] == '20/01/2023'
+    assert shifted.iloc[9] is None  # Jamais recopiée en clair
+
+
+def test_subject_offsets_per_distinct_key():
+    calls = []
+
+    def offset_for(key):
+        calls.append(key)
+        return len(key)
+
+    offsets = subject_offsets(pd.Series(['ab', 'abc', 'ab', None]), offset_for)
+    assert offsets.tolist() == [2, 3, 2, 0]
+    assert sorted(calls) == ['', 'ab', 'abc']
+
+
+def test_find_subject_column():
+    columns = {
+        'naissance': {'is_sensitive': True, 'entity_types': ['DATE']},
+        'nom': {'is_sensitive': True, 'entity_types': ['PERSON']},
+        'ipp': {'is_sensitive': True, 'entity_types': ['IDENTIFIER']},
+    }
+    assert find_subject_column(columns) == 'ipp'
+    assert find_subject_column({'nom': columns['nom']}) == 'nom'
+    assert find_subject_column({'naissance': columns['naissance']}) is None
@@ -0,0 +1,85 @@
+import pandas as pd
+
+from models import detector as detector_module
+from models.detector import UltraProDetector
+
+
+class FakeRegistry:
+    def __init__(self, models):
+        self.models = models
+
+    def get(self, name):
+        return self.models.get(name)
+
+    def model_id(self, name):
+        return None
+
+
+class FakePipeline:
+    """Pipeline HF minimal: repère 'Dupont' et enregistre chaque appel"""
+
+    def __init__(self, fail_batch=False):
+        self.calls = []
+        self.fail_batch = fail_batch
+
+    def __call__(self, texts, batch_size=None):
+        self.calls.append(texts)
+        if isinstance(texts, str):
+            return self._entities(texts)
+        if self.fail_batch:
+            raise RuntimeError("batch indisponible")
+        return [self._entities(text) for text in texts]
+
+    def _entities(self, text):
+        start = text.find("Dupont")
+        if start < 0:
+            return []
+        return [{'word': "Dupont", 'entity_group': 'PER', 'score': 0.9, 'start': start, 'end': start + 6}]
+
+
+def _detector(monkeypatch, general, medical=None):
+    monkeypatch.setattr(detector_module, 'USE_TRANSFORMERS', True)
+    monkeypatch.setattr(detector_module, 'get_ner_cache', lambda: None)
+    detector = object.__new__(UltraProDetector)
+    detector.models = FakeRegistry({'ner_general': general, 'ner_medical': medical})
+    return detector
+
+
+def test_columns_share_one_forward_pass_per_model(monkeypatch):
+    general = FakePipeline()
+    detector = _detector(monkeypatch, general)
+    samples = {
+        'nom': pd.Series(["Jean Dupont", "Marie Curie"], index=[3, 7]),
+        'note': pd.Series(["Vu par Dupont", "RAS"], index=[0, 1]),
+    }
+
+    results = detector._extract_entities_batch(samples, full_coverage={'nom', 'note'})
+
+    assert len(general.calls) == 1
+    assert len(general.calls[0]) == 4
+    counts, entities = results['nom']
+    assert counts == {'PERSON': 1}
+    assert [(e['row_index'], e['source']) for e in entities] == [(3, 'XLM-RoBERTa')]
+    assert [e['row_index'] for e in results['note'][1]] == [0]
+
+
+def test_long_text_offsets_point_into_original_text(monkeypatch):
+    monkeypatch.setattr(detector_module, 'NER_WINDOW_CHARS', 200)
+    general = FakePipeline()
+    detector = _detector(monkeypatch, general)
+    text = "Suivi régulier. " * 30 + "Le patient Dupont va mieux."
+
+    [entities] = detector._run_ner_windows([text])
+
+    assert len(general.calls) == 1 and len(general.calls[0]) > 1
+    assert [text[e['start']:e['end']] for e in entities] == ["Dupont"]
+
+
+def test_failed_batch_falls_back_to_one_call_per_text(monkeypatch):
+    general = FakePipeline(fail_batch=True)
+    detector = _detector(monkeypatch, general)
+
+    outputs = detector._run_ner(["Jean Dupont", "RAS"])
+
+    assert general.calls[1:] == ["Jean Dupont", "RAS"]
+    assert [[e['text'] for e in ents] for ents in outputs] == [["Dupont"], []]
@@ -0,0 +1,74 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes import download
+from routes.download import RangeNotSatisfiable, etag_matches, parse_accept_encoding, parse_range
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-9', (0, 9)),
+    ('bytes=90-', (90, 99)),
+    ('bytes=95-200', (95, 99)),
+    ('bytes=-10', (90, 99)),
+    ('bytes=-500', (0, 99)),
+    (None, None),
+    ('items=0-9', None),
+    ('bytes=0-9,20-29', None),  # Plages multiples: réponse complète
+    ('bytes=abc', None),
+    ('bytes=a-b', None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize('header, size', [('bytes=100-', 100), ('bytes=-0', 100), ('bytes=-5', 0)])
+def test_unsatisfiable_range(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
+
+
+def test_accept_encoding_and_etags():
+    assert parse_accept_encoding('gzip;q=0.5, zstd, identity;q=0, br;q=x') == {
+        'gzip': 0.5, 'zstd': 1.0, 'identity': 0.0, 'br': 0.0
+    }
+    assert parse_accept_encoding(None) == {}
+    assert etag_matches('"a", W/"b"', '"b"') and etag_matches('*', '"c"')
+    assert not etag_matches('"a"', 'W/"b"')
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(download, 'OUTPUT_DIR', tmp_path)
+    (tmp_path / 'export.csv').write_bytes(b"0123456789" * 10)
+    app = FastAPI()
+    app.include_router(download.router)
+    return TestClient(app)
+
+
+def test_download_range_and_conditional(client):
+    full = client.get('/api/download/export.csv', headers={'Accept-Encoding': 'identity'})
+    assert full.status_code == 200 and full.content == b"0123456789" * 10
+    etag = full.headers['etag']
+
+    part = client.get('/api/download/export.csv', headers={'Range': 'bytes=5-14', 'If-Range': etag})
+    assert part.status_code == 206 and part.content == b"5678901234"
+    assert part.headers['content-range'] == 'bytes 5-14/100'
+
+    stale = client.get('/api/download/export.csv', headers={'Range': 'bytes=5-14', 'If-Range': '"autre"'})
+    assert stale.status_code == 200 and len(stale.content) == 100
+
+    assert client.get('/api/download/export.csv', headers={'Range': 'bytes=200-'}).status_code == 416
+    assert client.get('/api/download/export.csv', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/download/absent.csv').status_code == 404
+
+
+def test_download_compressed_on_the_fly(client, monkeypatch):
+    monkeypatch.setattr(download, 'DOWNLOAD_MIN_COMPRESS_KB', 0)
+    monkeypatch.setattr(download.artifacts, 'download_encodings', lambda: ['gzip'])
+
+    response = client.get('/api/download/export.csv', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.headers['etag'].startswith('W/') and response.headers['accept-ranges'] == 'none'
+    assert response.content == b"0123456789" * 10  # Décompressé par le client
+    assert response.num_bytes_downloaded < 100
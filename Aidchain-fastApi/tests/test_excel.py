@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from models import excel
+from models.excel import WorkbookWriter, read_workbook, split_sheets, stack_sheets, write_workbook
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _workbook(path):
+    workbook = openpyxl.Workbook()
+    patients = workbook.active
+    patients.title = "Patients"
+    patients.append([None, None])
+    patients.append(["nom", "nom"])
+    patients.append(["Jean", "Dupont"])
+    patients.append([None, None])
+    patients.append(["Marie", "Curie"])
+    visits = workbook.create_sheet("Visites")
+    visits.append(["date", None])
+    visits.append(["2024-01-02", "note"])
+    workbook.create_sheet("Vide")
+    workbook.save(path)
+
+
+def test_sheets_are_stacked_with_prefixed_columns(tmp_path):
+    path = tmp_path / "classeur.xlsx"
+    _workbook(path)
+
+    df = read_workbook(path)
+
+    assert list(df.columns) == ["Patients!nom", "Patients!nom.1", "Visites!date", "Visites!column_2"]
+    assert len(df) == 3
+    assert df["Visites!date"].isna().tolist() == [True, True, False]
+    assert set(df.attrs['sheets']) == {"Patients", "Visites"}
+
+
+def test_split_and_write_restore_each_sheet(tmp_path):
+    source = tmp_path / "classeur.xlsx"
+    target = tmp_path / "anonyme.xlsx"
+    _workbook(source)
+    df = read_workbook(source)
+
+    sheets = split_sheets(df)
+    write_workbook(df, target)
+
+    assert sheets["Patients"].values.tolist() == [["Jean", "Dupont"], ["Marie", "Curie"]]
+    assert sheets["Visites"].columns.tolist() == ["date", "column_2"]
+    assert openpyxl.load_workbook(target).sheetnames == ["Patients", "Visites"]
+    assert stack_sheets(df)["sheet"].tolist() == ["Patients", "Patients", "Visites"]
+
+
+def test_writer_continues_on_new_sheet_past_row_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel, 'EXCEL_MAX_ROWS', 3)
+    path = tmp_path / "stream.xlsx"
+
+    writer = WorkbookWriter(path, sheet="Data")
+    writer.write(pd.DataFrame({'a': [1, 2]}))
+    writer.write(pd.DataFrame({'a': [None, 4]}))
+    writer.close()
+
+    workbook = openpyxl.load_workbook(path)
+    assert workbook.sheetnames == ["Data", "Data (2)"]
+    assert [row for row in workbook["Data (2)"].iter_rows(values_only=True)] == [("a",), (None,), (4,)]
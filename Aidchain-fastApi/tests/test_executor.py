@@ -0,0 +1,65 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from models import executor
+from models.executor import in_worker_process
+
+
+def test_parent_is_not_a_pool_worker():
+    assert in_worker_process() is False
+
+
+def test_spawned_child_outside_pool_is_not_a_pool_worker():
+    # Enfant uvicorn (--reload / --workers): parent_process() non nul, pools autorisés
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        assert pool.submit(in_worker_process).result(timeout=60) is False
+
+
+def test_flag_set_by_worker_initializer(monkeypatch):
+    monkeypatch.setattr(executor, '_IN_POOL_WORKER', True)
+    assert in_worker_process() is True
+
+
+def _executor(monkeypatch, capacity):
+    monkeypatch.setattr(executor, 'EXECUTOR_MODE', 'thread')
+    pool = object.__new__(executor.PipelineExecutor)  # Hors singleton
+    executor.PipelineExecutor.__init__(pool)
+    pool.capacity = capacity
+    return pool
+
+
+def test_admission_control_and_upload_ownership(monkeypatch, tmp_path):
+    import threading
+
+    from models.executor import ExecutorSaturatedError
+    from models.upload import UploadedFile
+
+    release = threading.Event()
+    monkeypatch.setattr(executor, '_run_pipeline', lambda file_path, options: release.wait(10) and options)
+    pool = _executor(monkeypatch, capacity=2)
+
+    def upload(name):
+        path = tmp_path / name
+        path.write_bytes(b"data")
+        return UploadedFile(filename=name, size=4, path=path)
+
+    first, second, rejected = upload('a.csv'), upload('b.csv'), upload('c.csv')
+    futures = [pool.submit(first), pool.submit(second, scope='x')]
+    assert pool.is_saturated()
+
+    # Refus: 503 côté route, upload supprimé tout de suite
+    with pytest.raises(ExecutorSaturatedError) as exc:
+        pool.submit(rejected)
+    assert exc.value.retry_after > 0
+    assert not rejected.path.exists()
+
+    # Uploads acceptés: gardés jusqu'à la fin réelle du job
+    assert first.path.exists()
+    release.set()
+    assert futures[1].result(timeout=10) == {'scope': 'x'}
+    pool.shutdown()  # Attend les callbacks de fin (libération, nettoyage)
+
+    assert pool.pending == 0
+    assert not first.path.exists() and not second.path.exists()
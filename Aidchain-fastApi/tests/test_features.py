@@ -0,0 +1,54 @@
+import numpy as np
+
+from models import features
+from models.features import FEATURE_NAMES, char_features, contact_features
+
+VALUES = ["Jean-Luc", "jean.dupont@mail.fr", "+33 6 12 34 56 78", "0612345678", "ID_42",
+          "", "Ünïcödé", "𝐀𝐁𝐂 123", "😀 ok", "x@y"]
+
+
+def _reference(value):
+    """Features d'une valeur par les prédicats str, caractère par caractère"""
+    return [
+        len(value),
+        sum(c.isdigit() for c in value),
+        sum(c.isalpha() for c in value),
+        sum(c.isupper() for c in value),
+        sum(c.islower() for c in value),
+        sum(not c.isalnum() and not c.isspace() for c in value),
+        value.count('-'), value.count('_'), value.count('.'), value.count('@'),
+        value.isalnum(), value.isdigit(),
+    ]
+
+
+def test_matrix_matches_str_predicates_including_astral_code_points():
+    matrix = char_features(VALUES)['matrix']
+
+    assert matrix.shape == (len(VALUES), len(FEATURE_NAMES))
+    np.testing.assert_array_equal(matrix, np.array([_reference(v) for v in VALUES], dtype=float))
+
+
+def test_email_and_phone_flags():
+    result = char_features(VALUES)
+
+    assert [v for v, hit in zip(VALUES, result['is_email']) if hit] == ["jean.dupont@mail.fr"]
+    assert [v for v, hit in zip(VALUES, result['is_phone']) if hit] == ["+33 6 12 34 56 78", "0612345678"]
+
+
+def test_blocks_give_same_result_as_single_pass(monkeypatch):
+    expected = char_features(VALUES)
+    monkeypatch.setattr(features, '_CHAR_BUDGET', 20)
+
+    result = char_features(VALUES)
+
+    for key in ('matrix', 'is_email', 'is_phone'):
+        np.testing.assert_array_equal(result[key], expected[key])
+
+
+def test_full_column_counts_are_scaled_to_sample_size():
+    column = ["a@b.fr"] * 100 + ["texte"] * 300
+    result = contact_features(column[::2], column=column)
+
+    assert result['email_count'] == 50  # 100 emails sur 400 lignes → 50 sur 200
+    assert result['has_email'] and not result['has_phone']
+    assert len(result['id_features']) == len(features.COLUMN_FEATURE_NAMES)
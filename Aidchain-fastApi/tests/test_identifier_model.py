@@ -0,0 +1,48 @@
+import uuid
+
+import numpy as np
+
+from models.detector import UltraProDetector
+from models.features import column_features, contact_features
+from models.identifier_model import IdentifierScorer, heuristic_scores
+
+
+IDS = [f"PAT-{i:05d}" for i in range(60)]
+UUIDS = [str(uuid.UUID(int=i * 7919 + 1, version=4)) for i in range(60)]
+NAMES = ['Jean Dupont', 'Marie Curie', 'Paul Martin', 'Anne Leroy', 'Luc Bernard'] * 12
+EMAILS = [f"user{i}@example.com" for i in range(60)]
+
+
+def test_heuristic_flags_identifier_columns():
+    scores = heuristic_scores(np.vstack([column_features(v) for v in (IDS, UUIDS, NAMES, EMAILS)]))
+    assert scores.tolist() == [1.0, 1.0, 0.0, 0.0]
+    assert heuristic_scores(np.zeros((0, 25))).size == 0
+
+
+def test_trained_scorer_separates_ids_from_names():
+    scorer = IdentifierScorer()
+    scores = scorer.score(np.vstack([column_features(IDS), column_features(NAMES)]))
+    assert scores[0] >= scorer.threshold > scores[1]
+
+
+class _FailedRegistry:
+    def get(self, key):
+        return None
+
+    def status(self):
+        return {'identifier': {'status': 'failed', 'errors': ['identifier_model: artefact absent']}}
+
+
+def test_missing_scorer_falls_back_to_heuristic(capsys):
+    detector = object.__new__(UltraProDetector)
+    detector.models = _FailedRegistry()
+    detector._id_fallback_logged = False
+
+    infos = [contact_features(IDS), contact_features(NAMES)]
+    detector._score_identifiers(infos)
+    detector._score_identifiers([contact_features(UUIDS)])
+
+    assert [info['has_id'] for info in infos] == [True, False]
+    assert all(info['id_scored'] for info in infos)
+    out = capsys.readouterr().out
+    assert out.count('heuristique de repli') == 1 and 'artefact absent' in out
@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+from models.jobs import InMemoryJobStore, JobStore, SQLiteJobStore
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    return InMemoryJobStore() if request.param == 'memory' else SQLiteJobStore(tmp_path / 'jobs.sqlite3')
+
+
+def test_job_lifecycle(store):
+    record = store.create('patients.csv')
+    assert store.get(record.job_id).status == 'queued'
+
+    store.update(record.job_id, status='running', stage='anonymizing', progress=40.0, rows_processed=1200)
+    running = store.get(record.job_id)
+    assert (running.stage, running.progress, running.rows_processed) == ('anonymizing', 40.0, 1200)
+
+    done = store.update(record.job_id, status='completed', progress=100.0, result='{}')
+    assert done.status == 'completed' and done.result == '{}'
+    assert store.update('absent', status='failed') is None
+
+
+def test_purge_expired(store):
+    old, recent = store.create('old.csv'), store.create('recent.csv')
+    store.update(old.job_id, status='completed')
+    time.sleep(0.3)
+    store.update(recent.job_id, status='running')
+
+    assert store.purge_expired(max_age_seconds=0.15) == 1
+    assert store.get(old.job_id) is None and store.get(recent.job_id) is not None
+
+
+def test_sqlite_store_rejects_unknown_fields(tmp_path):
+    store = SQLiteJobStore(tmp_path / 'jobs.sqlite3')
+    record = store.create('a.csv')
+    with pytest.raises(ValueError):
+        store.update(record.job_id, statut='failed')
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        JobStore()
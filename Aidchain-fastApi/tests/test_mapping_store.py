@@ -0,0 +1,77 @@
+import pytest
+
+from models import mapping_store
+from models.mapping_store import LRUMappingStore, MappingStoreRegistry, SQLiteMappingStore
+
+
+def test_cache_evicts_least_recent_but_keeps_date_offsets():
+    store = LRUMappingStore(max_entries=2, cache=True)
+    store.set('date_offset', 12)
+    store.set('a', 1)
+    store.set('b', 2)
+    store.get('a')
+    store.set('c', 3)
+
+    assert store.get('b') is None
+    assert (store.get('a'), store.get('c'), store.get('date_offset')) == (1, 3, 12)
+    assert store.stats()['evictions'] == 1
+
+
+def test_sole_copy_never_evicts():
+    store = LRUMappingStore(max_entries=2)
+    for i in range(5):
+        store.set(f"k{i}", i)
+
+    assert [store.get(f"k{i}") for i in range(5)] == list(range(5))
+
+
+def test_sqlite_first_written_value_wins_across_connections(tmp_path):
+    path = tmp_path / "tenant.sqlite3"
+    first = SQLiteMappingStore(path)
+    second = SQLiteMappingStore(path)
+    try:
+        assert first.get_or_create('person:Jean', lambda: "Paul Martin") == "Paul Martin"
+        assert second.get_or_create('person:Jean', lambda: "Autre Nom") == "Paul Martin"
+        assert second.stats()['disk_entries'] == 1
+    finally:
+        first.close()
+        second.close()
+
+
+@pytest.fixture
+def registry(monkeypatch, tmp_path):
+    monkeypatch.setattr(mapping_store, 'MAPPING_STORE_BACKEND', 'sqlite')
+    monkeypatch.setattr(mapping_store, 'MAPPING_STORE_DIR', tmp_path)
+    monkeypatch.setattr(mapping_store, 'MAPPING_STORE_MAX_SCOPES', 1)
+    registry = object.__new__(MappingStoreRegistry)
+    registry.__init__()
+    yield registry
+    for scope in list(registry._stores):
+        registry.release(scope)
+
+
+def test_job_scope_is_released_after_use(registry):
+    with registry.use('job-1') as store:
+        store.set('k', 'v')
+        assert 'job-1' in registry.stats()
+
+    assert 'job-1' not in registry.stats()
+
+
+def test_active_scopes_are_never_evicted(registry):
+    with registry.use('tenant-a', persistent=True) as store_a:
+        with registry.use('tenant-b', persistent=True):
+            assert set(registry.stats()) == {'tenant-a', 'tenant-b'}
+        store_a.set('k', 'v')
+
+    with registry.use('tenant-c', persistent=True):
+        assert 'tenant-a' not in registry.stats()
+
+    with registry.use('tenant-a', persistent=True) as reopened:
+        assert reopened.get('k') == 'v'
+
+
+def test_invalid_scope_is_rejected(registry):
+    with pytest.raises(ValueError):
+        with registry.use('../etc'):
+            pass
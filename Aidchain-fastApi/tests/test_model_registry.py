@@ -0,0 +1,53 @@
+from models.model_registry import Loaded, ModelRegistry
+
+
+def _register(key, loader, backend):
+    registry = ModelRegistry()
+    # Clés propres aux tests, optionnelles: l'état global ready() n'en dépend pas
+    registry.register(key, ['absent', 'candidat'], loader, backend=backend, required=False)
+    return registry
+
+
+def _loader(result):
+    def load(candidate):
+        if candidate == 'absent':
+            raise RuntimeError("introuvable")
+        return result
+    return load
+
+
+def test_model_id_reports_backend_actually_loaded():
+    registry = _register('test_fallback', _loader(Loaded('pipeline', 'torch')), backend='onnx')
+
+    assert registry.get('test_fallback') == 'pipeline'
+    assert registry.model_id('test_fallback') == 'torch:candidat'
+    state = registry.status()['test_fallback']
+    assert state['backend'] == 'torch' and state['errors'] == ['absent: introuvable']
+
+
+def test_fallback_is_exposed_in_health_status():
+    from schemas.response import ModelStatus
+
+    loaded = Loaded('pipeline', 'torch', fallback="onnx → torch (pas d'export ONNX)")
+    registry = _register('test_health_fallback', _loader(loaded), backend='onnx')
+    registry.get('test_health_fallback')
+
+    state = ModelStatus(**registry.status()['test_health_fallback'])
+    assert state.backend == 'torch'
+    assert state.fallback == "onnx → torch (pas d'export ONNX)"
+
+
+def test_plain_loader_keeps_registered_backend():
+    registry = _register('test_plain', _loader('runner'), backend='onnx')
+
+    assert registry.get('test_plain') == 'runner'
+    assert registry.model_id('test_plain') == 'onnx:candidat'
+    assert registry.status()['test_plain']['fallback'] is None
+
+
+def test_failed_model_has_no_id():
+    registry = _register('test_failed', lambda _: (_ for _ in ()).throw(RuntimeError("ko")), backend='onnx')
+
+    assert registry.get('test_failed') is None
+    assert registry.model_id('test_failed') is None
+    assert registry.status()['test_failed']['status'] == 'failed'
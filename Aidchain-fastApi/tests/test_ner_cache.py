@@ -0,0 +1,49 @@
+from models import detector as detector_module
+from models.detector import UltraProDetector
+from models.ner_cache import NERCache, normalize, shift
+
+
+def test_normalize_and_shift_offsets():
+    core, lead = normalize("  Jean Dupont \n")
+    entity = {'type': 'PERSON', 'start': 0, 'end': 4}
+
+    assert (core, lead) == ("Jean Dupont", 2)
+    assert shift([entity], lead) == [{'type': 'PERSON', 'start': 2, 'end': 6}]
+    assert shift([entity], 0)[0] is not entity
+
+
+def test_lru_bound_and_hit_rate():
+    cache = NERCache(max_entries=2)
+    cache.put_many({('m', 'a'): [], ('m', 'b'): []})
+    cache.get_many([('m', 'a')])
+    cache.put_many({('m', 'c'): []})
+
+    found = cache.get_many([('m', 'a'), ('m', 'b'), ('m', 'c')])
+
+    assert set(found) == {('m', 'a'), ('m', 'c')}
+    assert cache.stats()['hits'] == 3 and cache.stats()['misses'] == 1
+
+
+def test_entries_persist_across_restarts(tmp_path):
+    path = tmp_path / "ner_cache.sqlite3"
+    NERCache(path=path).put_many({('m', 'Lyon'): [{'type': 'LOCATION', 'start': 0, 'end': 4}]})
+
+    assert NERCache(path=path).get_many([('m', 'Lyon')]) == {('m', 'Lyon'): [{'type': 'LOCATION', 'start': 0, 'end': 4}]}
+
+
+def test_only_new_distinct_texts_reach_the_model(monkeypatch):
+    cache = NERCache()
+    monkeypatch.setattr(detector_module, 'get_ner_cache', lambda: cache)
+    detector = object.__new__(UltraProDetector)
+    batches = []
+
+    def run(texts):
+        batches.append(texts)
+        return [[{'type': 'PERSON', 'start': 0, 'end': len(text)}] for text in texts]
+
+    first = detector._cached_ner('model', ["Jean", " Jean", "Marie"], run)
+    second = detector._cached_ner('model', ["Marie", "Paul"], run)
+
+    assert batches == [["Jean", "Marie"], ["Paul"]]
+    assert [e[0]['start'] for e in first] == [0, 1, 0]
+    assert second[0] == [{'type': 'PERSON', 'start': 0, 'end': 5}]
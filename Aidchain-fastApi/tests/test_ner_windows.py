@@ -0,0 +1,64 @@
+from models.ner_windows import merge_entities, split_windows, worth_scanning
+
+TEXT = "Le patient Jean Dupont est suivi à Lyon depuis 2019."
+
+
+def _ent(type_, start, end, confidence=0.9, text=None):
+    return {'type': type_, 'start': start, 'end': end, 'confidence': confidence,
+            'text': text if text is not None else TEXT[start:end]}
+
+
+def test_overlapping_entities_of_same_type_are_merged():
+    # "Jean Dupont" coupé par une frontière de fenêtre, vu deux fois
+    merged = merge_entities(TEXT, [_ent('PERSON', 11, 15, 0.7), _ent('PERSON', 13, 22, 0.95),
+                                   _ent('PERSON', 11, 22, 0.8)])
+    assert merged == [{'type': 'PERSON', 'start': 11, 'end': 22, 'confidence': 0.95, 'text': 'Jean Dupont'}]
+
+
+def test_touching_entities_merge_but_other_types_do_not():
+    merged = merge_entities(TEXT, [_ent('PERSON', 11, 15), _ent('PERSON', 15, 22), _ent('LOCATION', 35, 39)])
+    assert [(e['type'], e['text']) for e in merged] == [('PERSON', 'Jean Dupont'), ('LOCATION', 'Lyon')]
+
+
+def test_entities_without_offsets_are_deduplicated():
+    entities = [_ent('LOCATION', 35, 39),
+                {'type': 'PERSON', 'text': 'Dupont', 'confidence': 0.8, 'start': None},
+                {'type': 'PERSON', 'text': 'Dupont', 'confidence': 0.9, 'start': None}]
+    merged = merge_entities(TEXT, entities)
+    assert [e['text'] for e in merged] == ['Lyon', 'Dupont']
+
+
+def test_char_windows_cover_text_with_overlap():
+    text = " ".join(f"mot{i}" for i in range(400))
+    windows = split_windows(text, max_chars=200, stride=10)
+
+    assert len(windows) > 1 and all(len(w) <= 200 for _, w in windows)
+    assert windows[0][0] == 0 and windows[-1][0] + len(windows[-1][1]) == len(text)
+    for (start, window), (next_start, _) in zip(windows, windows[1:]):
+        assert text[start:start + len(window)] == window
+        assert next_start < start + len(window)  # Recouvrement
+        assert text[next_start - 1] == ' '  # Reprise sur un début de mot
+
+
+def test_short_text_is_single_window():
+    assert split_windows("court", max_chars=100) == [(0, "court")]
+
+
+def test_prescan():
+    assert worth_scanning("rdv avec Martin")
+    assert worth_scanning("tel 0612") and worth_scanning("a@b")
+    assert not worth_scanning("rien de notable ici")
+
+
+def _whitespace_tokenizer(text, add_special_tokens=False, return_offsets_mapping=True):
+    import re
+    return {'offset_mapping': [m.span() for m in re.finditer(r"\S+", text)]}
+
+
+def test_token_windows_follow_tokenizer_offsets():
+    text = " ".join(f"t{i}" for i in range(25))
+    windows = split_windows(text, tokenizer=_whitespace_tokenizer, max_tokens=10, stride=3)
+
+    assert [len(w.split()) for _, w in windows] == [10, 10, 10, 4]
+    assert [w.split()[0] for _, w in windows] == ['t0', 't7', 't14', 't21']
+    assert all(text[start:start + len(w)] == w for start, w in windows)
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+
+from models import pdf
+
+
+PAGES = [
+    (0, "Compte rendu\n\nPatient vu le 12/03.\nSuivi à prévoir.\n\nDr Martin"),
+    (1, "Page deux\n\n" + "\n".join(["ligne longue " * 10] * 6)),
+]
+
+
+def test_split_paragraphs():
+    assert pdf.split_paragraphs("a\nb\n\n  \n\nc") == ["a\nb", "c"]
+    assert pdf.split_paragraphs("x" * 6 + "\n" + "y" * 6, max_chars=10) == ["x" * 6, "y" * 6]
+
+
+def test_write_pages_keeps_paragraph_breaks(monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf, 'extract_pages', lambda source: PAGES)
+
+    df = pdf.read_pdf(b'%PDF')
+    assert df['page'].tolist()[:3] == [1, 1, 1]
+    assert df.attrs[pdf.CONTINUED_ATTR]  # Paragraphe > PDF_CHUNK_CHARS découpé
+
+    # L'anonymisation travaille sur une copie: les attrs suivent
+    out = tmp_path / 'out.txt'
+    pdf.write_pages(df.copy(), out)
+
+    assert out.read_text(encoding='utf-8') == '\n'.join(text for _, text in PAGES)
+
+
+def test_in_memory_pdf_is_passed_to_tasks_by_path(monkeypatch):
+    seen = {}
+
+    def fake_parallel(path, page_count):
+        seen['path'] = path
+        seen['content'] = Path(path).read_bytes()
+        return [(i, '') for i in range(page_count)]
+
+    class FakePdf:
+        pages = [None] * pdf.PDF_PARALLEL_MIN_PAGES
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(pdf, '_open', lambda source: FakePdf())
+    monkeypatch.setattr(pdf, '_extract_parallel', fake_parallel)
+    monkeypatch.setattr(pdf, 'in_worker_process', lambda: False)
+    monkeypatch.setattr(pdf, 'PDF_WORKERS', 2)
+
+    pages = pdf.extract_pages(b'%PDF-contenu')
+
+    assert len(pages) == pdf.PDF_PARALLEL_MIN_PAGES
+    assert isinstance(seen['path'], str) and seen['content'] == b'%PDF-contenu'
+    assert not Path(seen['path']).exists()  # Fichier temporaire supprimé
+
+
+def test_parallel_extraction_matches_sequential():
+    fpdf = pytest.importorskip('fpdf')
+    pytest.importorskip('pdfplumber')
+
+    document = fpdf.FPDF()
+    document.set_font('helvetica', size=12)
+    for number in range(pdf.PDF_PARALLEL_MIN_PAGES + 2):
+        document.add_page()
+        document.cell(text=f"Page {number}")
+    data = bytes(document.output())
+
+    try:
+        parallel = pdf.extract_pages(data)
+    finally:
+        pdf.shutdown_pool()
+
+    assert parallel == pdf._extract_range(data, 0, pdf.PDF_PARALLEL_MIN_PAGES + 2)
+    assert parallel[3] == (3, "Page 3")
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from models.pipeline import AidChainPipeline
+
+
+def _pipeline(tmp_path):
+    # Export seul: pas de détecteur ni de modèles
+    pipeline = object.__new__(AidChainPipeline)
+    pipeline.output_dir = tmp_path
+    return pipeline
+
+
+def test_concurrent_exports_do_not_overwrite(tmp_path):
+    pipeline = _pipeline(tmp_path)
+    df = pd.DataFrame({'nom': ['A', 'B']})
+
+    first = pipeline._export(df, 'uploads/patients.csv', '.csv')
+    second = pipeline._export(df.assign(nom=['C', 'D']), 'uploads/patients.csv', '.csv')
+
+    assert first != second
+    assert pd.read_csv(first)['nom'].tolist() == ['A', 'B']
+    assert pd.read_csv(second)['nom'].tolist() == ['C', 'D']
+
+
+def test_output_file_name(tmp_path):
+    path = _pipeline(tmp_path)._output_file('uploads/patients.xlsx', '.parquet')
+
+    assert path.parent == tmp_path and path.suffix == '.parquet'
+    stem, _, suffix = path.stem.rpartition('_')
+    assert stem.startswith('patients_anonymized_') and len(suffix) == 8
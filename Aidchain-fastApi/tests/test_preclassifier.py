@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from models.preclassifier import preclassify
+
+
+@pytest.mark.parametrize('values', [
+    ['2023-01-15', '2023-02-20', '2022-12-01', '2021-07-04', '2020-03-30'],
+    ['15/01/2023', '20/02/2023', '01/12/2022', '04/07/2021', '30/03/2020'],
+    ['15 janvier 2023', '1er février 2023', '3 mars 2022', '14 juillet 2021', '25 décembre 2020'],
+    ['2023-01-15 08:30:00', '2023-02-20 14:05:12', '2022-12-01 00:00:00', '2021-07-04 23:59:59', '2020-03-30 12:00:00'],
+])
+def test_text_dates_reach_ner(values):
+    pre = preclassify(pd.Series(values, dtype=object))
+    assert pre.route == 'text'
+    assert 'PHONE' not in pre.entity_types
+    assert pre.stats['date_ratio'] == 1.0
+
+
+def test_dates_from_csv_reader_are_not_phones(tmp_path):
+    from models.csv_dialect import name_columns, read_csv, read_sample, sniff_csv
+
+    path = tmp_path / 'dates.csv'
+    path.write_text("id;naissance\n1;1984-03-02\n2;1990-11-23\n3;1975-06-14\n4;2001-01-09\n", encoding='utf-8')
+    dialect = sniff_csv(read_sample(str(path)))
+    df = name_columns(read_csv(str(path), dialect), dialect)
+    pre = preclassify(df['naissance'])
+    assert pre.route == 'text'
+    assert pre.entity_types == []
+
+
+def test_phones_still_decided():
+    pre = preclassify(pd.Series(['06 12 34 56 78', '+33 6 98 76 54 32', '01.23.45.67.89', '0712345678']))
+    assert pre.route == 'decided'
+    assert pre.entity_types == ['PHONE']
+
+
+def test_emails_decided():
+    pre = preclassify(pd.Series(['a.b@example.com', 'c@test.fr', 'x_y@mail.org']))
+    assert pre.route == 'decided' and pre.is_sensitive
+    assert pre.entity_types == ['EMAIL']
+
+
+def test_typed_dates_and_booleans():
+    assert preclassify(pd.Series(pd.to_datetime(['2023-01-15', '2023-02-20']))).route == 'text'
+    assert preclassify(pd.Series(['oui', 'non', 'oui'])).route == 'decided'
+    assert preclassify(pd.Series([None, None])).route == 'decided'
+
+
+def test_numeric_identifiers_are_structured():
+    pre = preclassify(pd.Series(range(1_000_000, 1_000_050)))
+    assert pre.route == 'structured'
+    assert preclassify(pd.Series([1.5, 2.25, 3.0, 1.5])).route == 'decided'
+
+
+def test_codes_and_free_text():
+    assert preclassify(pd.Series(['A+', 'O-', 'B+', 'AB-'] * 5)).route == 'decided'
+    assert preclassify(pd.Series([f"PAT-{i:05d}" for i in range(50)])).route == 'structured'
+    assert preclassify(pd.Series(['Patient suivi pour diabète', 'Consultation de contrôle', 'RAS'])).route == 'text'
@@ -0,0 +1,66 @@
+import re
+import stat
+
+from models import pseudonym
+from models.pseudonym import KeyedPseudonymizer, secret_key
+
+
+def _pseudonymizer(monkeypatch, key):
+    monkeypatch.setattr(pseudonym, 'secret_key', lambda: key)
+    monkeypatch.setattr(pseudonym, 'PSEUDONYM_POOL_SIZE', 50)
+    instance = object.__new__(KeyedPseudonymizer)
+    instance._build()
+    return instance
+
+
+def test_generated_key_is_private_and_reused(monkeypatch, tmp_path):
+    monkeypatch.setattr(pseudonym, 'PSEUDONYM_SECRET_KEY', None)
+    path = tmp_path / "secrets" / "pseudonym.key"
+
+    key = secret_key(path)
+
+    assert len(key) == 64 and secret_key(path) == key
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert list(path.parent.iterdir()) == [path]
+
+
+def test_environment_key_takes_precedence(monkeypatch, tmp_path):
+    monkeypatch.setattr(pseudonym, 'PSEUDONYM_SECRET_KEY', "cle-env")
+
+    assert secret_key(tmp_path / "absent.key") == "cle-env"
+    assert not (tmp_path / "absent.key").exists()
+
+
+def test_same_key_gives_same_pseudonyms_across_instances(monkeypatch):
+    first = _pseudonymizer(monkeypatch, "cle-a")
+    second = _pseudonymizer(monkeypatch, "cle-a")
+    other = _pseudonymizer(monkeypatch, "cle-b")
+    values = ["Jean Dupont", "Marie Curie", "Paul Martin", "Anne Morel"]
+
+    assert [first.name(v) for v in values] == [second.name(v) for v in values]
+    assert [first.name(v) for v in values] != [other.name(v) for v in values]
+    assert first.date_offset("P1", 30, "job") == second.date_offset("P1", 30, "job")
+
+
+def test_formats_and_ranges(monkeypatch):
+    p = _pseudonymizer(monkeypatch, "cle-a")
+
+    assert re.fullmatch(r"ID_[0-9A-F]{8}", p.identifier("12345"))
+    assert re.fullmatch(r"MED_\d{4}", p.medical("diabète"))
+    assert "@" in p.email("jean@mail.fr")
+    assert sum(c.isdigit() for c in p.phone("0612345678")) >= 8
+    offsets = {p.date_offset(f"P{i}", 30) for i in range(200)}
+    assert min(offsets) >= -30 and max(offsets) <= 30 and len(offsets) > 20
+
+
+def test_kinds_are_separated(monkeypatch):
+    p = _pseudonymizer(monkeypatch, "cle-a")
+
+    assert p.digest('person', "Lyon") != p.digest('location', "Lyon")
+
+
+def test_scope_changes_date_offset(monkeypatch):
+    p = _pseudonymizer(monkeypatch, "cle-a")
+    offsets = [p.date_offset(f"P{i}", 365, "job-1") for i in range(10)]
+
+    assert offsets != [p.date_offset(f"P{i}", 365, "job-2") for i in range(10)]
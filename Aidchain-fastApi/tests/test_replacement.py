@@ -0,0 +1,32 @@
+import re
+
+from models.replacement import ReplacementEngine, _trie_pattern
+
+
+def test_longest_match_first():
+    engine = ReplacementEngine({'diabète': 'MED_0001', 'diabète de type 2': 'MED_0002'})
+    assert engine.replace("diabète de type 2 connu, diabète gestationnel") == "MED_0002 connu, MED_0001 gestationnel"
+
+
+def test_single_pass_does_not_cascade():
+    # Un remplacement contenant une autre forme n'est pas ré-remplacé
+    engine = ReplacementEngine({'Paris': 'Lyon', 'Lyon': 'Nice'})
+    assert engine.replace("Paris puis Lyon") == "Lyon puis Nice"
+
+
+def test_regex_characters_are_literal():
+    engine = ReplacementEngine({'C3.4 (b)': 'X', 'a+b': 'Y'})
+    assert engine.replace("C3.4 (b) et a+b, pas C3x4 (b) ni aab") == "X et Y, pas C3x4 (b) ni aab"
+
+
+def test_empty_mapping_and_keys():
+    assert ReplacementEngine({}).replace("inchangé") == "inchangé"
+    engine = ReplacementEngine({'': 'vide', 'x': 'y'})
+    assert len(engine) == 1 and engine.replace("xx") == "yy"
+
+
+def test_trie_pattern_matches_alternation():
+    words = ['ab', 'abc', 'abd', 'b', 'été', 'étés']
+    pattern = re.compile(_trie_pattern(words))
+    text = "abcd abd ab b étés été"
+    assert [m.group(0) for m in pattern.finditer(text)] == ['abc', 'abd', 'ab', 'b', 'étés', 'été']
@@ -0,0 +1,66 @@
+import os
+import time
+
+import pytest
+
+from models import result_cache
+from models.result_cache import ResultCache
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(result_cache, 'config_fingerprint', lambda: "config-v1")
+    monkeypatch.setattr(result_cache, 'models_fingerprint', lambda: '{"ner": "torch:model"}')
+    return ResultCache(tmp_path / "index.sqlite3", max_bytes=1000, files_dir=tmp_path / "files")
+
+
+def _output(tmp_path, name, size=100):
+    path = tmp_path / "outputs" / name
+    path.parent.mkdir(exist_ok=True)
+    path.write_bytes(b"x" * size)
+    return path
+
+
+def test_key_depends_on_content_scope_and_models(cache, monkeypatch):
+    key = cache.make_key("abc", ".CSV")
+
+    assert key == cache.make_key("abc", ".csv")
+    assert len({key, cache.make_key("abd", ".csv"), cache.make_key("abc", ".csv", scope="t1"),
+                cache.make_key("abc", ".csv", output_format="parquet")}) == 4
+
+    monkeypatch.setattr(result_cache, 'models_fingerprint', lambda: None)
+    assert cache.make_key("abc", ".csv") is None
+
+
+def test_hit_restores_served_file_from_own_copy(cache, tmp_path):
+    output = _output(tmp_path, "data_anonymized.csv")
+    cache.put("k1", "abc", str(output), '{"ok": true}', {'columns': {}})
+
+    output.unlink()
+    hit = cache.get("k1")
+
+    assert hit.response == '{"ok": true}' and hit.detection == {'columns': {}}
+    assert output.read_bytes() == b"x" * 100
+
+
+def test_expired_entry_is_dropped_with_its_copy(cache, tmp_path):
+    cache.put("k1", "abc", str(_output(tmp_path, "a.csv")), '{}', {})
+    cache.max_age_seconds = 0
+    time.sleep(0.01)
+
+    assert cache.get("k1") is None
+    assert os.listdir(cache.files_dir) == []
+
+
+def test_least_recently_served_entries_leave_over_budget(cache, tmp_path):
+    for name in ("a", "b", "c", "d"):
+        cache.put(name, name, str(_output(tmp_path, f"{name}.csv", size=300)), '{}', {})
+        time.sleep(0.01)
+        if name == "b":
+            cache.get("a")
+
+    served = [key for key in ("a", "b", "c", "d") if cache.get(key) is not None]
+
+    assert served == ["a", "c", "d"]  # "a" servi à nouveau après l'ajout de "b"
+    assert sum(f.stat().st_size for f in cache.files_dir.iterdir()) <= 1000
+    assert (tmp_path / "outputs" / "b.csv").exists()  # Fichier servi jamais supprimé par le cache
@@ -0,0 +1,40 @@
+import pytest
+from fastapi import HTTPException
+
+from routes import anonymize
+
+
+def test_validate_extension():
+    assert anonymize.validate_extension('Patients.CSV') == '.csv'
+    assert anonymize.validate_extension('scan.pdf') == '.pdf'
+    for name in ('rapport.docx', 'archive.zip', 'sans_extension'):
+        with pytest.raises(HTTPException) as exc:
+            anonymize.validate_extension(name)
+        assert exc.value.status_code == 400
+
+
+def test_jobs_share_the_extension_allow_list():
+    from routes import jobs
+
+    assert jobs.validate_extension is anonymize.validate_extension
+
+
+class _BrokenCache:
+    def put(self, *args):
+        raise OSError("disque plein")
+
+
+class _Response:
+    def model_dump_json(self):
+        return '{}'
+
+
+def test_cache_failure_is_logged_not_raised(monkeypatch, capsys):
+    monkeypatch.setattr(anonymize, 'result_cache', _BrokenCache())
+    result = {'output_path': 'anonymized/patients_anonymized.csv', 'detection': {}}
+    response = _Response()
+
+    anonymize.cache_result('cle', 'sha', result, response)
+    anonymize.cache_result(None, 'sha', result, response)
+
+    assert capsys.readouterr().out.count('disque plein') == 1
@@ -0,0 +1,57 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from models.upload import UploadTooLargeError, spool_upload
+
+
+class FakeUpload:
+    """UploadFile minimal: lecture asynchrone par blocs"""
+
+    def __init__(self, data: bytes, filename: str = 'patients.csv'):
+        self.filename = filename
+        self._data = data
+        self._offset = 0
+
+    async def read(self, size: int) -> bytes:
+        chunk = self._data[self._offset:self._offset + size]
+        self._offset += len(chunk)
+        return chunk
+
+
+def spool(data, tmp_path, **kwargs):
+    return asyncio.run(spool_upload(FakeUpload(data, kwargs.pop('filename', 'patients.csv')), tmp_path, **kwargs))
+
+
+def test_small_upload_stays_in_memory(tmp_path):
+    uploaded = spool(b"a,b\n1,2\n", tmp_path, memory_threshold=1024, chunk_size=3)
+
+    assert uploaded.in_memory and uploaded.path is None
+    assert uploaded.data == b"a,b\n1,2\n" and uploaded.size == 8
+    assert uploaded.sha256 == hashlib.sha256(b"a,b\n1,2\n").hexdigest()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_large_upload_spools_to_unique_file(tmp_path):
+    data = bytes(range(256)) * 40
+    first = spool(data, tmp_path, memory_threshold=1000, chunk_size=300)
+    second = spool(data, tmp_path, memory_threshold=1000, chunk_size=300)
+
+    assert not first.in_memory and first.path != second.path
+    assert first.path.read_bytes() == data and first.path.suffix == '.csv'
+    assert first.head(4) == data[:4] and first.open().read() == data
+
+    first.cleanup()
+    assert not first.path.exists()
+
+
+def test_too_large_upload_leaves_nothing(tmp_path):
+    with pytest.raises(UploadTooLargeError):
+        spool(b"x" * 5000, tmp_path, max_bytes=4000, memory_threshold=1000, chunk_size=512)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_filename_is_stripped_of_directories(tmp_path):
+    uploaded = spool(b"ok", tmp_path, filename='../../etc/passwd.txt')
+    assert uploaded.filename == 'passwd.txt' and uploaded.suffix == '.txt'